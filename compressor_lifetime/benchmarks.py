@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : benchmarks.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    采集与界面热点路径的基准测试，结果为机器可读的 JSON 基线。
+
+    1. read_pressure: PressureReader.read() 在真实大小的数据块上 (100 ms tick,
+       每块 50 个仿真样本) 的耗时，按滤波预设分别统计
+    2. plot:          1 / 8 / 32 个台架卡片的界面帧耗时 (offscreen Qt 平台):
+                      每帧对每个台架 apply_frame() 一帧遥测，再由共享调度器
+                      重绘曲线并处理绘制事件 (滚动区域外的卡片不重绘，
+                      on_screen 为可见卡片数)
+    3. csv:           CsvLogWriter 的入队耗时与写盘吞吐
+    4. sequencing:    极速仿真下完整测试循环的吞吐 (循环/s 与虚拟时间加速比)
+    5. log_view:      系统日志的每条 append_log() 耗时与每帧合并刷新 + 绘制耗时
+                      (日志远超界面容量之后)
+
+    指标名以单位结尾: _ms / _us / _ns 越小越好，_per_s / _x 越大越好。
+    run --save 写出基线，run --compare 与基线比较，超出容差时返回 1 (基线与本次
+    须同为 --quick 或同为完整运行，否则返回 2)。短时项目取多次运行的最优或中位数:
+
+        uv run compressor_lifetime/benchmarks.py run
+        uv run compressor_lifetime/benchmarks.py run --save compressor_lifetime/benchmarks_baseline.json
+        uv run compressor_lifetime/benchmarks.py run --compare compressor_lifetime/benchmarks_baseline.json
+==============================================================================
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from daq_io import AI_SAMPLE_RATE, PressureReader
+from pressure_filters import FILTER_PRESETS
+from pressure_sim import PressureSimulator
+from test_sequence import MASK_STATES, do_mask
+from csv_logger import CsvLogWriter
+
+BENCH_READ_BLOCK = 50           # 100 ms tick 下每次读取的样本数
+BENCH_PLOT_STATIONS = (1, 8, 32)
+BENCH_TOLERANCE = 0.25          # --compare 时允许的相对退化
+BENCH_CHARGE_MASK = do_mask(["V1", "COMP", "GAUGE_PWR", "COUNTER_PWR"])
+BENCH_VENT_MASK = do_mask(["V2", "V3", "GAUGE_PWR", "COUNTER_PWR"])
+
+LOWER_IS_BETTER = ("_ms", "_us", "_ns")
+HIGHER_IS_BETTER = ("_per_s", "_x")
+INFO_ONLY = ("max_ms",)         # 单个样本的极值只作参考，不判定退化
+
+
+# ============================================================================
+# [SECTION 1] 测试数据 (Bench Data)
+# ============================================================================
+
+def _sim_volts(seconds, rate=AI_SAMPLE_RATE, seed=0):
+    """一段真实形状的传感器电压: 加压 (V1 + 压缩机) 5 s / 泄压 3 s 交替 (含传感器噪声)"""
+    sim = PressureSimulator(1, rate=rate, seed=seed)
+    chunks = []
+    n_left = int(seconds * rate)
+    on = True
+    while n_left > 0:
+        n = min(n_left, int((5.0 if on else 3.0) * rate))
+        sim.set_do(0, MASK_STATES[BENCH_CHARGE_MASK if on else BENCH_VENT_MASK])
+        chunks.append(sim.sensor_volts(sim.advance(n)[0]))
+        n_left -= n
+        on = not on
+    return np.concatenate(chunks)
+
+
+class _ReplaySubscription:
+    """按固定块大小回放一段电压数据的订阅 (接口与 ChannelSubscription 的读取部分一致)"""
+
+    def __init__(self, volts, block):
+        self.capacity = block
+        self._volts = volts
+        self._block = block
+        self._pos = 0
+
+    def read_into(self, out):
+        if self._pos + self._block > len(self._volts):
+            self._pos = 0
+        n = self._block
+        out[:n] = self._volts[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+@contextmanager
+def _gui_workdir(prefix):
+    """在临时目录中运行界面基准 (主窗口会在当前目录写 SystemLog_*.csv)"""
+    old = os.getcwd()
+    d = tempfile.mkdtemp(prefix=prefix)
+    os.chdir(d)
+    try:
+        yield d
+    finally:
+        os.chdir(old)
+        shutil.rmtree(d, ignore_errors=True)
+
+
+def _percentiles(samples_s):
+    a = np.asarray(samples_s) * 1000.0
+    return {
+        "mean_ms": float(a.mean()),
+        "p50_ms": float(np.percentile(a, 50)),
+        "p99_ms": float(np.percentile(a, 99)),
+        "max_ms": float(a.max()),
+    }
+
+
+# ============================================================================
+# [SECTION 2] 基准项目 (Benchmarks)
+# ============================================================================
+
+def bench_read_pressure(quick=False, block=BENCH_READ_BLOCK):
+    """每个滤波预设: 一次 read() 的耗时与每样本成本 (取多次运行的最优)"""
+    volts = _sim_volts(40.0)
+    n_reads = len(volts) // block
+    repeat = 3 if quick else 7
+    out = {}
+    for name in FILTER_PRESETS:
+        best = float("inf")
+        for _ in range(repeat):
+            reader = PressureReader(_ReplaySubscription(volts, block), name)
+            t0 = time.perf_counter()
+            for _ in range(n_reads):
+                reader.read()
+            best = min(best, time.perf_counter() - t0)
+        out[name] = {
+            "per_read_us": best / n_reads * 1e6,
+            "per_sample_ns": best / (n_reads * block) * 1e9,
+        }
+    return out
+
+
+def bench_plot(quick=False, stations=BENCH_PLOT_STATIONS):
+    """N 个台架时一个界面帧 (遥测应用 + 曲线重绘 + 绘制) 的耗时"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    import compressor_lifetime_3_1 as gui
+    from telemetry import TelemetryFrame, TELEMETRY_FRAME_HZ
+
+    app = QApplication.instance() or QApplication([])
+    frames = 20 if quick else 100
+    per_frame = int(10 / TELEMETRY_FRAME_HZ)     # 一帧遥测包含的 100 ms tick 数
+    out = {}
+    with _gui_workdir("bench_plot_"):
+        for n in stations:
+            win = gui.MainWindow()
+            win.plot_scheduler.timer.stop()         # 由基准循环逐帧驱动
+            while len(win.stations) < n:
+                win.add_station()
+            win.show()
+            # 等入场动画 (透明度 0 -> 1) 结束，否则卡片尚不可见、不会被绘制
+            deadline = time.perf_counter() + 2.0
+            while (time.perf_counter() < deadline
+                   and any(st._entrance_anim.state() != st._entrance_anim.State.Stopped
+                           for st in win.stations)):
+                app.processEvents()
+                time.sleep(0.01)
+            t_hist = np.arange(gui.PLOT_MAX_POINTS) * 0.1
+            for st in win.stations:
+                st._accepting_data = True
+                st.start_time = 0.0
+                st.history.extend(t_hist, 1.0 + np.sin(t_hist))
+            win.plot_scheduler._on_frame()
+            app.processEvents()
+
+            t_now = t_hist[-1]
+            apply_s, frame_s = [], []
+            for _ in range(frames):
+                t = t_now + 0.1 * np.arange(1, per_frame + 1)
+                t_now = t[-1]
+                frame = TelemetryFrame(t, 1.0 + np.sin(t), f"{t_now % 5:.1f}", None, [], 0, 0.0)
+                t0 = time.perf_counter()
+                for st in win.stations:
+                    st.apply_frame(frame)
+                t1 = time.perf_counter()
+                win.plot_scheduler._on_frame()
+                app.processEvents()
+                t2 = time.perf_counter()
+                apply_s.append(t1 - t0)
+                frame_s.append(t2 - t0)
+            stats = _percentiles(frame_s)
+            stats["apply_mean_ms"] = float(np.mean(apply_s) * 1000.0)
+            stats["per_station_ms"] = stats["mean_ms"] / n
+            stats["on_screen"] = sum(st.on_screen for st in win.stations)
+            out[f"{n}_stations"] = stats
+            win.close()
+            win.deleteLater()
+            app.processEvents()
+    return out
+
+
+def bench_csv(quick=False):
+    """一个台架日志文件: write_row() 入队耗时与包含写盘的总吞吐 (取多次运行的最优)"""
+    rows = 20000 if quick else 100000
+    repeat = 3 if quick else 5
+    best_enqueue = best_total = float("inf")
+    d = tempfile.mkdtemp(prefix="bench_csv_")
+    try:
+        for r in range(repeat):
+            lg = CsvLogWriter.instance().open_log(
+                os.path.join(d, f"Log_Bench_{r}.csv"),
+                header=["Date", "Time", "Cycle", "Phase", "Step", "End_P", "Max_P", "Min_P"])
+            t0 = time.perf_counter()
+            for i in range(rows):
+                lg.write_row(["2026-01-01", "12:00:00.000", i // 20, "P2", i % 20,
+                              "2.013", "2.241", "0.498"])
+            t1 = time.perf_counter()
+            lg.close(timeout=60.0)
+            t2 = time.perf_counter()
+            best_enqueue = min(best_enqueue, t1 - t0)
+            best_total = min(best_total, t2 - t0)
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+    return {
+        "enqueue_us": best_enqueue / rows * 1e6,
+        "rows_per_s": rows / best_total,
+    }
+
+
+def bench_sequencing(quick=False):
+    """极速仿真 (虚拟时钟) 下单台架完整测试循环的吞吐 (取多次运行的最优)"""
+    from test_engine import TestEngine, EVT_RESULT
+
+    cycles = 3 if quick else 10
+    repeat = 3
+    cfg = {"device": "Dev1", "cycles": str(cycles), "target_p": "2.0", "floor_p": "0.5",
+           "max_p": "50", "simulation": True, "sim_speed": None}
+    wall = virtual = float("inf")
+    for _ in range(repeat):
+        d = tempfile.mkdtemp(prefix="bench_seq_")
+        try:
+            results = []
+            eng = TestEngine(cfg, 0, d,
+                             on_event=lambda k, p: k == EVT_RESULT and results.append(p))
+            t0 = time.perf_counter()
+            eng.run()
+            elapsed = time.perf_counter() - t0
+        finally:
+            shutil.rmtree(d, ignore_errors=True)
+        if results != [True]:
+            raise RuntimeError("仿真测试未正常完成")
+        if elapsed < wall:
+            wall, virtual = elapsed, eng.clock.elapsed
+    return {
+        "cycles_per_s": cycles / wall,
+        "per_cycle_ms": wall / cycles * 1000.0,
+        "speedup_x": virtual / wall,
+    }
+
+
+def bench_log_view(quick=False, batch=50):
+    """系统日志: append_log() 单条耗时 (每批的中位数)，以及界面容量填满之后每帧合并刷新 + 绘制的耗时"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    import compressor_lifetime_3_1 as gui
+
+    app = QApplication.instance() or QApplication([])
+    total = gui.LOG_VIEW_CAPACITY * (4 if quick else 20)
+    with _gui_workdir("bench_log_"):
+        win = gui.MainWindow()
+        win._log_timer.stop()
+        win.show()
+        app.processEvents()
+        append_s, frame_s = [], []
+        for i in range(total // batch):
+            t0 = time.perf_counter()
+            for j in range(batch):
+                win.append_log(f"[Station {1 + j % 8}] 循环 {i} 第 {j} 轮: End 2.013 Max 2.241 Min 0.498")
+            t1 = time.perf_counter()
+            win._log_timer.stop()
+            win.flush_log()
+            app.processEvents()
+            t2 = time.perf_counter()
+            append_s.append(t1 - t0)
+            if (i + 1) * batch > gui.LOG_VIEW_CAPACITY:
+                frame_s.append(t2 - t1)
+        rows = win.log_model.rowCount()
+        win.close()
+        win.deleteLater()
+        app.processEvents()
+    if rows != gui.LOG_VIEW_CAPACITY:
+        raise RuntimeError(f"日志行数 {rows} 与容量 {gui.LOG_VIEW_CAPACITY} 不符")
+    stats = _percentiles(frame_s)
+    stats["append_us"] = float(np.median(append_s) / batch * 1e6)
+    return stats
+
+
+BENCHMARKS = {
+    "read_pressure": bench_read_pressure,
+    "plot": bench_plot,
+    "csv": bench_csv,
+    "sequencing": bench_sequencing,
+    "log_view": bench_log_view,
+}
+
+
+# ============================================================================
+# [SECTION 3] 基线与比较 (Baseline & Compare)
+# ============================================================================
+
+def run_benchmarks(names=None, quick=False, out=sys.stdout):
+    results = {}
+    for name in names or BENCHMARKS:
+        print(f"运行 {name} ...", file=out, flush=True)
+        results[name] = BENCHMARKS[name](quick=quick)
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def _flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def compare(report, baseline, tolerance=BENCH_TOLERANCE):
+    """返回 [(指标, 基线值, 当前值, 变化比例, 是否退化)]，只比较两边都有的指标"""
+    base = dict(_flatten(baseline["results"]))
+    rows = []
+    for key, value in _flatten(report["results"]):
+        if key not in base or not base[key]:
+            continue
+        ratio = value / base[key]
+        if key.endswith(LOWER_IS_BETTER):
+            change = ratio - 1.0
+        elif key.endswith(HIGHER_IS_BETTER):
+            change = 1.0 / ratio - 1.0 if ratio else float("inf")
+        else:
+            continue
+        gated = not key.endswith(INFO_ONLY)
+        rows.append((key, base[key], value, change, gated and change > tolerance))
+    return rows
+
+
+def print_report(report, out=sys.stdout):
+    for key, value in _flatten(report["results"]):
+        print(f"  {key:<42}{value:>14.3f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="采集与界面热点路径的基准测试")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_run = sub.add_parser("run", help="运行基准测试")
+    p_run.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="只运行指定项目")
+    p_run.add_argument("--quick", action="store_true", help="缩短测试 (结果噪声较大)")
+    p_run.add_argument("--save", metavar="JSON", help="把结果写为基线文件")
+    p_run.add_argument("--compare", metavar="JSON", help="与基线文件比较")
+    p_run.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE,
+                       help=f"允许的相对退化 (缺省 {BENCH_TOLERANCE:g})")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"无法读取基线: {e}", file=sys.stderr)
+            return 2
+
+    if baseline is not None and bool(baseline["meta"].get("quick")) != args.quick:
+        # quick 与完整运行的样本量/重复次数不同，结果不可比
+        mode = "--quick" if baseline["meta"].get("quick") else "完整"
+        print(f"基线为{mode}运行，本次运行模式不同，无法比较 (请使用相同模式或重新 --save)",
+              file=sys.stderr)
+        return 2
+
+    report = run_benchmarks(args.only, args.quick)
+    print_report(report)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"基线已保存: {args.save}")
+
+    if baseline is None:
+        return 0
+    rows = compare(report, baseline, args.tolerance)
+    regressed = [r for r in rows if r[4]]
+    print(f"\n与基线比较 ({baseline['meta'].get('date', '?')}, 容差 {args.tolerance:.0%}):")
+    if baseline["meta"].get("platform") != report["meta"]["platform"]:
+        print(f"  注意: 基线来自不同平台 ({baseline['meta'].get('platform')})")
+    for key, old, new, change, bad in rows:
+        mark = "退化" if bad else ""
+        print(f"  {key:<42}{old:>12.3f}{new:>12.3f}{change:>+9.1%}  {mark}")
+    print(f"{len(regressed)} 项退化" if regressed else "无退化")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
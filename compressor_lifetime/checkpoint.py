@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : checkpoint.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    长时间测试的检查点与续跑 (与 Qt 无关)。
+
+    每个台架在日志目录下维护一个 Checkpoint_{dev}_Grp{n}.json，记录台架配置、
+    测试序列指纹、日志文件与进度 (循环号 + 序列中下一步的位置)。每完成一轮
+    (写入一行 CSV 之后) 以及每个循环结束时原子地重写 (临时文件 + fsync +
+    os.replace)，文件任何时刻都是完整的旧版本或新版本。
+
+    测试正常完成或被用户停止时删除检查点；程序崩溃、断电、关闭窗口或无界面
+    运行被中断时保留，下次启动可从最后完成的一轮继续，并追加到同一个
+    Log_*.csv / Timing_*.csv / Trace_*.trc。
+==============================================================================
+"""
+
+import os
+import glob
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_PATTERN = "Checkpoint_*_Grp*.json"
+
+
+def checkpoint_path(log_dir, device, group):
+    return os.path.join(log_dir, f"Checkpoint_{device}_Grp{group}.json")
+
+
+def sequence_fingerprint(seq):
+    """编译后序列的指纹: 续跑时序列必须与中断前完全一致 (步骤位置才有意义)"""
+    return hashlib.sha1(repr(seq.ops).encode("utf-8")).hexdigest()[:16]
+
+
+def _json_safe(value):
+    try:
+        json.dumps(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+class RunCheckpoint:
+    """一次运行的检查点文件: 静态部分在创建时确定，save() 只更新进度"""
+
+    def __init__(self, path, config, group, sequence, csv_file, log_ts, started=None):
+        self.path = path
+        self.saves = 0
+        self.doc = {
+            "version": CHECKPOINT_VERSION,
+            "device": config["device"],
+            "group": group,
+            # 序列单独以名称 + 指纹记录；resume 是续跑时附加的上一个检查点
+            "config": {k: v for k, v in config.items()
+                       if k not in ("sequence", "resume") and _json_safe(v)},
+            "sequence": {"name": sequence.name, "fingerprint": sequence_fingerprint(sequence)},
+            "csv_file": csv_file,
+            "log_ts": log_ts,
+            "started": started or datetime.now().isoformat(timespec="seconds"),
+            "cycle": 1, "op": 0, "reached": 0, "label": "", "clock": None,
+        }
+
+    def save(self, cycle, op, reached, label, clock_t=None):
+        """原子地写入进度: 从第 cycle 个循环的序列第 op 步继续
+
+        clock_t 为测试时钟的当前时刻 (加速/极速仿真下是虚拟时间)，续跑时从这里继续，
+        日志与曲线存档的时间轴不会倒退。
+        """
+        self.doc.update(cycle=cycle, op=op, reached=reached, label=label, clock=clock_t,
+                        updated=datetime.now().isoformat(timespec="seconds"))
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.doc, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.saves += 1
+
+    def discard(self):
+        discard_checkpoint(self.path)
+
+
+def discard_checkpoint(path):
+    for p in (path, path + ".tmp"):
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning("删除检查点失败 (%s): %s", p, e)
+
+
+def load_checkpoint(path):
+    """读取检查点；格式不对时抛 ValueError"""
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            doc = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"检查点文件损坏: {e}")
+    if not isinstance(doc, dict) or doc.get("version") != CHECKPOINT_VERSION:
+        raise ValueError("检查点版本不受支持")
+    for key in ("device", "group", "config", "sequence", "csv_file", "log_ts",
+                "cycle", "op", "reached"):
+        if key not in doc:
+            raise ValueError(f"检查点缺少字段 {key}")
+    doc["path"] = path
+    return doc
+
+
+def find_checkpoints(log_dir):
+    """目录下所有可续跑的检查点 [(path, doc)]；损坏的文件记录警告后跳过"""
+    out = []
+    for path in sorted(glob.glob(os.path.join(log_dir, CHECKPOINT_PATTERN))):
+        try:
+            out.append((path, load_checkpoint(path)))
+        except (OSError, ValueError) as e:
+            log.warning("忽略检查点 %s: %s", path, e)
+    return out
+
+
+def describe_checkpoint(doc):
+    """一行描述，用于日志与续跑提示"""
+    cycles = doc["config"].get("cycles", "?")
+    where = f"{doc['label']} 之后" if doc.get("label") else "循环开始"
+    return (f"{doc['device']} Grp{doc['group']}: 循环 {doc['cycle']}/{cycles} ({where}), "
+            f"日志 {os.path.basename(doc['csv_file'])}, 更新于 {doc.get('updated', '?')}")
+
+
+def check_resume(doc, sequence):
+    """续跑前检查序列是否一致；不一致时抛 ValueError"""
+    fp = sequence_fingerprint(sequence)
+    if doc["sequence"].get("fingerprint") != fp:
+        raise ValueError(f"测试序列与检查点不一致 (检查点: {doc['sequence'].get('name')}, "
+                         f"当前: {sequence.name})，无法续跑")
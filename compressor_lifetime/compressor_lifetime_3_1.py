@@ -31,32 +31,48 @@
 # --- 1. 标准库导入 ---
 import sys
 import os
+import re
 import time
-import random
-import csv
+import multiprocessing
 import ctypes
 import logging
-from datetime import datetime
 from collections import deque
-import statistics
+from datetime import datetime
 
 # --- 2. 第三方库导入 (GUI & Plotting) ---
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QGridLayout, QLabel,
-                             QLineEdit, QPushButton, QCheckBox, QTextEdit,
+                             QLineEdit, QPushButton, QCheckBox, QListView,
                              QFileDialog, QSplitter, QMessageBox,
                              QScrollArea, QDialog, QComboBox,
                              QSizePolicy, QFrame, QGraphicsDropShadowEffect,
                              QGraphicsOpacityEffect)
-from PyQt6.QtCore import (Qt, QThread, pyqtSignal, QPropertyAnimation,
-                          QEasingCurve, QTimer, QParallelAnimationGroup)
-from PyQt6.QtGui import QFont, QColor, QDoubleValidator, QIntValidator
+from PyQt6.QtCore import (Qt, QObject, QThread, pyqtSignal, QPropertyAnimation,
+                          QEasingCurve, QTimer, QParallelAnimationGroup,
+                          QAbstractListModel, QModelIndex, QSortFilterProxyModel,
+                          QRegularExpression)
+from PyQt6.QtGui import (QFont, QColor, QDoubleValidator, QIntValidator,
+                         QKeySequence, QShortcut)
 
 import pyqtgraph as pg
 
 # --- 3. 硬件驱动导入 (NI-DAQmx) ---
 import nidaqmx
-from nidaqmx.constants import LineGrouping, TerminalConfiguration, AcquisitionType
+from nidaqmx.constants import LineGrouping
+
+from daq_io import DeviceAcquisitionService, PressureReader
+from pressure_filters import FILTER_PRESETS, FILTER_PRESET_LABELS, DEFAULT_FILTER
+from pressure_sim import SimulatedAcquisitionService
+from loop_timing import format_timing
+from plot_data import PressureHistory
+from trace_store import TraceStore
+from csv_logger import CsvLogWriter
+from checkpoint import checkpoint_path, discard_checkpoint, find_checkpoints, describe_checkpoint
+from sim_clock import SIM_SPEED_CHOICES, sim_speed_label
+from telemetry import TELEMETRY_FRAME_HZ
+from station_process import StationProcess
+from test_engine import (TestEngine, EVT_FRAME, EVT_PROGRESS, EVT_ERROR, EVT_FAULT_PAUSE,
+                         EVT_RESULT, EVT_FINISHED, validate_test_params)
 
 log = logging.getLogger(__name__)
 
@@ -70,8 +86,22 @@ IDX_MAP = {
 }
 
 SIMULATION_MODE = False
+SIM_SPEED = 1               # 仿真倍速 (None = 极速，虚拟时间不等待)
+HW_TIMED_PULSES = False     # Phase 2 脉冲序列由板卡采样时钟硬件定时输出
+RAW_RECORDING = False       # 记录全速率原始 AI 波形 (Raw_*.bin)
+HISTORY_SPILL = False       # 曲线历史中较早的原始样本写入 History_*.bin (缩放到早期时段时读取原始值)
+DO_WATCHDOG = False         # DO 看门狗: 主机停顿超时后由板卡关断压缩机并报警
+STATION_PROCESSES = False   # 台架在独立子进程中运行 (界面卡顿不影响 DO 时序)
 
 PLOT_MAX_POINTS = 2000
+PLOT_REFRESH_FPS = 10
+PLOT_FPS_CHOICES = (5, 10, 20, 30)
+
+LOG_VIEW_CAPACITY = 5000    # 系统日志界面保留的行数 (完整历史写入 SystemLog_*.csv)
+LOG_FLUSH_MS = 100          # 日志消息合并到界面的间隔
+LOG_SOURCE_SYSTEM = "系统"
+_LOG_SOURCE_RE = re.compile(r"^\[(Station \d+)[^\]]*\]")
+_LOG_ALERT_RE = re.compile(r"故障|!!!|错误|失败|超限")
 
 STATUS_STYLES = {
     "run":   "color: #30D158; font-weight: bold; font-size: 14px; background-color: rgba(48,209,88,0.08); border-radius: 6px; padding: 2px 8px;",
@@ -165,7 +195,7 @@ IOS_LIGHT_THEME = """
     QWidget#ScrollContents { background-color: transparent; }
     QSplitter::handle { background-color: #E5E5EA; margin: 0px; border-radius: 2px; }
     QSplitter::handle:hover { background-color: #007AFF; }
-    QTextEdit {
+    QListView#LogView {
         background-color: #FAFAFA; color: #333333; border-radius: 10px;
         font-family: "Cascadia Code", "Consolas", "Menlo", monospace;
         font-size: 12px; border: 1px solid #E5E5EA; padding: 8px;
@@ -199,555 +229,87 @@ def set_keep_awake(enable=True):
         log.warning("SetThreadExecutionState 调用失败", exc_info=True)
 
 
-def validate_positive_float(text, field_name, min_val=0.0, max_val=99.9):
-    try:
-        val = float(text)
-    except (ValueError, TypeError):
-        raise ValueError(f"{field_name} 必须为有效数字")
-    if val < min_val or val > max_val:
-        raise ValueError(f"{field_name} 超出有效范围 [{min_val}, {max_val}]")
-    return val
-
-
-def validate_positive_int(text, field_name, min_val=1, max_val=999999):
-    try:
-        val = int(text)
-    except (ValueError, TypeError):
-        raise ValueError(f"{field_name} 必须为正整数")
-    if val < min_val or val > max_val:
-        raise ValueError(f"{field_name} 超出有效范围 [{min_val}, {max_val}]")
-    return val
-
-
 # ============================================================================
 # [SECTION 3] 核心逻辑层 (Core Logic / Backend)
 # ============================================================================
 
-class RetryCycleError(Exception):
-    pass
-
-
 class TestWorker(QThread):
-    sig_log = pyqtSignal(str)
-    sig_pressure = pyqtSignal(float)
-    sig_status = pyqtSignal(str, str)
+    """TestEngine 的 Qt 适配层: 在 QThread 中运行引擎，把事件转发为信号"""
+    sig_frame = pyqtSignal(object)  # TelemetryFrame: 压力样本/倒计时/状态/日志批量更新
     sig_progress = pyqtSignal(int)
     sig_finished = pyqtSignal()
     sig_error = pyqtSignal(str)
-    sig_timer = pyqtSignal(str)
     sig_button_update = pyqtSignal(str)
     sig_result = pyqtSignal(bool)  # True = success, False = error/stopped
 
     def __init__(self, config, group_offset, log_dir):
         super().__init__()
-        self.config = config
-        self.offset = group_offset
-        self.log_dir = log_dir
-        self.is_running = True
-        self.is_paused = False
-        self.do_task = None
-        self.ai_task = None
-        self.csv_file = None
-        self.dev_name = config['device']
-        self.target_cycles = int(config['cycles'])
-        self.target_p = float(config['target_p'])
-        self.floor_p = float(config['floor_p'])
-        self.max_p = float(config['max_p'])
-        self.sim_mode = config['simulation']
-        self._sim_p_val = 0.0
-        self._last_pressure = 0.0
-        self._first_read = True
-        self.pressure_deque = deque(maxlen=4)
-        self.step_max_p = 0.0
-        self.step_min_p = 99.9
-        self.fault_triggered = False
-        self.last_do_states = [False] * 8
-        self._needs_emergency_shutdown = False
-
-    def run(self):
-        try:
-            self.setup_hardware()
-            self.create_log_file()
-            self.sig_log.emit(f"启动: {self.dev_name} [Line {self.offset}-{self.offset+7}]")
-
-            current_cycle = 1
-            while current_cycle <= self.target_cycles:
-                if not self.is_running:
-                    break
-
-                try:
-                    self.check_pause_state()
-                    self.sig_status.emit(f"循环 {current_cycle}: 启动", STATUS_STYLES["run"])
-
-                    if not self.run_phase_1(current_cycle):
-                        if not self.is_running:
-                            break
-
-                    if not self.run_phase_2(current_cycle):
-                        if not self.is_running:
-                            break
-
-                    self.sig_status.emit(f"循环 {current_cycle}: 计数器触发", STATUS_STYLES["run"])
-                    self._trigger_counter()
-
-                    if not self.sleep_smart(1.0):
-                        break
-
-                    self.sig_progress.emit(current_cycle)
-                    current_cycle += 1
-
-                except RetryCycleError:
-                    if not self.is_running:
-                        break
-                    self.sig_log.emit(f"警告: 第 {current_cycle} 次循环发生故障，系统复位并重跑当前循环...")
-                    self.sig_status.emit(f"正在复位循环 {current_cycle}...", STATUS_STYLES["run"])
-                    self.finalize_success()
-                    time.sleep(2.0)
-                    continue
-
-            if self.is_running:
-                self.finalize_success()
-                self.sig_status.emit("测试完成", STATUS_STYLES["run"])
-                self.sig_log.emit(f"{self.dev_name}: 测试流程已顺利完成")
-                self.sig_timer.emit("--")
-                self.sig_result.emit(True)
-            else:
-                self.sig_status.emit("已停止", STATUS_STYLES["err"])
-                self.sig_result.emit(False)
-
-        except Exception as e:
-            self.sig_error.emit(f"系统异常: {e}")
-            log.exception("TestWorker 运行异常")
-            self.emergency_shutdown()
-            self.sig_result.emit(False)
-        finally:
-            self.cleanup()
+        self.engine = TestEngine(config, group_offset, log_dir, on_event=self._on_event)
+
+    def _on_event(self, kind, payload):
+        if kind == EVT_FRAME:
+            self.sig_frame.emit(payload)
+        elif kind == EVT_PROGRESS:
+            self.sig_progress.emit(payload)
+        elif kind == EVT_ERROR:
+            self.sig_error.emit(payload)
+        elif kind == EVT_FAULT_PAUSE:
+            self.sig_button_update.emit("continue")
+        elif kind == EVT_RESULT:
+            self.sig_result.emit(payload)
+        elif kind == EVT_FINISHED:
             self.sig_finished.emit()
 
-    def check_pause_state(self):
-        if self.is_paused and self.is_running:
-            self.sig_status.emit("已暂停 / 等待恢复", STATUS_STYLES["pause"])
-            temp_safe_states = list(self.last_do_states)
-            temp_safe_states[3] = False
-            if self.fault_triggered:
-                temp_safe_states[7] = True
-                self.sig_log.emit("故障暂停: 等待用户操作 (复位模式)")
-            else:
-                self.sig_log.emit("手动暂停: 保持状态 (继续模式)")
-
-            if not self.sim_mode and self.do_task:
-                try:
-                    self.do_task.write(temp_safe_states)
-                except nidaqmx.DaqError as e:
-                    log.warning("暂停时写入DO失败: %s", e)
-
-            while self.is_paused and self.is_running:
-                time.sleep(0.1)
-                self.read_pressure(silent=True)
-
-            if self.is_running:
-                if self.fault_triggered:
-                    self.fault_triggered = False
-                    raise RetryCycleError()
-                else:
-                    self.sig_status.emit("恢复运行...", STATUS_STYLES["run"])
-                    self.sig_log.emit("手动暂停结束，继续执行剩余步骤")
-                    self.write_do(self.last_do_states)
+    def run(self):
+        self.engine.run()
 
-    def trigger_fault(self, error_msg):
-        self.fault_triggered = True
-        self.is_paused = True
-        self.sig_error.emit(error_msg)
-        self.sig_button_update.emit("continue")
-        self.check_pause_state()
+    @property
+    def is_paused(self):
+        return self.engine.is_paused
 
     def set_pause(self, paused):
-        self.is_paused = paused
+        self.engine.set_pause(paused)
 
     def stop(self):
-        self.is_running = False
-        self.is_paused = False
-        self.sig_log.emit("!!! 用户触发紧急停止 !!!")
-        self.sig_status.emit("正在停止...", STATUS_STYLES["err"])
-        self._needs_emergency_shutdown = True
-
-    def setup_hardware(self):
-        if self.sim_mode:
-            return
-        lines = f"{self.dev_name}/port0/line{self.offset}:{self.offset+7}"
-        self.do_task = nidaqmx.Task()
-        try:
-            self.do_task.do_channels.add_do_chan(
-                lines, line_grouping=LineGrouping.CHAN_PER_LINE)
-            self.do_task.start()
-            self.do_task.write([False] * 8)
-        except Exception as e:
-            self.do_task.close()
-            self.do_task = None
-            raise RuntimeError(f"DO初始化失败: {e}") from e
+        self.engine.stop()
 
-        ai_idx = self.offset // 8
-        ai_chan = f"{self.dev_name}/ai{ai_idx}"
-        self.ai_task = nidaqmx.Task()
-        try:
-            self.ai_task.ai_channels.add_ai_voltage_chan(
-                ai_chan, terminal_config=TerminalConfiguration.RSE,
-                min_val=-10.0, max_val=10.0)
-            self.ai_task.timing.cfg_samp_clk_timing(
-                rate=500, sample_mode=AcquisitionType.CONTINUOUS,
-                samps_per_chan=1000)
-            self.ai_task.start()
-        except Exception as e:
-            self.ai_task.close()
-            self.ai_task = None
-            if self.do_task:
-                self.do_task.close()
-                self.do_task = None
-            raise RuntimeError(f"AI初始化失败: {e}") from e
 
-    def read_pressure(self, silent=False):
-        if self.sim_mode:
-            return self._simulate_pressure(silent)
+class ProcessTestWorker(QObject):
+    """StationProcess 的 Qt 适配层: 接口与 TestWorker 相同，测试在子进程中运行
 
-        try:
-            data = self.ai_task.read(
-                number_of_samples_per_channel=nidaqmx.constants.READ_ALL_AVAILABLE)
-
-            if len(data) == 0:
-                return self._last_pressure
-
-            if len(data) >= 3:
-                current_volts = statistics.median(data)
-            else:
-                current_volts = data[0]
-
-            current_p = max(0, (current_volts - 1.0) * 2.5)
-
-            self.pressure_deque.append(current_p)
-
-            filtered_p = sum(self.pressure_deque) / len(self.pressure_deque)
-            if filtered_p < 0.015:
-                filtered_p = 0.0
-
-            self._last_pressure = filtered_p
-
-            if not silent:
-                self.sig_pressure.emit(filtered_p)
+    事件在 StationProcess 的分发线程中到达，信号以排队方式送到界面线程。
+    """
+    sig_frame = pyqtSignal(object)
+    sig_progress = pyqtSignal(int)
+    sig_finished = pyqtSignal()
+    sig_error = pyqtSignal(str)
+    sig_button_update = pyqtSignal(str)
+    sig_result = pyqtSignal(bool)
 
-            self._update_stats(filtered_p)
-            self._check_safety(filtered_p)
-            return filtered_p
+    def __init__(self, config, group_offset, log_dir):
+        super().__init__()
+        self.proc = StationProcess(config, group_offset, log_dir, on_event=self._on_event)
 
-        except Exception as e:
-            if self.is_running:
-                raise
-            return 0.0
+    _on_event = TestWorker._on_event
 
-    def write_do(self, states):
-        if not self.is_running:
-            return
-        self.last_do_states = list(states)
+    def start(self):
+        self.proc.start()
 
-        if self.sim_mode:
-            return self._simulate_response(states)
-        if self.do_task:
-            try:
-                self.do_task.write(states)
-            except nidaqmx.DaqError as e:
-                self.is_running = False
-                self.sig_error.emit(f"写入硬件失败: {e}")
+    def isRunning(self):
+        return self.proc.running
 
-    def emergency_shutdown(self):
-        if self.sim_mode:
-            return
-        if self.do_task:
-            try:
-                self.do_task.stop()
-                self.do_task.start()
-                self.do_task.write([False] * 8)
-            except Exception:
-                log.warning("紧急关闭时写入DO失败", exc_info=True)
-
-    def run_phase_1(self, cycle):
-        success_count = 0
-        for i in range(1):
-            self.check_pause_state()
-            self.step_max_p = 0.0
-            self.step_min_p = 99.9
-            if not self.is_running:
-                return False
-            self.sig_status.emit(f"P1 ({i+1}/1): 初始加压", STATUS_STYLES["run"])
-            current_loop_reached = False
-            in_release_mode = False
-            t_start = time.time()
-            while time.time() - t_start < 90.0:
-                if not self.is_running:
-                    return False
-
-                if self.is_paused:
-                    self.check_pause_state()
-
-                self.sig_timer.emit(f"{90.0 - (time.time() - t_start):.1f}")
-                p = self.read_pressure()
-                states = [False] * 8
-                states[0] = True
-                states[4] = True
-                states[5] = True
-                if not in_release_mode:
-                    states[3] = True
-                    if p >= self.target_p:
-                        current_loop_reached = True
-                        in_release_mode = True
-                        states[3] = True
-                        states[1] = True
-                        states[2] = True
-                        states[0] = False
-                        self.sig_status.emit(f"P1 ({i+1}/1): 达标泄压", STATUS_STYLES["run"])
-                else:
-                    states[3] = True
-                    states[1] = True
-                    states[2] = True
-                    states[0] = False
-                    if p <= self.floor_p:
-                        in_release_mode = False
-                        self.sig_status.emit(f"P1 ({i+1}/1): 重新打压", STATUS_STYLES["run"])
-                self.write_do(states)
-                time.sleep(0.1)
-            if current_loop_reached:
-                success_count += 1
-            else:
-                self.sig_log.emit(f"警告: P1 第 {i+1} 次循环未达到目标压力")
-            if not self.run_release_57s(cycle, f"P1 ({i+1}/1)"):
-                return False
-            self.log_csv(cycle, "Phase_1", f"{i+1}/1 Done", self.read_pressure(silent=True))
-        if success_count == 0:
-            self.trigger_fault(f"故障: 阶段一循环均未达到目标压力 {self.target_p} Bar")
-            return False
-        return True
-
-    def run_phase_2(self, cycle):
-        total_rounds = 30
-        for i in range(total_rounds):
-            self.check_pause_state()
-            self.step_max_p = 0.0
-            self.step_min_p = 99.9
-            if not self.is_running:
-                return False
-            for j in range(10):
-                if not self.is_running:
-                    return False
-                if self.is_paused:
-                    self.check_pause_state()
-
-                self.sig_status.emit(
-                    f"P2 ({i+1}/{total_rounds}): 脉冲 {j+1}/10", STATUS_STYLES["run"])
-                if j == 9:
-                    self._run_complex_pulse()
-                else:
-                    self._run_simple_pulse()
-            if not self.run_release_57s(cycle, f"P2 ({i+1}/{total_rounds})"):
-                return False
-            self.log_csv(cycle, "Phase_2", f"{i+1}/{total_rounds} Done",
-                         self.read_pressure(silent=True))
-        return True
-
-    def run_release_57s(self, cycle, phase_name):
-        self.sig_status.emit(f"{phase_name}: 泄压 (V2+V3)", STATUS_STYLES["run"])
-        s_a = [False] * 8
-        s_a[1] = True
-        s_a[2] = True
-        s_a[4] = True
-        s_a[5] = True
-        self.write_do(s_a)
-        if not self.sleep_smart(20.0):
-            return False
-        self.sig_status.emit(f"{phase_name}: 泄压 (V1)", STATUS_STYLES["run"])
-        s_b = [False] * 8
-        s_b[0] = True
-        s_b[4] = True
-        s_b[5] = True
-        self.write_do(s_b)
-        if not self.sleep_smart(37.0):
-            return False
-        return True
-
-    def sleep_smart(self, duration):
-        start = time.time()
-        while time.time() - start < duration:
-            if not self.is_running:
-                return False
-            if self.is_paused:
-                self.check_pause_state()
-            self.sig_timer.emit(f"{duration - (time.time() - start):.1f}")
-            self.read_pressure()
-            time.sleep(0.1)
-        self.sig_timer.emit("0.0")
-        return True
-
-    def finalize_success(self):
-        if self.sim_mode:
-            return
-        if self.do_task:
-            try:
-                f = [False] * 8
-                f[4] = True
-                f[5] = True
-                self.do_task.write(f)
-            except Exception:
-                log.warning("finalize_success 写入DO失败", exc_info=True)
+    def wait(self, msecs):
+        return self.proc.wait(msecs / 1000.0)
 
-    def cleanup(self):
-        if self._needs_emergency_shutdown:
-            self.emergency_shutdown()
-            self._needs_emergency_shutdown = False
+    @property
+    def is_paused(self):
+        return self.proc.is_paused
 
-        if not self.sim_mode and self.do_task:
-            try:
-                states = [False] * 8
-                if self.fault_triggered:
-                    states[7] = True
-                self.do_task.write(states)
-                self.do_task.close()
-            except Exception:
-                log.warning("cleanup DO 关闭失败", exc_info=True)
-            finally:
-                self.do_task = None
-        if not self.sim_mode and self.ai_task:
-            try:
-                self.ai_task.close()
-            except Exception:
-                log.warning("cleanup AI 关闭失败", exc_info=True)
-            finally:
-                self.ai_task = None
-
-    def create_log_file(self):
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.csv_file = os.path.join(
-            self.log_dir, f"Log_{self.dev_name}_Grp{self.offset//8}_{ts}.csv")
-        with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
-            csv.writer(f).writerow(
-                ["Date", "Time", "Cycle", "Phase", "Step", "End_P", "Max_P", "Min_P"])
-
-    def log_csv(self, cycle, phase, step, end_p):
-        if not self.csv_file:
-            return
-        try:
-            n = datetime.now()
-            with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-                csv.writer(f).writerow([
-                    n.strftime("%Y-%m-%d"), n.strftime("%H:%M:%S"),
-                    cycle, phase, step, f"{end_p:.2f}",
-                    f"{self.step_max_p:.2f}", f"{self.step_min_p:.2f}"])
-        except OSError as e:
-            log.warning("CSV 写入失败: %s", e)
-
-    def _simulate_pressure(self, silent):
-        time.sleep(0.02)
-        noise = random.uniform(-0.05, 0.05)
-        self._sim_p_val = max(0, self._sim_p_val + noise)
-        if not silent:
-            self.sig_pressure.emit(self._sim_p_val)
-        self._update_stats(self._sim_p_val)
-        self._check_safety(self._sim_p_val)
-        return self._sim_p_val
-
-    def _simulate_response(self, states):
-        if states[3] and states[0]:
-            self._sim_p_val += 0.15
-        elif states[1] or states[2]:
-            self._sim_p_val = max(0, self._sim_p_val - 0.3)
-        elif states[0]:
-            self._sim_p_val = max(0, self._sim_p_val - 0.05)
-
-    def _update_stats(self, val):
-        if val > self.step_max_p:
-            self.step_max_p = val
-        if val < self.step_min_p:
-            self.step_min_p = val
-
-    def _check_safety(self, val):
-        if val > self.max_p:
-            self.trigger_fault(f"压力超限: {val:.2f} > {self.max_p}")
-
-    def _trigger_counter(self):
-        s = [False] * 8
-        s[1] = True
-        s[2] = True
-        s[4] = True
-        s[5] = True
-        s[6] = True
-        self.write_do(s)
-
-    def _write_safe_idle(self):
-        safe = [False] * 8
-        safe[4] = True
-        safe[5] = True
-        self.write_do(safe)
-
-    def _run_simple_pulse(self):
-        s_on = [False] * 8
-        s_on[0] = True
-        s_on[3] = True
-        s_on[4] = True
-        s_on[5] = True
-        self.write_do(s_on)
-        if not self.sleep_smart(1.0):
-            self._write_safe_idle()
-            return
-        s_off = [False] * 8
-        s_off[0] = True
-        s_off[4] = True
-        s_off[5] = True
-        self.write_do(s_off)
-        if not self.sleep_smart(1.0):
-            self._write_safe_idle()
-            return
+    def set_pause(self, paused):
+        self.proc.set_pause(paused)
 
-    def _run_complex_pulse(self):
-        for _ in range(5):
-            if not self.is_running:
-                self._write_safe_idle()
-                return
-            s1 = [False] * 8
-            s1[0] = True
-            s1[3] = True
-            s1[2] = True
-            s1[4] = True
-            s1[5] = True
-            self.write_do(s1)
-            if not self.sleep_smart(0.1):
-                self._write_safe_idle()
-                return
-            s2 = [False] * 8
-            s2[0] = True
-            s2[3] = True
-            s2[4] = True
-            s2[5] = True
-            self.write_do(s2)
-            if not self.sleep_smart(0.1):
-                self._write_safe_idle()
-                return
-        for _ in range(5):
-            if not self.is_running:
-                self._write_safe_idle()
-                return
-            s3 = [False] * 8
-            s3[0] = True
-            s3[2] = True
-            s3[4] = True
-            s3[5] = True
-            self.write_do(s3)
-            if not self.sleep_smart(0.1):
-                self._write_safe_idle()
-                return
-            s4 = [False] * 8
-            s4[0] = True
-            s4[4] = True
-            s4[5] = True
-            self.write_do(s4)
-            if not self.sleep_smart(0.1):
-                self._write_safe_idle()
-                return
+    def stop(self):
+        self.proc.stop()
 
 
 # ============================================================================
@@ -763,11 +325,11 @@ class ManualControlDialog(QDialog):
         self.offset = offset
         self.station = station_widget
         self.do_task = None
-        self.ai_task = None
+        self.ai_sub = None
+        self.pressure_reader = None
+        self.sim = None
         self.current_states = [False] * 8
         self.buttons = []
-        self._sim_p = 0.0
-        self.debug_deque = deque(maxlen=4)
         self.init_ui()
         self.start_tasks()
 
@@ -870,7 +432,12 @@ class ManualControlDialog(QDialog):
         layout.addWidget(close_btn)
 
     def start_tasks(self):
-        if not SIMULATION_MODE:
+        if SIMULATION_MODE:
+            # 与测试线程共用实时仿真模型，读数经本台架配置的同一滤波管线
+            self.sim = SimulatedAcquisitionService.attach()
+            self.pressure_reader = PressureReader(
+                self.sim.subscription, self.station.filter_preset())
+        else:
             try:
                 self.do_task = nidaqmx.Task()
                 lines = f"{self.dev_name}/port0/line{self.offset}:{self.offset+7}"
@@ -883,24 +450,13 @@ class ManualControlDialog(QDialog):
                 self.do_task = None
 
             try:
-                self.ai_task = nidaqmx.Task()
-                ai_idx = self.offset // 8
-                ai_chan = f"{self.dev_name}/ai{ai_idx}"
-                self.ai_task.ai_channels.add_ai_voltage_chan(
-                    ai_chan, terminal_config=TerminalConfiguration.RSE,
-                    min_val=-10.0, max_val=10.0)
-                self.ai_task.timing.cfg_samp_clk_timing(
-                    rate=500, sample_mode=AcquisitionType.CONTINUOUS,
-                    samps_per_chan=1000)
-                self.ai_task.start()
+                self.ai_sub = DeviceAcquisitionService.subscribe_channel(
+                    self.dev_name, self.offset // 8)
+                self.pressure_reader = PressureReader(
+                    self.ai_sub, self.station.filter_preset())
             except Exception as e:
-                log.warning("AI Task 初始化失败 (调试模式): %s", e)
-                if self.ai_task:
-                    try:
-                        self.ai_task.close()
-                    except Exception:
-                        pass
-                self.ai_task = None
+                log.warning("AI 订阅失败 (调试模式): %s", e)
+                self.ai_sub = None
 
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_pressure)
@@ -910,43 +466,11 @@ class ManualControlDialog(QDialog):
         raw_val = 0.0
         filtered_val = 0.0
 
-        if SIMULATION_MODE:
-            if self.current_states[3] and self.current_states[0]:
-                self._sim_p += 0.2
-            elif self.current_states[1] or self.current_states[2]:
-                self._sim_p -= 0.3
-            else:
-                self._sim_p -= 0.05
-            base_p = max(0, min(3.0, self._sim_p))
-
-            noise = random.uniform(-0.15, 0.15)
-            raw_val = max(0, base_p + noise)
-            self.debug_deque.append(raw_val)
-            filtered_val = sum(self.debug_deque) / len(self.debug_deque)
-
-        elif self.ai_task:
+        if self.pressure_reader:
             try:
-                data = self.ai_task.read(
-                    number_of_samples_per_channel=nidaqmx.constants.READ_ALL_AVAILABLE)
-
-                if len(data) > 0:
-                    raw_volts = data[-1]
-                    raw_val = max(0, (raw_volts - 1.0) * 2.5)
-
-                    if len(data) >= 3:
-                        median_volts = statistics.median(data)
-                    else:
-                        median_volts = sum(data) / len(data)
-
-                    mid_p = max(0, (median_volts - 1.0) * 2.5)
-                    self.debug_deque.append(mid_p)
-                    filtered_val = sum(self.debug_deque) / len(self.debug_deque)
-                    if filtered_val < 0.05:
-                        filtered_val = 0.0
-                else:
-                    if self.debug_deque:
-                        filtered_val = self.debug_deque[-1]
-
+                self.pressure_reader.read()
+                raw_val = self.pressure_reader.raw
+                filtered_val = self.pressure_reader.filtered
             except Exception:
                 raw_val = 0.0
                 filtered_val = 0.0
@@ -956,11 +480,15 @@ class ManualControlDialog(QDialog):
 
     def manual_trigger_alarm(self):
         self.station.set_glow_state("error")
-        if not SIMULATION_MODE and self.do_task:
+        if self.sim or self.do_task:
             try:
                 states = [False] * 8
                 states[7] = True
-                self.do_task.write(states)
+                if self.sim:
+                    self.sim.set_do(states)
+                else:
+                    self.do_task.write(states)
+                self.current_states = states
                 for i, btn in enumerate(self.buttons):
                     btn.setChecked(i == 7)
                     self.update_btn_style(i, i == 7)
@@ -971,7 +499,9 @@ class ManualControlDialog(QDialog):
         is_on = self.buttons[idx].isChecked()
         self.current_states[idx] = is_on
         self.update_btn_style(idx, is_on)
-        if not SIMULATION_MODE and self.do_task:
+        if self.sim:
+            self.sim.set_do(self.current_states)
+        elif self.do_task:
             try:
                 self.do_task.write(self.current_states)
             except nidaqmx.DaqError as e:
@@ -993,7 +523,21 @@ class ManualControlDialog(QDialog):
                 "font-size: 12px; font-weight: 600;")
 
     def closeEvent(self, event):
+        self.release_tasks()
+        event.accept()
+
+    def done(self, result):
+        # "断开连接并关闭" 走 accept()，不会触发 closeEvent
+        self.release_tasks()
+        super().done(result)
+
+    def release_tasks(self):
         self.timer.stop()
+        if self.sim:
+            self.sim.set_do([False] * 8)
+            self.sim.close()
+            self.sim = None
+            self.pressure_reader = None
         if self.do_task:
             try:
                 self.do_task.write([False] * 8)
@@ -1001,23 +545,260 @@ class ManualControlDialog(QDialog):
                 self.do_task.close()
             except Exception:
                 log.warning("关闭调试窗口时DO清理失败", exc_info=True)
-        if self.ai_task:
+            self.do_task = None
+        if self.ai_sub:
             try:
-                self.ai_task.stop()
-                self.ai_task.close()
+                self.ai_sub.close()
             except Exception:
                 log.warning("关闭调试窗口时AI清理失败", exc_info=True)
-        event.accept()
+            self.ai_sub = None
+            self.pressure_reader = None
 
 
+class TraceReviewDialog(QDialog):
+    """历史运行回放: 打开 Trace_*.trc，整场概览 + 按 循环/阶段 查看压力与 DO 状态"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("历史回放 (Trace Review)")
+        self.resize(1000, 720)
+        self.store = None
+        self._t_base = 0.0
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        bar = QHBoxLayout()
+        bar.setSpacing(8)
+        btn_open = QPushButton("打开存档")
+        btn_open.setObjectName("BtnPrimary")
+        btn_open.setFixedSize(100, 32)
+        btn_open.clicked.connect(lambda: self.open_file())
+        bar.addWidget(btn_open)
+        btn_refresh = QPushButton("刷新")
+        btn_refresh.setObjectName("BtnSecondary")
+        btn_refresh.setFixedSize(64, 32)
+        btn_refresh.setToolTip("重新读取索引 (查看仍在运行的测试)")
+        btn_refresh.clicked.connect(self.reload)
+        bar.addWidget(btn_refresh)
+        self.lbl_file = QLabel("未打开")
+        self.lbl_file.setStyleSheet("color: #8E8E93;")
+        bar.addWidget(self.lbl_file, 1)
+        bar.addWidget(QLabel("循环:"))
+        self.combo_cycle = QComboBox()
+        self.combo_cycle.setFixedWidth(110)
+        self.combo_cycle.currentIndexChanged.connect(self.on_cycle_changed)
+        bar.addWidget(self.combo_cycle)
+        bar.addWidget(QLabel("阶段:"))
+        self.combo_phase = QComboBox()
+        self.combo_phase.setFixedWidth(130)
+        self.combo_phase.currentIndexChanged.connect(self.show_trace)
+        bar.addWidget(self.combo_phase)
+        layout.addLayout(bar)
+
+        # 整场概览 (1 min 汇总的 min/max 包络 + 均值)，选中的循环以阴影标出
+        self.overview = self._make_plot(120)
+        self.overview.setLabel('bottom', "运行时间 (h)")
+        self.ov_min = self.overview.plot(pen=pg.mkPen('#B4D9FF'))
+        self.ov_max = self.overview.plot(pen=pg.mkPen('#B4D9FF'))
+        self.overview.addItem(pg.FillBetweenItem(self.ov_min, self.ov_max, brush='#B4D9FF'))
+        self.ov_mean = self.overview.plot(pen=pg.mkPen('#007AFF', width=1))
+        self.region = pg.LinearRegionItem(movable=False, brush=(255, 159, 10, 60))
+        self.region.hide()
+        self.overview.addItem(self.region)
+        layout.addWidget(self.overview)
+
+        self.plot = self._make_plot(260)
+        self.plot.setLabel('left', "压力 (Bar)")
+        self.curve = self.plot.plot(pen=pg.mkPen('#007AFF', width=2))
+        layout.addWidget(self.plot, 3)
+
+        self.do_plot = self._make_plot(180)
+        self.do_plot.setXLink(self.plot)
+        self.do_plot.setLabel('bottom', "循环内时间 (s)")
+        self.do_plot.getAxis('left').setTicks([[(i + 0.4, IDX_MAP[i]) for i in range(8)]])
+        self.do_plot.setYRange(-0.2, 8.0, padding=0)
+        self.do_curves = [self.do_plot.plot(pen=pg.mkPen('#30D158', width=1.5)) for _ in range(8)]
+        layout.addWidget(self.do_plot, 2)
+
+        self.lbl_info = QLabel("")
+        self.lbl_info.setStyleSheet("color: #8E8E93; font-size: 11px;")
+        layout.addWidget(self.lbl_info)
+
+    def _make_plot(self, min_height):
+        plot = pg.PlotWidget()
+        plot.setBackground('#FFFFFF')
+        plot.setMinimumHeight(min_height)
+        plot.getAxis('left').setPen('#8E8E93')
+        plot.getAxis('bottom').setPen('#8E8E93')
+        plot.showGrid(x=True, y=True, alpha=0.1)
+        return plot
+
+    def open_file(self, path=None):
+        if path is None:
+            path, _ = QFileDialog.getOpenFileName(
+                self, "打开曲线存档", os.getcwd(), "曲线存档 (Trace_*.trc)")
+            if not path:
+                return
+        try:
+            self.store = TraceStore(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "无法打开", f"读取曲线存档失败:\n{e}")
+            return
+        self.lbl_file.setText(
+            f"{os.path.basename(path)}  ({self.store.device} Grp{self.store.group})")
+        self.reload()
+
+    def reload(self):
+        if self.store is None:
+            return
+        current = self.combo_cycle.currentData()
+        self.store.refresh()
+
+        rows = self.store.rollup("1m")
+        if len(rows) < 30:
+            rows = self.store.rollup("1s")     # 短时运行用 1 s 汇总
+        self._t_base = float(rows["t"][0]) if len(rows) else self.store.start_time
+        hours = (rows["t"] - self._t_base) / 3600.0
+        self.ov_min.setData(hours, rows["p_min"])
+        self.ov_max.setData(hours, rows["p_max"])
+        self.ov_mean.setData(hours, rows["p_mean"])
+
+        cycles = self.store.cycles()
+        self.combo_cycle.blockSignals(True)
+        self.combo_cycle.clear()
+        for c in cycles:
+            self.combo_cycle.addItem(f"循环 {c}", c)
+        if current in cycles:
+            self.combo_cycle.setCurrentIndex(cycles.index(current))
+        self.combo_cycle.blockSignals(False)
+        self.on_cycle_changed()
+
+    def on_cycle_changed(self, *_):
+        cycle = self.combo_cycle.currentData()
+        self.combo_phase.blockSignals(True)
+        self.combo_phase.clear()
+        self.combo_phase.addItem("全部阶段", None)
+        if cycle is not None:
+            for name in self.store.phases(cycle):
+                self.combo_phase.addItem(name, name)
+        self.combo_phase.blockSignals(False)
+        self.show_trace()
+
+    def _clear_trace(self):
+        self.curve.setData([], [])
+        for c in self.do_curves:
+            c.setData([], [])
+        self.region.hide()
+        self.lbl_info.setText("")
+
+    def show_trace(self, *_):
+        cycle = self.combo_cycle.currentData()
+        if self.store is None or cycle is None:
+            self._clear_trace()
+            return
+        t0 = time.perf_counter()
+        ticks = self.store.trace(cycle, self.combo_phase.currentData())
+        query_ms = (time.perf_counter() - t0) * 1000.0
+        if len(ticks) == 0:
+            self._clear_trace()
+            return
+        t = ticks["t"] - ticks["t"][0]
+        self.curve.setData(t, ticks["p"])
+        for i, c in enumerate(self.do_curves):
+            c.setData(t, i + 0.8 * ((ticks["do"] >> i) & 1))
+        self.plot.enableAutoRange()
+        self.region.setRegion(((ticks["t"][0] - self._t_base) / 3600.0,
+                               (ticks["t"][-1] - self._t_base) / 3600.0))
+        self.region.show()
+        self.lbl_info.setText(
+            f"{len(ticks)} 点, 时长 {t[-1]:.1f} s, 压力 {ticks['p'].min():.2f} ~ "
+            f"{ticks['p'].max():.2f} Bar (查询 {query_ms:.1f} ms)")
+
 # ============================================================================
 # [SECTION 5] 核心 UI 组件 (View Components)
 # ============================================================================
 
+class PlotRefreshScheduler(QObject):
+    """所有台架共享的定帧率重绘定时器，每帧只重绘数据有变化且可见的台架"""
+
+    def __init__(self, fps=PLOT_REFRESH_FPS, parent=None):
+        super().__init__(parent)
+        self._dirty = set()
+        self.fps = fps
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._on_frame)
+        self.set_fps(fps)
+
+    def set_fps(self, fps):
+        self.fps = fps
+        self.timer.start(max(1, int(1000 / fps)))
+
+    def mark_dirty(self, station):
+        self._dirty.add(station)
+
+    def discard(self, station):
+        self._dirty.discard(station)
+
+    def _on_frame(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        for st in dirty:
+            if st.on_screen:
+                st.redraw_plot()
+            else:
+                self._dirty.add(st)     # 不可见的卡片保留脏标记，重新可见后一次补画
+
+
+class LogRingModel(QAbstractListModel):
+    """系统日志的定长环形模型: 超出容量时丢弃最早的行，配合 QListView 只绘制可见行"""
+
+    SourceRole = Qt.ItemDataRole.UserRole + 1
+    _ALERT_COLOR = QColor("#FF453A")
+
+    def __init__(self, capacity=LOG_VIEW_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self._rows = deque(maxlen=capacity)     # (时间, 来源, 文本, 是否告警)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        stamp, source, text, alert = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"[{stamp}] {text}"
+        if role == self.SourceRole:
+            return source
+        if role == Qt.ItemDataRole.ForegroundRole and alert:
+            return self._ALERT_COLOR
+        return None
+
+    def append_batch(self, rows):
+        """一次追加一批行: 先从头部移除溢出的行，再在尾部插入 (每批各一次模型通知)"""
+        rows = rows[-self.capacity:]
+        overflow = len(self._rows) + len(rows) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._rows.popleft()
+            self.endRemoveRows()
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+
 class StationWidget(QFrame):
     sig_remove = pyqtSignal(object)
 
-    def __init__(self, idx, log_signal):
+    def __init__(self, idx, log_signal, plot_scheduler):
         super().__init__()
         self.setObjectName("Card")
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
@@ -1027,10 +808,16 @@ class StationWidget(QFrame):
         self.global_log = log_signal
         self.worker = None
         self.hardware_connected = False
-        self.data_x = deque(maxlen=PLOT_MAX_POINTS)
-        self.data_y = deque(maxlen=PLOT_MAX_POINTS)
+        self.plot_scheduler = plot_scheduler
+        self.history = PressureHistory()
+        self._latest_p = 0.0
         self.start_time = 0
         self._accepting_data = False
+        self._resume = None         # 待续跑的检查点 (下一次 start_test 使用)
+        self._checkpoint = None     # 当前运行的检查点文件路径
+        self._user_stopped = False
+        self.on_screen = True       # 卡片在滚动区域中可见且窗口未最小化
+        self._deferred = {}         # 不可见期间最新的状态/计时/统计，重新可见时一次应用
         self.init_ui()
         self.setup_breathing_animation()
 
@@ -1047,6 +834,11 @@ class StationWidget(QFrame):
         self.glow_anim.setEasingCurve(QEasingCurve.Type.InOutSine)
 
     def set_glow_state(self, state):
+        anim = getattr(self, "_entrance_anim", None)
+        if anim is not None and anim.state() == QPropertyAnimation.State.Running:
+            # 入场动画期间阴影效果已被透明度效果替换: 提前结束动画并恢复阴影
+            anim.stop()
+            self._restore_glow_effect()
         self.glow_anim.stop()
         if state == "run":
             self._start_anim(QColor("#30D158"), 3000)
@@ -1069,6 +861,20 @@ class StationWidget(QFrame):
         self.glow_anim.setEndValue(start_c)
         self.glow_anim.setDuration(duration)
         self.glow_anim.start()
+        if not self.on_screen:
+            self.glow_anim.pause()
+
+    def set_on_screen(self, visible):
+        """不可见时暂停呼吸灯并推迟标签更新 (数据照常缓存)；重新可见时补齐"""
+        if visible == self.on_screen:
+            return
+        self.on_screen = visible
+        if visible:
+            self._apply_deferred()
+            if self.glow_anim.state() == QPropertyAnimation.State.Paused:
+                self.glow_anim.resume()
+        elif self.glow_anim.state() == QPropertyAnimation.State.Running:
+            self.glow_anim.pause()
 
     def play_entrance_animation(self):
         opacity_effect = QGraphicsOpacityEffect(self)
@@ -1155,6 +961,13 @@ class StationWidget(QFrame):
         p_lay.addWidget(self.in_floor, 1, 1)
         p_lay.addWidget(QLabel("保护上限:"), 1, 2)
         p_lay.addWidget(self.in_max, 1, 3)
+        self.combo_filter = QComboBox()
+        for name in FILTER_PRESETS:
+            self.combo_filter.addItem(FILTER_PRESET_LABELS.get(name, name), name)
+        self.combo_filter.setCurrentIndex(list(FILTER_PRESETS).index(DEFAULT_FILTER))
+        self.combo_filter.setToolTip("压力滤波管线 (测试与调试窗口共用)")
+        p_lay.addWidget(QLabel("压力滤波:"), 2, 0)
+        p_lay.addWidget(self.combo_filter, 2, 1, 1, 3)
         layout.addLayout(p_lay)
 
         # Chart
@@ -1167,6 +980,8 @@ class StationWidget(QFrame):
         self.plot.setDownsampling(auto=True, mode='peak')
         self.plot.setClipToView(True)
         self.curve = self.plot.plot(pen=pg.mkPen('#007AFF', width=2))
+        # 自动范围时跟随最新数据；手动缩放/平移后按可见范围从历史金字塔取数据
+        self.plot.getViewBox().sigXRangeChanged.connect(self._on_view_range_changed)
         layout.addWidget(self.plot)
 
         # Info Panel
@@ -1277,42 +1092,55 @@ class StationWidget(QFrame):
             return
 
         try:
-            cycles = validate_positive_int(self.in_cycles.text(), "目标循环")
-            target_p = validate_positive_float(self.in_target.text(), "高压目标", 0.01, 20.0)
-            floor_p = validate_positive_float(self.in_floor.text(), "低压目标", 0.0, 20.0)
-            max_p = validate_positive_float(self.in_max.text(), "保护上限", 0.1, 30.0)
+            cycles, target_p, floor_p, max_p = validate_test_params(
+                self.in_cycles.text(), self.in_target.text(),
+                self.in_floor.text(), self.in_max.text())
         except ValueError as e:
             QMessageBox.warning(self, "参数错误", str(e))
             return
 
-        if floor_p >= target_p:
-            QMessageBox.warning(self, "参数错误", "低压阈值必须小于高压目标")
-            return
-        if max_p <= target_p:
-            QMessageBox.warning(self, "参数错误", "保护上限必须大于高压目标")
-            return
-
         dev_name = self.in_dev.text().strip()
         offset = self.combo_group.currentIndex() * 8
+        resume, self._resume = self._resume, None
+        ck_path = checkpoint_path(os.getcwd(), dev_name, offset // 8)
+        if resume is None and os.path.exists(ck_path):
+            reply = QMessageBox.question(
+                self, "未完成的测试",
+                f"该台架有中断的测试检查点:\n{ck_path}\n\n开始新测试将放弃它 (可重启程序后选择续跑)。是否继续?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
         cfg = {
             'device': dev_name, 'cycles': str(cycles),
             'target_p': str(target_p), 'floor_p': str(floor_p),
-            'max_p': str(max_p), 'simulation': SIMULATION_MODE,
+            'max_p': str(max_p), 'simulation': SIMULATION_MODE, 'sim_speed': SIM_SPEED,
+            'hw_timed_do': HW_TIMED_PULSES, 'frame_hz': TELEMETRY_FRAME_HZ,
+            'record_raw': RAW_RECORDING, 'watchdog': DO_WATCHDOG,
+            'filters': self.filter_preset(),
         }
+        if resume is not None:
+            cfg['resume'] = resume
+        self._checkpoint = ck_path
+        self._user_stopped = False
 
-        self.data_x.clear()
-        self.data_y.clear()
-        self.curve.setData([], [])
+        self.history.clear()
         self.start_time = time.time()
-        self.lbl_progress_val.setText(f"0 / {cycles}")
+        if HISTORY_SPILL:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.history.set_spill(os.path.join(
+                os.getcwd(), f"History_{dev_name}_Grp{offset // 8}_{stamp}.bin"))
+        else:
+            self.history.set_spill(None)
+        self.plot_scheduler.discard(self)
+        self.curve.setData([], [])
+        self.plot.enableAutoRange()
+        self.lbl_progress_val.setText(f"{resume['cycle'] - 1 if resume else 0} / {cycles}")
 
-        self.worker = TestWorker(cfg, offset, os.getcwd())
-        self.worker.sig_pressure.connect(self.update_gui_data)
-        self.worker.sig_timer.connect(self.lbl_timer.setText)
-        self.worker.sig_status.connect(self.update_status)
+        worker_cls = ProcessTestWorker if STATION_PROCESSES else TestWorker
+        self.worker = worker_cls(cfg, offset, os.getcwd())
+        self.worker.sig_frame.connect(self.apply_frame)
         self.worker.sig_progress.connect(self.update_progress)
-        self.worker.sig_log.connect(
-            lambda m: self.global_log.emit(f"[Station {self.idx}] {m}"))
         self.worker.sig_finished.connect(self.on_finish)
         self.worker.sig_error.connect(self.on_error)
         self.worker.sig_button_update.connect(self.update_start_btn_text)
@@ -1355,27 +1183,118 @@ class StationWidget(QFrame):
                 "background-color: #30D158; color: white; border: none;")
             self.set_glow_state("error")
 
+    def filter_preset(self):
+        return self.combo_filter.currentData()
+
     def open_manual(self):
         ManualControlDialog(
             self.in_dev.text(), self.combo_group.currentIndex() * 8,
             self, self).exec()
 
+    def resume_from(self, doc):
+        """按检查点恢复台架参数并续跑 (硬件模式下先连接)"""
+        cfg = doc["config"]
+        self.in_dev.setText(doc["device"])
+        self.combo_group.setCurrentIndex(int(doc["group"]))
+        self.in_cycles.setText(str(cfg.get("cycles", self.in_cycles.text())))
+        self.in_target.setText(str(cfg.get("target_p", self.in_target.text())))
+        self.in_floor.setText(str(cfg.get("floor_p", self.in_floor.text())))
+        self.in_max.setText(str(cfg.get("max_p", self.in_max.text())))
+        filters = cfg.get("filters")
+        if isinstance(filters, str) and filters in FILTER_PRESETS:
+            self.combo_filter.setCurrentIndex(list(FILTER_PRESETS).index(filters))
+        if not SIMULATION_MODE and not self.hardware_connected:
+            self.btn_connect.setChecked(True)
+            self.toggle_connection()
+            if not self.hardware_connected:
+                return False
+        self._resume = doc
+        self.start_test()
+        return self.worker is not None and self.worker.isRunning()
+
     def stop_test(self):
         self._accepting_data = False
+        self._user_stopped = True
         if self.worker:
             self.worker.stop()
 
-    def update_gui_data(self, val):
-        if not self._accepting_data:
-            return
-        self.lbl_pressure.setText(f"{val:.2f}")
-        self.data_x.append(time.time() - self.start_time)
-        self.data_y.append(val)
-        self.curve.setData(list(self.data_x), list(self.data_y))
+    def apply_frame(self, frame):
+        """在一次槽调用中应用整帧遥测 (卡片不可见时只缓存，不更新标签)"""
+        for m in frame.logs:
+            self.global_log.emit(f"[Station {self.idx}] {m}")
+        if frame.status is not None:
+            self._deferred["status"] = frame.status
+        if frame.timer is not None:
+            self._deferred["timer"] = frame.timer
+        if frame.stats is not None:
+            self._deferred["stats"] = frame
+        if self._accepting_data and len(frame.p):
+            self._latest_p = frame.p[-1]
+            self.history.extend(frame.t - self.start_time, frame.p)
+            self.plot_scheduler.mark_dirty(self)
+        if self.on_screen:
+            self._apply_deferred()
+
+    def _apply_deferred(self):
+        deferred, self._deferred = self._deferred, {}
+        if "status" in deferred:
+            self.update_status(*deferred["status"])
+        if "timer" in deferred:
+            self.lbl_timer.setText(deferred["timer"])
+        if "stats" in deferred:
+            self.update_stats(deferred["stats"])
+
+    def update_stats(self, frame):
+        lines = [f"遥测批处理: 已减少 {frame.signals_coalesced} 个跨线程信号 "
+                 f"(约 {frame.signals_saved_per_s:.0f} 个/s)"]
+        csv_stats = frame.stats.get("csv")
+        if csv_stats:
+            lines.append(
+                f"CSV 写入队列: {csv_stats['queue_depth']} (待写 {csv_stats['rows_pending']} 行), "
+                f"flush {csv_stats['last_flush_ms']:.1f} ms / 最大 {csv_stats['max_flush_ms']:.1f} ms, "
+                f"fsync {csv_stats['last_sync_ms']:.1f} ms")
+        safety = frame.stats.get("safety")
+        if safety:
+            line = f"安全监测: 已检查 {safety['samples']} 个原始样本, 触发 {safety['trips']} 次"
+            if safety['last_latency_ms'] is not None:
+                line += f" (最近一次检测 -> DO {safety['last_latency_ms']:.2f} ms)"
+            lines.append(line)
+        ai = frame.stats.get("ai")
+        if ai:
+            line = (f"AI 采集: 每次读取最多 {ai['max_per_read']} 个样本, "
+                    f"最大积压 {ai['max_backlog']}/{ai['capacity']}")
+            device = ai.get("device")
+            if device:
+                line += (f", 驱动缓冲区最大积压 {device['max_backlog']}/"
+                         f"{device['buffer_samples']} ({device['buffer_s']:.0f} s)")
+            line += f", 溢出 {ai['overruns']} 次 (缺失约 {ai['lost']}), 覆盖 {ai['dropped']}"
+            lines.append(line)
+        lost = frame.stats.get("ipc_samples_lost")
+        if lost:
+            lines.append(f"进程间遥测: 界面未及时读取，丢弃 {lost} 个曲线样本")
+        timing = format_timing(frame.stats.get("timing", {}), sep="\n  ")
+        if timing:
+            lines.append("回路时序 (中位数/p99/最大, ms):\n  " + timing)
+        self.lbl_status.setToolTip("\n".join(lines))
+
+    def redraw_plot(self):
+        self.lbl_pressure.setText(f"{self._latest_p:.2f}")
+        vb = self.plot.getViewBox()
+        if vb.autoRangeEnabled()[0]:
+            x, y = self.history.recent(PLOT_MAX_POINTS)
+        else:
+            x0, x1 = vb.viewRange()[0]
+            x, y = self.history.view(x0, x1, PLOT_MAX_POINTS)
+        self.curve.setData(x, y, skipFiniteCheck=True)
+
+    def _on_view_range_changed(self, *_):
+        if not self.plot.getViewBox().autoRangeEnabled()[0]:
+            self.plot_scheduler.mark_dirty(self)
 
-    def update_status(self, msg, style):
+    def update_status(self, msg, style_key):
+        self._deferred.pop("status", None)
         self.lbl_status.setText(msg)
-        self.lbl_status.setStyleSheet(style)
+        self.lbl_status.setStyleSheet(STATUS_STYLES[style_key])
 
     def update_progress(self, current):
         self.lbl_progress_val.setText(f"{current} / {self.in_cycles.text()}")
@@ -1389,6 +1308,10 @@ class StationWidget(QFrame):
 
     def on_finish(self):
         self._accepting_data = False
+        self.history.close_spill()
+        if self._user_stopped and self._checkpoint:
+            # 用户停止的测试不再续跑；崩溃或关闭窗口时检查点保留
+            discard_checkpoint(self._checkpoint)
         self.btn_start.setText("开始测试")
         self.btn_start.setObjectName("BtnPrimary")
         self.btn_start.setStyleSheet("")
@@ -1397,6 +1320,7 @@ class StationWidget(QFrame):
         self.btn_connect.setEnabled(True)
         self.btn_stop.setEnabled(False)
         self.btn_delete.setVisible(True)
+        self._deferred.pop("timer", None)
         self.lbl_timer.setText("--")
         if self._last_run_success:
             self.set_glow_state("idle")
@@ -1455,6 +1379,7 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Compressor Lifetime Rev3.2")
         self.resize(1440, 960)
         self.stations = []
+        self.plot_scheduler = PlotRefreshScheduler(PLOT_REFRESH_FPS, self)
 
         main_w = QWidget()
         main_w.setObjectName("CentralWidget")
@@ -1473,6 +1398,11 @@ class MainWindow(QMainWindow):
         self.btn_toggle.setObjectName("BtnToggleSettings")
         self.btn_toggle.clicked.connect(self.toggle_settings)
         tb_layout.addWidget(self.btn_toggle)
+        self.btn_review = QPushButton("历史回放")
+        self.btn_review.setObjectName("BtnToggleSettings")
+        self.btn_review.setToolTip("打开以往运行的曲线存档 (Trace_*.trc)，按循环/阶段查看")
+        self.btn_review.clicked.connect(self.open_review)
+        tb_layout.addWidget(self.btn_review)
         tb_layout.addStretch()
         layout.addWidget(top_bar)
 
@@ -1496,6 +1426,41 @@ class MainWindow(QMainWindow):
         self.chk_sim.setStyleSheet("font-weight: bold; color: #007AFF;")
         self.chk_sim.stateChanged.connect(self.toggle_sim)
 
+        self.combo_sim_speed = QComboBox()
+        self.combo_sim_speed.addItems([f"仿真 {sim_speed_label(v)}" for v in SIM_SPEED_CHOICES])
+        self.combo_sim_speed.setToolTip("仿真模式下虚拟时间的加速倍数 (对新启动的测试生效)")
+        self.combo_sim_speed.setFixedWidth(110)
+        self.combo_sim_speed.currentIndexChanged.connect(self.change_sim_speed)
+
+        self.chk_hw_pulse = QCheckBox("硬件定时脉冲")
+        self.chk_hw_pulse.setToolTip("Phase 2 脉冲序列编译为 DO 波形，由板卡采样时钟输出 (仿真模式下无效)")
+        self.chk_hw_pulse.stateChanged.connect(self.toggle_hw_pulse)
+
+        self.chk_raw = QCheckBox("原始波形记录")
+        self.chk_raw.setToolTip("把每个 500 Hz 原始 AI 样本写入 Raw_*.bin (仅硬件模式)")
+        self.chk_raw.stateChanged.connect(self.toggle_raw_recording)
+
+        self.chk_history_spill = QCheckBox("曲线历史落盘")
+        self.chk_history_spill.setToolTip(
+            "较早的曲线原始样本写入 History_*.bin，缩放到早期时段时显示原始值 (否则显示 min/max 包络)")
+        self.chk_history_spill.stateChanged.connect(self.toggle_history_spill)
+
+        self.chk_watchdog = QCheckBox("DO 看门狗")
+        self.chk_watchdog.setToolTip("测试线程停顿超过 5 s 时由板卡关断压缩机并打开报警 (仿真模式下为软件看门狗)")
+        self.chk_watchdog.stateChanged.connect(self.toggle_watchdog)
+
+        self.chk_processes = QCheckBox("独立进程")
+        self.chk_processes.setToolTip(
+            "每个台架 (硬件模式下每台设备) 的测试与采集在独立子进程中运行，"
+            "界面卡顿不影响 DO 时序")
+        self.chk_processes.stateChanged.connect(self.toggle_processes)
+
+        self.combo_fps = QComboBox()
+        self.combo_fps.addItems([f"曲线 {f} FPS" for f in PLOT_FPS_CHOICES])
+        self.combo_fps.setCurrentIndex(PLOT_FPS_CHOICES.index(PLOT_REFRESH_FPS))
+        self.combo_fps.setFixedWidth(120)
+        self.combo_fps.currentIndexChanged.connect(self.change_plot_fps)
+
         self.lbl_dir = QLabel(os.getcwd())
         self.lbl_dir.setStyleSheet("color: #8E8E93;")
         self.lbl_dir.setMinimumWidth(100)
@@ -1511,6 +1476,13 @@ class MainWindow(QMainWindow):
         line.setStyleSheet("color: #E5E5EA;")
         sp_layout.addWidget(line)
         sp_layout.addWidget(self.chk_sim)
+        sp_layout.addWidget(self.combo_sim_speed)
+        sp_layout.addWidget(self.chk_hw_pulse)
+        sp_layout.addWidget(self.chk_raw)
+        sp_layout.addWidget(self.chk_history_spill)
+        sp_layout.addWidget(self.chk_watchdog)
+        sp_layout.addWidget(self.chk_processes)
+        sp_layout.addWidget(self.combo_fps)
         sp_layout.addStretch()
         sp_layout.addWidget(self.lbl_dir)
         sp_layout.addWidget(btn_dir)
@@ -1531,20 +1503,60 @@ class MainWindow(QMainWindow):
         self.grid.setContentsMargins(20, 20, 20, 20)
         scroll.setWidget(grid_w)
         self.splitter.addWidget(scroll)
+        self.scroll = scroll
+
+        # 滚动、缩放、增删台架、最小化后重新判断哪些卡片可见 (合并到下一次事件循环)
+        self._visibility_timer = QTimer(self)
+        self._visibility_timer.setSingleShot(True)
+        self._visibility_timer.setInterval(0)
+        self._visibility_timer.timeout.connect(self.update_station_visibility)
+        scroll.verticalScrollBar().valueChanged.connect(self.schedule_visibility_update)
+        scroll.horizontalScrollBar().valueChanged.connect(self.schedule_visibility_update)
+        scroll.viewport().installEventFilter(self)
+        grid_w.installEventFilter(self)
 
         # Log Area
         log_cont = QFrame()
         log_cont.setObjectName("LogContainer")
         log_lay = QVBoxLayout(log_cont)
         log_lay.setContentsMargins(10, 10, 10, 10)
+        log_head = QHBoxLayout()
         lbl_log = QLabel("System Log")
         lbl_log.setStyleSheet(
             "color: #8E8E93; font-weight: bold; font-size: 11px; "
             "letter-spacing: 0.3px;")
-        log_lay.addWidget(lbl_log)
-        self.log_widget = QTextEdit()
-        self.log_widget.setReadOnly(True)
-        log_lay.addWidget(self.log_widget)
+        log_head.addWidget(lbl_log)
+        log_head.addStretch()
+        self.combo_log_source = QComboBox()
+        self.combo_log_source.setFixedWidth(120)
+        self.combo_log_source.setToolTip(
+            f"按来源筛选 (界面保留最近 {LOG_VIEW_CAPACITY} 行，完整日志见 SystemLog_*.csv)")
+        self.combo_log_source.currentIndexChanged.connect(self.filter_log)
+        log_head.addWidget(self.combo_log_source)
+        log_lay.addLayout(log_head)
+
+        # 定长环形模型 + 虚拟化列表: 追加/绘制开销与历史长度无关
+        self.log_model = LogRingModel(LOG_VIEW_CAPACITY, self)
+        self.log_proxy = QSortFilterProxyModel(self)
+        self.log_proxy.setSourceModel(self.log_model)
+        self.log_proxy.setFilterRole(LogRingModel.SourceRole)
+        self.log_view = QListView()
+        self.log_view.setObjectName("LogView")
+        self.log_view.setModel(self.log_proxy)
+        self.log_view.setUniformItemSizes(True)
+        self.log_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.log_view.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        copy_sc = QShortcut(QKeySequence(QKeySequence.StandardKey.Copy), self.log_view)
+        copy_sc.setContext(Qt.ShortcutContext.WidgetShortcut)
+        copy_sc.activated.connect(self.copy_log_selection)
+        log_lay.addWidget(self.log_view)
+        self._log_pending = []
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(LOG_FLUSH_MS)
+        self._log_timer.timeout.connect(self.flush_log)
+        self._syslog = None
+        self._syslog_opened = False
         self.splitter.addWidget(log_cont)
         self.splitter.setSizes([800, 200])
 
@@ -1553,6 +1565,8 @@ class MainWindow(QMainWindow):
 
         set_keep_awake(True)
         self.add_station()
+        self.refresh_log_sources()
+        QTimer.singleShot(0, self.offer_resume)
 
     def add_station(self):
         existing_ids = {s.idx for s in self.stations}
@@ -1560,11 +1574,12 @@ class MainWindow(QMainWindow):
         while new_idx in existing_ids:
             new_idx += 1
 
-        st = StationWidget(new_idx, self.sig_log)
+        st = StationWidget(new_idx, self.sig_log, self.plot_scheduler)
         st.sig_remove.connect(self.delete_specific_station)
         self.stations.append(st)
         self.rearrange_layout()
         st.play_entrance_animation()
+        self.refresh_log_sources()
         self.append_log(f"系统: 已增加台架 (ID: {new_idx})")
 
     def delete_specific_station(self, station_widget):
@@ -1579,11 +1594,13 @@ class MainWindow(QMainWindow):
             return
 
         idx = station_widget.idx
+        self.plot_scheduler.discard(station_widget)
         self.stations.remove(station_widget)
         self.grid.removeWidget(station_widget)
         station_widget.deleteLater()
 
         self.rearrange_layout()
+        self.refresh_log_sources()
         self.append_log(f"系统: 已移除台架 (ID: {idx})")
 
     def rearrange_layout(self):
@@ -1608,6 +1625,26 @@ class MainWindow(QMainWindow):
         for i, st in enumerate(self.stations):
             self.grid.addWidget(st, i // cols, i % cols)
             st.setVisible(True)
+        self.schedule_visibility_update()
+
+    def schedule_visibility_update(self, *_):
+        self._visibility_timer.start()
+
+    def update_station_visibility(self):
+        """只有在滚动区域中露出且窗口未最小化的卡片才重绘曲线、更新标签和呼吸灯"""
+        shown = self.isVisible() and not self.isMinimized()
+        for st in self.stations:
+            st.set_on_screen(shown and not st.visibleRegion().isEmpty())
+
+    def eventFilter(self, obj, event):
+        if event.type() == event.Type.Resize:
+            self.schedule_visibility_update()
+        return super().eventFilter(obj, event)
+
+    def changeEvent(self, event):
+        if event.type() == event.Type.WindowStateChange:
+            self.schedule_visibility_update()
+        super().changeEvent(event)
 
     def toggle_settings(self):
         self.settings_panel.toggle()
@@ -1619,6 +1656,47 @@ class MainWindow(QMainWindow):
         SIMULATION_MODE = (s == 2)
         self.append_log(f"系统模式切换: {'仿真' if SIMULATION_MODE else '硬件'}")
 
+    def change_sim_speed(self, i):
+        global SIM_SPEED
+        SIM_SPEED = SIM_SPEED_CHOICES[i]
+        self.append_log(f"仿真倍速: {sim_speed_label(SIM_SPEED)} (对新启动的测试生效)")
+
+    def toggle_hw_pulse(self, s):
+        global HW_TIMED_PULSES
+        HW_TIMED_PULSES = (s == 2)
+        self.append_log(f"脉冲输出模式: {'硬件定时' if HW_TIMED_PULSES else '软件定时'} (对新启动的测试生效)")
+
+    def toggle_history_spill(self, s):
+        global HISTORY_SPILL
+        HISTORY_SPILL = (s == 2)
+        self.append_log(f"曲线历史落盘: {'开启' if HISTORY_SPILL else '关闭'} (对新启动的测试生效)")
+
+    def toggle_raw_recording(self, s):
+        global RAW_RECORDING
+        RAW_RECORDING = (s == 2)
+        self.append_log(f"原始波形记录: {'开启' if RAW_RECORDING else '关闭'} (对新启动的测试生效)")
+
+    def toggle_watchdog(self, s):
+        global DO_WATCHDOG
+        DO_WATCHDOG = (s == 2)
+        self.append_log(f"DO 看门狗: {'开启' if DO_WATCHDOG else '关闭'} (对新启动的测试生效)")
+
+    def toggle_processes(self, s):
+        global STATION_PROCESSES
+        STATION_PROCESSES = (s == 2)
+        self.append_log(f"台架运行方式: {'独立进程' if STATION_PROCESSES else '线程'} (对新启动的测试生效)")
+
+    def open_review(self):
+        dlg = TraceReviewDialog(self)
+        dlg.open_file()
+        if dlg.store is not None:
+            dlg.show()
+        else:
+            dlg.deleteLater()
+
+    def change_plot_fps(self, i):
+        self.plot_scheduler.set_fps(PLOT_FPS_CHOICES[i])
+
     def set_dir(self):
         d = QFileDialog.getExistingDirectory(self, "选择日志保存路径")
         if d:
@@ -1627,11 +1705,118 @@ class MainWindow(QMainWindow):
                 os.chdir(d)
             except OSError as e:
                 QMessageBox.warning(self, "路径错误", f"无法切换到目标路径:\n{e}")
+                return
+            self.close_system_log()
+            self.offer_resume()
+
+    def offer_resume(self):
+        """日志目录中有中断运行的检查点时，逐个询问是否续跑"""
+        busy = {(s.in_dev.text().strip(), s.combo_group.currentIndex())
+                for s in self.stations if s.worker and s.worker.isRunning()}
+        for path, doc in find_checkpoints(os.getcwd()):
+            if (doc["device"], doc["group"]) in busy:
+                continue
+            box = QMessageBox(self)
+            box.setWindowTitle("续跑中断的测试")
+            box.setText(f"发现中断的测试:\n{describe_checkpoint(doc)}\n\n"
+                        f"续跑将从最后完成的一轮继续，并追加到原日志。")
+            btn_resume = box.addButton("续跑", QMessageBox.ButtonRole.AcceptRole)
+            btn_discard = box.addButton("放弃", QMessageBox.ButtonRole.DestructiveRole)
+            box.addButton("稍后", QMessageBox.ButtonRole.RejectRole)
+            box.exec()
+            if box.clickedButton() is btn_discard:
+                discard_checkpoint(path)
+                self.append_log(f"系统: 已放弃检查点 {os.path.basename(path)}")
+            elif box.clickedButton() is btn_resume:
+                if bool(doc["config"].get("simulation")) != SIMULATION_MODE:
+                    self.chk_sim.setChecked(bool(doc["config"].get("simulation")))
+                st = self._station_for_resume(doc["device"], doc["group"])
+                if st.resume_from(doc):
+                    busy.add((doc["device"], doc["group"]))
+                    self.append_log(f"系统: 台架 {st.idx} 续跑 {doc['device']} Grp{doc['group']}")
+
+    def _station_for_resume(self, dev_name, group):
+        """优先使用设备/组相同的空闲台架，其次是未使用过的空闲台架，否则新增一个"""
+        idle = [s for s in self.stations if not (s.worker and s.worker.isRunning())]
+        for s in idle:
+            if s.in_dev.text().strip() == dev_name and s.combo_group.currentIndex() == group:
+                return s
+        for s in idle:
+            if s.worker is None and not s.hardware_connected:
+                return s
+        self.add_station()
+        return self.stations[-1]
 
     def append_log(self, t):
-        self.log_widget.append(f"[{datetime.now().strftime('%H:%M:%S')}] {t}")
-        sb = self.log_widget.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        """只入队并写盘；界面每 LOG_FLUSH_MS 合并刷新一次"""
+        stamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        m = _LOG_SOURCE_RE.match(t)
+        source = m.group(1) if m else LOG_SOURCE_SYSTEM
+        self._log_pending.append((stamp[11:19], source, t,
+                                  _LOG_ALERT_RE.search(t) is not None))
+        syslog = self._system_log()
+        if syslog:
+            syslog.write_row([stamp, source, t])
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+
+    def flush_log(self):
+        if not self._log_pending:
+            return
+        sb = self.log_view.verticalScrollBar()
+        at_bottom = sb.value() >= sb.maximum()
+        rows, self._log_pending = self._log_pending, []
+        self.log_model.append_batch(rows)
+        if at_bottom:
+            self.log_view.scrollToBottom()
+
+    def _system_log(self):
+        """完整系统日志 SystemLog_*.csv，写在当前日志目录 (切换目录后在新目录另开一个)"""
+        if not self._syslog_opened:
+            self._syslog_opened = True
+            path = os.path.join(os.getcwd(),
+                                f"SystemLog_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+            try:
+                self._syslog = CsvLogWriter.instance().open_log(
+                    path, header=["Time", "Source", "Message"])
+            except OSError as e:
+                self._syslog = None
+                log.warning("无法创建系统日志 %s: %s", path, e)
+        return self._syslog
+
+    def close_system_log(self):
+        """关闭当前系统日志文件；下一条消息在当前目录另开一个"""
+        if self._syslog:
+            self._syslog.close(timeout=1.0)
+        self._syslog = None
+        self._syslog_opened = False
+
+    def refresh_log_sources(self):
+        current = self.combo_log_source.currentData()
+        sources = [LOG_SOURCE_SYSTEM] + [f"Station {i}" for i in sorted(s.idx for s in self.stations)]
+        self.combo_log_source.blockSignals(True)
+        self.combo_log_source.clear()
+        self.combo_log_source.addItem("全部来源", None)
+        for src in sources:
+            self.combo_log_source.addItem(src, src)
+        i = self.combo_log_source.findData(current) if current else 0
+        self.combo_log_source.setCurrentIndex(max(i, 0))
+        self.combo_log_source.blockSignals(False)
+        self.filter_log()
+
+    def filter_log(self, *_):
+        src = self.combo_log_source.currentData()
+        if src is None:
+            self.log_proxy.setFilterRegularExpression(QRegularExpression())
+        else:
+            self.log_proxy.setFilterRegularExpression(
+                QRegularExpression(f"^{QRegularExpression.escape(src)}$"))
+        self.log_view.scrollToBottom()
+
+    def copy_log_selection(self):
+        rows = sorted(self.log_view.selectionModel().selectedRows(), key=lambda i: i.row())
+        if rows:
+            QApplication.clipboard().setText("\n".join(i.data() for i in rows))
 
     def closeEvent(self, event):
         set_keep_awake(False)
@@ -1639,6 +1824,7 @@ class MainWindow(QMainWindow):
             if s.worker and s.worker.isRunning():
                 s.worker.stop()
                 s.worker.wait(3000)
+        self.close_system_log()
         event.accept()
 
 
@@ -1647,6 +1833,7 @@ class MainWindow(QMainWindow):
 # ============================================================================
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     logging.basicConfig(level=logging.WARNING,
                         format="%(asctime)s [%(levelname)s] %(message)s")
 
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : csv_logger.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    缓冲式后台 CSV 日志。
+
+    所有台架共用一个写盘线程；每个日志文件只打开一次并保持句柄。测试线程
+    调用 write_row() 只是把行放进队列，绝不在加压/脉冲过程中等待磁盘或
+    网络共享。写盘线程按时间间隔或行数批量 flush，在循环边界调用 sync()
+    时执行 fsync。队列深度与 flush 耗时可随时读取。
+==============================================================================
+"""
+
+import os
+import csv
+import time
+import queue
+import threading
+import logging
+
+log = logging.getLogger(__name__)
+
+CSV_FLUSH_INTERVAL = 1.0    # 最长 flush 间隔 (s)
+CSV_FLUSH_ROWS = 50         # 累积行数达到该值时立即 flush
+
+_CMD_ROW = 0
+_CMD_SYNC = 1
+_CMD_CLOSE = 2
+
+
+class StationCsvLog:
+    """单个 CSV 文件的句柄；write_row()/sync() 只入队，由 CsvLogWriter 线程执行"""
+
+    def __init__(self, writer, path, fh):
+        self.writer = writer
+        self.path = path
+        self._fh = fh
+        self._csv = csv.writer(fh)
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+        self._closed_event = threading.Event()
+        self.closed = False
+
+        self.rows_queued = 0
+        self.rows_written = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.last_sync_ms = 0.0
+        self.write_errors = 0
+
+    def write_row(self, row):
+        if self.closed:
+            return
+        self.rows_queued += 1
+        self.writer.submit(_CMD_ROW, self, row)
+
+    def sync(self):
+        """flush 并 fsync (在循环边界调用)，不等待完成"""
+        if not self.closed:
+            self.writer.submit(_CMD_SYNC, self, None)
+
+    def close(self, timeout=5.0):
+        """写完剩余行并关闭文件 (等待写盘线程完成)"""
+        if self.closed:
+            return
+        self.closed = True
+        self.writer.submit(_CMD_CLOSE, self, None)
+        self._closed_event.wait(timeout)
+
+    def stats(self):
+        return {
+            "queue_depth": self.writer.queue_depth,
+            "rows_pending": self.rows_queued - self.rows_written,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+            "last_sync_ms": self.last_sync_ms,
+        }
+
+    # --- 以下只在写盘线程中调用 ---
+
+    def _write(self, row):
+        self._csv.writerow(row)
+        self._pending_rows += 1
+        self.rows_written += 1
+
+    def _flush(self, fsync=False):
+        t0 = time.perf_counter()
+        self._fh.flush()
+        if fsync:
+            os.fsync(self._fh.fileno())
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.last_flush_ms = ms
+        if ms > self.max_flush_ms:
+            self.max_flush_ms = ms
+        if fsync:
+            self.last_sync_ms = ms
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+
+    def _close(self):
+        try:
+            self._flush(fsync=True)
+        finally:
+            self._fh.close()
+            self._closed_event.set()
+
+
+class CsvLogWriter:
+    """全局 CSV 写盘线程 (惰性启动的单例)"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, flush_interval=CSV_FLUSH_INTERVAL, flush_rows=CSV_FLUSH_ROWS):
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self._queue = queue.Queue()
+        self._logs = set()
+        self._thread = threading.Thread(target=self._run, name="CsvLogWriter", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def open_log(self, path, header=None, append=False):
+        """在调用线程中打开文件 (错误立即抛出)，之后的写入全部异步"""
+        fh = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        lg = StationCsvLog(self, path, fh)
+        if header is not None:
+            lg.write_row(header)
+        return lg
+
+    def submit(self, cmd, lg, payload):
+        self._queue.put((cmd, lg, payload))
+
+    def _run(self):
+        while True:
+            try:
+                cmd, lg, payload = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                cmd = None
+            try:
+                if cmd == _CMD_ROW:
+                    self._logs.add(lg)
+                    lg._write(payload)
+                    if lg._pending_rows >= self.flush_rows:
+                        lg._flush()
+                elif cmd == _CMD_SYNC:
+                    lg._flush(fsync=True)
+                elif cmd == _CMD_CLOSE:
+                    self._logs.discard(lg)
+                    lg._close()
+            except (OSError, ValueError) as e:
+                lg.write_errors += 1
+                log.warning("CSV 写入失败 (%s): %s", lg.path, e)
+                if cmd == _CMD_CLOSE:
+                    lg._closed_event.set()
+
+            now = time.monotonic()
+            for other in list(self._logs):
+                if other._pending_rows and now - other._last_flush >= self.flush_interval:
+                    try:
+                        other._flush()
+                    except (OSError, ValueError) as e:
+                        other.write_errors += 1
+                        log.warning("CSV flush 失败 (%s): %s", other.path, e)
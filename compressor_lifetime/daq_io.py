@@ -0,0 +1,724 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : daq_io.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    NI-DAQmx 硬件访问层。
+
+    1. 设备级 AI 采集服务：每台设备只创建一个多通道连续 AI 任务 (ai0..aiN)，
+       后台线程一次读取全部通道，再把各通道数据块分发给所有订阅者
+       (测试线程、调试窗口)。USB-6362/6363 每台设备只能运行一个硬件定时
+       AI 任务，因此多个台架必须共享同一个任务。
+    2. 台架 DO 输出：静态 (软件定时) 写入，以及把脉冲序列编译成缓冲波形、
+       由板卡采样时钟硬件定时回放，脉宽不受 USB/GIL 负载影响。
+    3. DO 看门狗：可选的设备级硬件看门狗，主机进程停顿 (挂起、GIL 被长时间
+       占用) 超时后由板卡把压缩机线拉低、报警线拉高。
+    4. 缓冲区健康：DAQ 缓冲区按采样率与最长停顿时间确定大小；记录每次读取
+       的样本数、积压与溢出次数，驱动缓冲区溢出时自动重启采集任务，订阅者
+       只看到一段缺失的样本 (计数)，不会在循环中途抛出异常。
+    5. 压力读取：stream reader 直接读入预分配的 NumPy 缓冲区，电压->压力换算
+       后整块送入可配置的滤波管线 (pressure_filters.py)，热路径上没有逐样本的
+       Python 列表分配。
+==============================================================================
+"""
+
+import math
+import time
+import threading
+import logging
+
+import numpy as np
+
+import nidaqmx
+from nidaqmx.constants import LineGrouping, TerminalConfiguration, AcquisitionType
+from nidaqmx.constants import Level
+from nidaqmx.stream_readers import AnalogMultiChannelReader
+from nidaqmx.system.watchdog import WatchdogTask, DOExpirationState
+
+from pressure_filters import FilterPipeline, build_pipeline
+
+log = logging.getLogger(__name__)
+
+# ============================================================================
+# [SECTION 1] 采集参数 (Acquisition Settings)
+# ============================================================================
+
+AI_SAMPLE_RATE = 500
+AI_CHANNELS_PER_DEVICE = 4      # 每个 Group (8 条 DO 线) 对应一路压力传感器
+AI_READ_INTERVAL = 0.05         # 后台读取周期 (s)
+AI_WORST_STALL = 10.0           # 采集线程可能的最长停顿 (s): USB 重新枚举、GIL 被长时间占用等
+SUBSCRIPTION_CAPACITY = AI_SAMPLE_RATE * 10   # 每个订阅者最多缓存 10 s 未读样本
+
+# DAQmx 缓冲区溢出 (读取跟不上采集 / 板载 FIFO 溢出)，可通过重启任务恢复
+AI_OVERRUN_ERRORS = (-200279, -200361)
+
+
+def ai_buffer_samples(rate, worst_stall=AI_WORST_STALL, read_interval=AI_READ_INTERVAL):
+    """每通道的 DAQ 缓冲区样本数: 覆盖最长停顿 + 两个读取周期，取整到 1000"""
+    n = rate * (worst_stall + 2 * read_interval)
+    return int(math.ceil(n / 1000.0)) * 1000
+
+
+AI_BUFFER_SAMPLES = ai_buffer_samples(AI_SAMPLE_RATE)
+
+DO_LINES_PER_STATION = 8
+DO_WAVEFORM_RATE = 1000         # 硬件定时 DO 采样率 (Hz)，即 1 ms 分辨率
+# 资源已被占用: X 系列板卡只有一个 DO 定时引擎 (其他进程/程序占用时报此错误)
+DO_RESOURCE_ERRORS = (-50103,)
+
+# 故障安全状态: (台架内线号, 电平) —— 压缩机 (line 3) 关断、报警 (line 7) 打开，其余线保持
+FAIL_SAFE_LINES = ((3, False), (7, True))
+DO_WATCHDOG_TIMEOUT = 5.0       # 看门狗超时 (s)，须大于测试线程最长的无读取等待 (复位等待 2 s)
+DO_WATCHDOG_PET_INTERVAL = 0.5  # 喂狗最小间隔 (s)，测试线程每个 tick 调用 pet()，实际驱动调用按此节流
+
+
+# ============================================================================
+# [SECTION 2] 设备级 AI 采集服务 (Shared AI Acquisition)
+# ============================================================================
+
+def _check_channel(channel):
+    if not 0 <= channel < AI_CHANNELS_PER_DEVICE:
+        raise ValueError(f"AI 通道超出范围: ai{channel}")
+
+
+class ChannelSubscription:
+    """单个 AI 通道的订阅句柄，用预分配的环形缓冲区缓存采集服务分发来的样本"""
+
+    def __init__(self, service, channel, capacity=SUBSCRIPTION_CAPACITY):
+        self.service = service
+        self.channel = channel
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._ring = np.zeros(capacity, dtype=np.float64)
+        self._write_pos = 0
+        self._count = 0
+        self._error = None
+        self.closed = False
+
+        # 健康统计
+        self.reads = 0
+        self.samples_read = 0
+        self.max_per_read = 0
+        self.max_backlog = 0            # 读取时的最大未读样本数
+        self.dropped = 0                # 读取方停顿过久，被新样本覆盖的未读样本
+        self.overruns = 0               # 采集服务遇到的驱动缓冲区溢出 (已自动恢复)
+        self.samples_lost = 0           # 溢出期间缺失的样本 (估计值)
+
+    def _push(self, block):
+        n = len(block)
+        with self._lock:
+            if n >= self.capacity:
+                block = block[-self.capacity:]
+                n = self.capacity
+            over = self._count + n - self.capacity
+            if over > 0:
+                self.dropped += over
+            end = self._write_pos + n
+            if end <= self.capacity:
+                self._ring[self._write_pos:end] = block
+            else:
+                first = self.capacity - self._write_pos
+                self._ring[self._write_pos:] = block[:first]
+                self._ring[:n - first] = block[first:]
+            self._write_pos = end % self.capacity
+            self._count = min(self._count + n, self.capacity)
+
+    def _set_error(self, err):
+        with self._lock:
+            self._error = err
+
+    def _mark_gap(self, lost):
+        """采集服务从溢出中恢复: 数据流中缺失约 lost 个样本"""
+        with self._lock:
+            self.overruns += 1
+            self.samples_lost += lost
+
+    def read_into(self, out):
+        """把自上次读取以来的样本 (电压) 按时间顺序拷入 out，返回样本数"""
+        with self._lock:
+            if self._error is not None:
+                err, self._error = self._error, None
+                raise RuntimeError(f"AI读取失败: {err}") from err
+            n = min(self._count, len(out))
+            if n == 0:
+                return 0
+            self.reads += 1
+            self.samples_read += n
+            if self._count > self.max_backlog:
+                self.max_backlog = self._count
+            if n > self.max_per_read:
+                self.max_per_read = n
+            start = (self._write_pos - self._count) % self.capacity
+            end = start + n
+            if end <= self.capacity:
+                out[:n] = self._ring[start:end]
+            else:
+                first = self.capacity - start
+                out[:first] = self._ring[start:]
+                out[first:n] = self._ring[:n - first]
+            self._count -= n
+            return n
+
+    def health(self):
+        """订阅与所属采集服务的缓冲区健康统计"""
+        stats = {
+            "reads": self.reads,
+            "mean_per_read": self.samples_read / self.reads if self.reads else 0.0,
+            "max_per_read": self.max_per_read,
+            "max_backlog": self.max_backlog,
+            "capacity": self.capacity,
+            "dropped": self.dropped,
+            "overruns": self.overruns,
+            "lost": self.samples_lost,
+        }
+        device = getattr(self.service, "health", None)
+        if device is not None:
+            stats["device"] = device()
+        return stats
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.service.unsubscribe(self)
+
+
+class ChannelTap:
+    """AI 通道监听: 每个数据块在采集线程内直接回调 (用于原始波形记录等旁路)
+
+    回调拿到的是采集缓冲区的视图，必须立即拷贝，且不能阻塞。
+    on_gap (可选) 在采集服务从溢出中恢复时以缺失样本数回调，同样在采集线程内。
+    """
+
+    def __init__(self, service, channel, callback, on_gap=None):
+        self.service = service
+        self.channel = channel
+        self.callback = callback
+        self.on_gap = on_gap
+        self.closed = False
+
+    def _push(self, block):
+        try:
+            self.callback(block)
+        except Exception:
+            log.warning("AI 监听回调异常 (ai%d)", self.channel, exc_info=True)
+
+    def _set_error(self, err):
+        pass
+
+    def _mark_gap(self, lost):
+        if self.on_gap is None:
+            return
+        try:
+            self.on_gap(lost)
+        except Exception:
+            log.warning("AI 监听回调异常 (ai%d)", self.channel, exc_info=True)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.service.unsubscribe(self)
+
+
+class DeviceAcquisitionService:
+    """设备级 AI 采集服务: 每台设备一个多通道连续任务，一次读取全部通道并分发"""
+
+    _services = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, dev_name, n_channels=AI_CHANNELS_PER_DEVICE):
+        self.dev_name = dev_name
+        self.n_channels = n_channels
+        self._task = None
+        self._reader = None
+        self._read_buf = np.zeros(n_channels * AI_BUFFER_SAMPLES, dtype=np.float64)
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._subs = []
+        self._subs_lock = threading.Lock()
+
+        # 健康统计 (只在采集线程中更新)
+        self.buffer_samples = AI_BUFFER_SAMPLES
+        self.reads = 0
+        self.max_per_read = 0
+        self.max_backlog = 0            # 读取前驱动缓冲区中的最大积压 (每通道样本数)
+        self.overruns = 0
+        self.samples_lost = 0
+        self._last_read_t = None
+
+    # --- 注册表: 按设备名共享服务实例 ---
+
+    @classmethod
+    def subscribe_channel(cls, dev_name, channel):
+        """订阅指定设备的 AI 通道；首个订阅者负责启动该设备的采集任务"""
+        _check_channel(channel)
+        with cls._registry_lock:
+            svc = cls._get_or_start(dev_name)
+            return svc._add(ChannelSubscription(svc, channel))
+
+    @classmethod
+    def tap_channel(cls, dev_name, channel, callback, on_gap=None):
+        """在采集线程上监听指定通道的每个数据块 (on_gap: 溢出缺失样本数回调)"""
+        _check_channel(channel)
+        with cls._registry_lock:
+            svc = cls._get_or_start(dev_name)
+            return svc._add(ChannelTap(svc, channel, callback, on_gap))
+
+    @classmethod
+    def _get_or_start(cls, dev_name):
+        svc = cls._services.get(dev_name)
+        if svc is None:
+            svc = cls(dev_name)
+            svc._start()
+            cls._services[dev_name] = svc
+        return svc
+
+    def unsubscribe(self, sub):
+        with DeviceAcquisitionService._registry_lock:
+            with self._subs_lock:
+                if sub in self._subs:
+                    self._subs.remove(sub)
+                remaining = len(self._subs)
+            if remaining == 0:
+                self._shutdown()
+                if DeviceAcquisitionService._services.get(self.dev_name) is self:
+                    del DeviceAcquisitionService._services[self.dev_name]
+
+    def _add(self, sub):
+        with self._subs_lock:
+            self._subs.append(sub)
+        return sub
+
+    # --- 任务生命周期 ---
+
+    def _start(self):
+        chans = f"{self.dev_name}/ai0:{self.n_channels - 1}"
+        self._task = nidaqmx.Task()
+        try:
+            self._task.ai_channels.add_ai_voltage_chan(
+                chans, terminal_config=TerminalConfiguration.RSE,
+                min_val=-10.0, max_val=10.0)
+            self._task.timing.cfg_samp_clk_timing(
+                rate=AI_SAMPLE_RATE, sample_mode=AcquisitionType.CONTINUOUS,
+                samps_per_chan=self.buffer_samples)
+            self._reader = AnalogMultiChannelReader(self._task.in_stream)
+            self._task.start()
+        except Exception as e:
+            self._task.close()
+            self._task = None
+            raise RuntimeError(f"AI初始化失败: {e}") from e
+
+        self._last_read_t = time.monotonic()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._read_loop, name=f"AI-{self.dev_name}", daemon=True)
+        self._thread.start()
+
+    def _shutdown(self):
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        if self._task:
+            try:
+                self._task.stop()
+                self._task.close()
+            except Exception:
+                log.warning("关闭 AI 任务失败 (%s)", self.dev_name, exc_info=True)
+            finally:
+                self._task = None
+
+    def _read_loop(self):
+        while not self._stop_event.wait(AI_READ_INTERVAL):
+            try:
+                avail = self._task.in_stream.avail_samp_per_chan
+                if avail == 0:
+                    continue
+                n = min(avail, AI_BUFFER_SAMPLES)
+                # 连续视图 (n_channels x n)，直接由驱动写入，不产生新的 Python 对象
+                data = self._read_buf[:self.n_channels * n].reshape(self.n_channels, n)
+                self._reader.read_many_sample(
+                    data, number_of_samples_per_channel=n, timeout=0)
+            except Exception as e:
+                if self._stop_event.is_set():
+                    return
+                if (isinstance(e, nidaqmx.DaqError) and e.error_code in AI_OVERRUN_ERRORS
+                        and self._recover_overrun(e)):
+                    continue
+                log.warning("AI 读取失败 (%s): %s", self.dev_name, e)
+                err = e     # except 结束时 e 被删除，回调不能直接引用
+                self._broadcast(lambda sub: sub._set_error(err))
+                continue
+
+            self._last_read_t = time.monotonic()
+            self.reads += 1
+            if avail > self.max_backlog:
+                self.max_backlog = avail
+            if n > self.max_per_read:
+                self.max_per_read = n
+            with self._subs_lock:
+                subs = list(self._subs)
+            for sub in subs:
+                sub._push(data[sub.channel])
+
+    def _broadcast(self, fn):
+        with self._subs_lock:
+            subs = list(self._subs)
+        for sub in subs:
+            fn(sub)
+
+    def _recover_overrun(self, err):
+        """驱动缓冲区溢出: 重启任务继续采集，订阅者记一段缺失；重启失败返回 False"""
+        now = time.monotonic()
+        lost = int((now - self._last_read_t) * AI_SAMPLE_RATE)    # 上次成功读取之后的样本全部丢失
+        self.overruns += 1
+        self.samples_lost += lost
+        log.warning("AI 缓冲区溢出 (%s, 第 %d 次, 约 %d 个样本): %s",
+                    self.dev_name, self.overruns, lost, err)
+        try:
+            self._task.stop()
+            self._task.start()
+        except Exception:
+            log.exception("AI 任务重启失败 (%s)", self.dev_name)
+            return False
+        self._last_read_t = now
+        self._broadcast(lambda sub: sub._mark_gap(lost))
+        return True
+
+    def health(self):
+        return {
+            "buffer_samples": self.buffer_samples,
+            "buffer_s": self.buffer_samples / AI_SAMPLE_RATE,
+            "reads": self.reads,
+            "max_per_read": self.max_per_read,
+            "max_backlog": self.max_backlog,
+            "overruns": self.overruns,
+            "lost": self.samples_lost,
+        }
+
+
+# ============================================================================
+# [SECTION 3] 台架 DO 输出 (Station Digital Output)
+# ============================================================================
+
+def compile_pulse_train(masks, durations, rate=DO_WAVEFORM_RATE):
+    """把 DO 掩码序列 (bit n = line n) 与各步时长编译成按通道排列的缓冲 DO 波形
+
+    末尾额外保持一个最终状态样本，保证回放结束后线路停留在最后一步的状态。
+    """
+    counts = np.maximum(1, np.rint(np.asarray(durations) * rate).astype(np.int64))
+    samples = np.append(np.repeat(np.asarray(masks, dtype=np.int64), counts), masks[-1])
+    lines = np.arange(DO_LINES_PER_STATION)[:, None]
+    return ((samples[None, :] >> lines) & 1).astype(bool).tolist()
+
+
+class DoTimingBusy(RuntimeError):
+    """设备的 DO 定时引擎正被其他台架 (或其他程序) 占用"""
+
+
+class StationDoOutput:
+    """单个台架的 8 条 DO 线: 静态写入 + 硬件定时波形回放
+
+    每块板卡只有一个 DO 定时引擎，同一设备上同一时刻只允许一个台架回放波形；
+    引擎被占用时 start_waveform() 抛出 DoTimingBusy，由调用方改用软件定时。
+    """
+
+    _timing_owners = {}         # 设备名 -> 正在回放波形的 StationDoOutput
+    _timing_lock = threading.Lock()
+
+    def __init__(self, dev_name, offset):
+        self.dev_name = dev_name
+        self.offset = offset
+        self.lines = f"{dev_name}/port0/line{offset}:{offset + DO_LINES_PER_STATION - 1}"
+        self._static_task = None
+        self._wave_task = None
+
+    def open(self):
+        self._static_task = nidaqmx.Task()
+        try:
+            self._static_task.do_channels.add_do_chan(
+                self.lines, line_grouping=LineGrouping.CHAN_PER_LINE)
+            self._static_task.start()
+            self._static_task.write([False] * DO_LINES_PER_STATION)
+        except Exception as e:
+            self._static_task.close()
+            self._static_task = None
+            raise RuntimeError(f"DO初始化失败: {e}") from e
+
+    @property
+    def is_open(self):
+        return self._static_task is not None
+
+    @property
+    def waveform_active(self):
+        return self._wave_task is not None
+
+    def write(self, states):
+        """静态写入；若正在回放波形则先中止回放"""
+        if self._wave_task is not None:
+            self._stop_waveform()
+        self._static_task.write(list(states))
+
+    def restart(self):
+        """重启静态任务 (紧急关断前清除任何异常状态)"""
+        if self._wave_task is not None:
+            self._stop_waveform()
+        self._static_task.stop()
+        self._static_task.start()
+
+    def start_waveform(self, waveform, rate=DO_WAVEFORM_RATE):
+        """释放静态任务，由采样时钟定时的有限 DO 任务回放缓冲波形"""
+        if self._wave_task is not None:
+            self._stop_waveform()
+        self._claim_timing()
+        n_samples = len(waveform[0])
+        self._static_task.stop()
+        task = nidaqmx.Task()
+        try:
+            task.do_channels.add_do_chan(
+                self.lines, line_grouping=LineGrouping.CHAN_PER_LINE)
+            task.timing.cfg_samp_clk_timing(
+                rate=rate, sample_mode=AcquisitionType.FINITE,
+                samps_per_chan=n_samples)
+            task.write(waveform, auto_start=False)
+            task.start()
+        except Exception as e:
+            task.close()
+            self._release_timing()
+            self._static_task.start()
+            if isinstance(e, nidaqmx.DaqError) and e.error_code in DO_RESOURCE_ERRORS:
+                raise DoTimingBusy(f"{self.dev_name} 的 DO 定时引擎已被占用") from e
+            raise
+        self._wave_task = task
+
+    def _claim_timing(self):
+        with self._timing_lock:
+            owner = self._timing_owners.get(self.dev_name)
+            if owner is not None and owner is not self:
+                raise DoTimingBusy(f"{self.dev_name} 的 DO 定时引擎正被其他台架使用")
+            self._timing_owners[self.dev_name] = self
+
+    def _release_timing(self):
+        with self._timing_lock:
+            if self._timing_owners.get(self.dev_name) is self:
+                del self._timing_owners[self.dev_name]
+
+    def waveform_done(self):
+        """回放是否结束 (被中止也视为结束)"""
+        if self._wave_task is None:
+            return True
+        return self._wave_task.is_task_done()
+
+    def finish_waveform(self, final_states):
+        """结束回放，恢复静态任务并写入 final_states"""
+        if self._wave_task is not None:
+            self._stop_waveform()
+        self._static_task.write(list(final_states))
+
+    def _stop_waveform(self):
+        task, self._wave_task = self._wave_task, None
+        try:
+            task.stop()
+            task.close()
+        finally:
+            self._release_timing()
+            self._static_task.start()
+
+    def close(self):
+        try:
+            if self._wave_task is not None:
+                self._stop_waveform()
+        finally:
+            if self._static_task is not None:
+                self._static_task.close()
+                self._static_task = None
+
+
+def fail_safe_states(states):
+    """在 states 的基础上关断压缩机并打开报警"""
+    states = list(states)
+    for line, level in FAIL_SAFE_LINES:
+        states[line] = level
+    return states
+
+
+# ============================================================================
+# [SECTION 4] DO 看门狗 (Hardware Watchdog)
+# ============================================================================
+
+class WatchdogLease:
+    """台架持有的看门狗句柄: pet() 按间隔节流后喂狗，返回 True 表示看门狗已超时"""
+
+    def __init__(self, watchdog, offset, pet_interval=DO_WATCHDOG_PET_INTERVAL):
+        self.watchdog = watchdog
+        self.offset = offset
+        self.pet_interval = pet_interval
+        self._last_pet = time.monotonic()
+        self.closed = False
+
+    def pet(self):
+        now = time.monotonic()
+        if now - self._last_pet < self.pet_interval:
+            return False
+        self._last_pet = now
+        return self.watchdog.pet()
+
+    def clear(self):
+        """清除超时状态，DO 线恢复由任务控制 (调用方随后应重新写入安全状态)"""
+        self.watchdog.clear()
+        self._last_pet = time.monotonic()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.watchdog.release(self.offset)
+
+
+class DeviceWatchdog:
+    """设备级 DO 看门狗: 每台设备只能有一个看门狗任务，由该设备上的台架共享
+
+    各台架 arm() 时把自己的压缩机线 (低) 与报警线 (高) 加入超时状态表；
+    任一台架喂狗都会复位计时器 —— 防护的是整个主机进程的停顿，单个台架的
+    流程卡住由软件的故障流程处理。超时时间以第一个台架的设置为准。
+    """
+
+    _watchdogs = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, dev_name, timeout):
+        self.dev_name = dev_name
+        self.timeout = timeout
+        self._task = None
+        self._lock = threading.Lock()
+        self._offsets = set()
+
+    @classmethod
+    def arm(cls, dev_name, offset, timeout=DO_WATCHDOG_TIMEOUT):
+        with cls._registry_lock:
+            wd = cls._watchdogs.get(dev_name)
+            if wd is None:
+                wd = cls(dev_name, timeout)
+            wd._configure(offset, armed=True)
+            wd._offsets.add(offset)
+            cls._watchdogs[dev_name] = wd
+            return WatchdogLease(wd, offset)
+
+    def _expiration_states(self, offset, armed):
+        states = []
+        for line, level in FAIL_SAFE_LINES:
+            if not armed:
+                expir = Level.NO_CHANGE
+            else:
+                expir = Level.HIGH if level else Level.LOW
+            states.append(DOExpirationState(
+                f"{self.dev_name}/port0/line{offset + line}", expir))
+        return states
+
+    def _configure(self, offset, armed):
+        """(重新) 配置一个台架的超时状态；超时状态只能在任务停止时修改"""
+        with self._lock:
+            created = self._task is None
+            try:
+                if created:
+                    self._task = WatchdogTask(self.dev_name, timeout=self.timeout)
+                else:
+                    self._task.stop()
+                self._task.cfg_watchdog_do_expir_states(self._expiration_states(offset, armed))
+                self._task.start()
+            except Exception as e:
+                if created and self._task is not None:
+                    self._task.close()
+                    self._task = None
+                raise RuntimeError(f"看门狗配置失败: {e}") from e
+
+    def pet(self):
+        with self._lock:
+            if self._task is None:
+                return False
+            if self._task.expired:
+                return True
+            self._task.reset_timer()
+            return False
+
+    def clear(self):
+        with self._lock:
+            if self._task is not None:
+                self._task.clear_expiration()
+
+    def release(self, offset):
+        with DeviceWatchdog._registry_lock:
+            self._offsets.discard(offset)
+            if self._offsets:
+                try:
+                    self._configure(offset, armed=False)
+                except RuntimeError:
+                    log.warning("看门狗移除台架失败 (%s line%d)", self.dev_name, offset,
+                                exc_info=True)
+                return
+            DeviceWatchdog._watchdogs.pop(self.dev_name, None)
+            with self._lock:
+                task, self._task = self._task, None
+            if task is not None:
+                try:
+                    task.stop()
+                    task.close()
+                except Exception:
+                    log.warning("看门狗关闭失败 (%s)", self.dev_name, exc_info=True)
+
+
+# ============================================================================
+# [SECTION 5] 压力读取 (Pressure Reading)
+# ============================================================================
+
+def volts_to_bar(volts, out):
+    """传感器电压 -> 压力 (Bar): (v - 1.0) * 2.5，原地写入 out"""
+    np.subtract(volts, 1.0, out=out)
+    np.multiply(out, 2.5, out=out)
+    return out
+
+
+class PressureReader:
+    """基于订阅的压力读取: 预分配缓冲区 + 可配置的滤波管线 (pressure_filters)
+
+    每次 read() 取走订阅中全部新样本，换算为压力后整块送入滤波管线，
+    filtered 为块末的滤波值。pipeline 为预设名、算子列表或 FilterPipeline，
+    缺省为标准滤波 (块中值 + 最近 4 块平均 + 零点归零)。
+    """
+
+    def __init__(self, subscription, pipeline=None):
+        self.sub = subscription
+        self.pipeline = (pipeline if isinstance(pipeline, FilterPipeline)
+                         else build_pipeline(pipeline))
+        self._volts = np.zeros(subscription.capacity, dtype=np.float64)
+        self._bar = np.zeros(subscription.capacity, dtype=np.float64)
+        self.filtered = 0.0
+        self.raw = 0.0
+        self.samples_consumed = 0
+
+    def read(self):
+        """读取并滤波，返回本次消耗的样本数 (0 表示没有新数据，结果保持不变)"""
+        n = self.sub.read_into(self._volts)
+        if n == 0:
+            return 0
+        self.samples_consumed += n
+        p = volts_to_bar(self._volts[:n], self._bar[:n])
+        self.raw = max(0.0, float(p[n - 1]))
+        self.filtered = self.pipeline.process(p)
+        return n
+
+    def filter_blocks(self, volts_blocks, stop_above=None):
+        """批量滤波: volts_blocks 为 (块数, 每块样本数)，结果等价于逐块调用 read()
+
+        返回每块之后的滤波值数组。给定 stop_above 时在第一个滤波值超过它的块
+        之前停下，只消耗 (并返回) 此前的块，超限的块留给调用方逐块处理。
+        """
+        m, n = volts_blocks.shape
+        p = (volts_blocks - 1.0) * 2.5
+        filtered = self.pipeline.process_blocks(p, stop_above)
+        k = len(filtered)
+        if k:
+            self.filtered = float(filtered[-1])
+            self.raw = max(0.0, float(p[k - 1, -1]))
+            self.samples_consumed += k * n
+        return filtered
@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : log_analysis.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    Log_*.csv 结果文件的离线分析 (库 + 命令行)。
+
+    扫描目录下所有 Log_{dev}_Grp{n}_{ts}.csv，用带类型的 np.loadtxt 按块
+    解析 (大文件分块流式读取，内存只保留按 循环/阶段 的聚合数组)，输出:
+      - 每个台架运行 (run) 的汇总: 循环数、End/Max/Min 趋势、首次故障循环
+      - 每循环每阶段的聚合: 轮数、End_P 均值、Max_P 最大、Min_P 最小
+      - 每阶段的聚合
+
+    故障判定 (日志中可见的证据):
+      - 同一循环的 Phase_1 记录出现多次 (故障后 "继续" 会重跑该循环)
+      - 给定 --target 时，Phase_1 的 Max_P 未达到目标压力
+      - 给定 --max-p 时，任一记录的 Max_P 超过保护上限
+
+    用法:
+      python log_analysis.py analyze <目录> [-o 输出目录] [--target 2.0] [--max-p 2.5]
+      python log_analysis.py bench [--files 2000] [--cycles 50]
+==============================================================================
+"""
+
+import os
+import re
+import sys
+import csv
+import glob
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# ============================================================================
+# [SECTION 1] 文件格式 (File Format)
+# ============================================================================
+
+LOG_HEADER = ["Date", "Time", "Cycle", "Phase", "Step", "End_P", "Max_P", "Min_P"]
+LOG_NAME_RE = re.compile(r"^Log_(?P<dev>.+)_Grp(?P<grp>\d+)_(?P<ts>\d{8}_\d{6})\.csv$")
+
+# 分析只需要 Cycle 之后的列，Date/Time 不解析
+LOG_USECOLS = (2, 3, 4, 5, 6, 7)
+LOG_DTYPE = np.dtype([
+    ("cycle", "i4"), ("phase", "U8"), ("step", "U16"),
+    ("end_p", "f4"), ("max_p", "f4"), ("min_p", "f4"),
+])
+
+# cycle_table() 的输出格式 (phase: 1/2)
+CYCLE_DTYPE = np.dtype([
+    ("cycle", "i4"), ("phase", "i1"), ("rows", "i4"), ("rounds", "i4"),
+    ("end_p_mean", "f4"), ("end_p_last", "f4"), ("max_p", "f4"), ("min_p", "f4"),
+])
+
+PHASES = ("Phase_1", "Phase_2")
+CHUNK_ROWS = 200000         # 单次解析的最大行数 (约 20 MB 临时内存)
+
+
+class LogFileInfo:
+    """从文件名解析出的台架信息"""
+
+    def __init__(self, path, dev, grp, ts):
+        self.path = path
+        self.dev = dev
+        self.grp = grp
+        self.ts = ts
+
+    @property
+    def station(self):
+        return f"{self.dev}_Grp{self.grp}"
+
+
+def scan_logs(directory, recursive=False):
+    """列出目录下的 Log_*.csv，按 (台架, 时间戳) 排序；文件名不符合格式的跳过"""
+    pattern = os.path.join(directory, "**", "Log_*.csv") if recursive \
+        else os.path.join(directory, "Log_*.csv")
+    infos = []
+    for path in glob.glob(pattern, recursive=recursive):
+        m = LOG_NAME_RE.match(os.path.basename(path))
+        if not m:
+            log.warning("跳过无法识别的文件名: %s", path)
+            continue
+        infos.append(LogFileInfo(path, m.group("dev"), int(m.group("grp")), m.group("ts")))
+    infos.sort(key=lambda i: (i.station, i.ts))
+    return infos
+
+
+# ============================================================================
+# [SECTION 2] 解析 (Parsing)
+# ============================================================================
+
+def _parse_lines(lines):
+    """把一批 CSV 行解析为 LOG_DTYPE 数组；有坏行 (如断电截断) 时逐行回退并跳过"""
+    try:
+        return np.loadtxt(lines, dtype=LOG_DTYPE, delimiter=",",
+                          usecols=LOG_USECOLS, ndmin=1)
+    except ValueError:
+        pass
+    good = []
+    for row in csv.reader(lines):
+        if len(row) != len(LOG_HEADER):
+            continue
+        try:
+            good.append((int(row[2]), row[3], row[4],
+                         float(row[5]), float(row[6]), float(row[7])))
+        except ValueError:
+            continue
+    if len(good) < len(lines):
+        log.warning("跳过 %d 行无法解析的记录", len(lines) - len(good))
+    return np.array(good, dtype=LOG_DTYPE)
+
+
+def iter_log_chunks(path, chunk_rows=CHUNK_ROWS):
+    """分块读取一个日志文件，逐块产出 LOG_DTYPE 数组 (跳过表头)"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        header = f.readline()
+        if not header.startswith("Date"):
+            raise ValueError(f"不是测试日志文件: {path}")
+        while True:
+            lines = [ln for ln in itertools.islice(f, chunk_rows) if ln.strip()]
+            if not lines:
+                break
+            yield _parse_lines(lines)
+
+
+def load_log(path):
+    """一次性读入整个日志文件 (小文件使用)"""
+    chunks = list(iter_log_chunks(path))
+    if not chunks:
+        return np.zeros(0, dtype=LOG_DTYPE)
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+
+def step_rounds(step, max_digits=6):
+    """'12/30 Done' -> 12 (向量化: 直接对 UCS-4 码点做数字累加，比 np.char 快一个量级)"""
+    step = np.ascontiguousarray(step)
+    n = len(step)
+    codes = step.view(np.uint32).reshape(n, -1)[:, :max_digits].astype(np.int32) - ord("0")
+    val = np.zeros(n, dtype=np.int32)
+    alive = np.ones(n, dtype=bool)
+    for k in range(codes.shape[1]):
+        d = codes[:, k]
+        alive &= (d >= 0) & (d <= 9)
+        if not alive.any():
+            break
+        val = np.where(alive, val * 10 + d, val)
+    return val
+
+
+# ============================================================================
+# [SECTION 3] 聚合 (Aggregation)
+# ============================================================================
+
+class RunAggregate:
+    """单个日志文件 (一次台架运行) 的按 (阶段, 循环) 聚合，支持分块累加"""
+
+    def __init__(self, info=None):
+        self.info = info
+        self.rows = 0
+        self.bad_phase_rows = 0
+        self._cap = 0
+        self.count = np.zeros((2, 0), dtype=np.int32)
+        self.end_sum = np.zeros((2, 0), dtype=np.float64)
+        self.end_last = np.zeros((2, 0), dtype=np.float32)
+        self.max_max = np.zeros((2, 0), dtype=np.float32)
+        self.min_min = np.zeros((2, 0), dtype=np.float32)
+        self.last_round = np.zeros((2, 0), dtype=np.int32)
+
+    def _grow(self, n):
+        if n <= self._cap:
+            return
+        cap = max(n, 2 * self._cap, 64)
+        for name, fill in (("count", 0), ("end_sum", 0), ("end_last", np.nan),
+                           ("max_max", -np.inf), ("min_min", np.inf), ("last_round", 0)):
+            old = getattr(self, name)
+            new = np.full((2, cap), fill, dtype=old.dtype)
+            new[:, :self._cap] = old
+            setattr(self, name, new)
+        self._cap = cap
+
+    def add(self, chunk):
+        n = len(chunk)
+        if n == 0:
+            return
+        self.rows += n
+        phase = chunk["phase"]
+        is_p1 = phase == PHASES[0]
+        ok = is_p1 | (phase == PHASES[1])
+        if not ok.all():
+            self.bad_phase_rows += int(n - ok.sum())
+            chunk = chunk[ok]
+            is_p1 = is_p1[ok]
+        ph = np.where(is_p1, 0, 1)
+        cyc = np.maximum(chunk["cycle"], 0)
+        self._grow(int(cyc.max()) + 1)
+
+        idx = (ph, cyc)
+        np.add.at(self.count, idx, 1)
+        np.add.at(self.end_sum, idx, chunk["end_p"])
+        np.maximum.at(self.max_max, idx, chunk["max_p"])
+        np.minimum.at(self.min_min, idx, chunk["min_p"])
+        # 文件内行序即时间序: 同一 (阶段, 循环) 的最后一次赋值生效
+        self.end_last[idx] = chunk["end_p"]
+        self.last_round[idx] = step_rounds(chunk["step"])
+
+    # --- 结果 ---
+
+    def cycles(self):
+        """出现过的循环号 (升序)"""
+        return np.flatnonzero(self.count.sum(axis=0) > 0)
+
+    def faults(self, target_p=None, max_p=None):
+        """返回 {故障类型: 循环号数组}"""
+        c = self.cycles()
+        out = {"retry": c[self.count[0, c] > 1]}
+        if target_p is not None:
+            has_p1 = self.count[0, c] > 0
+            out["below_target"] = c[has_p1 & (self.max_max[0, c] < target_p)]
+        if max_p is not None:
+            over = (self.max_max[:, c] > max_p).any(axis=0)
+            out["over_limit"] = c[over]
+        return out
+
+    def first_fault(self, target_p=None, max_p=None):
+        """首次故障所在循环号 (没有故障证据时返回 None)"""
+        firsts = [int(v[0]) for v in self.faults(target_p, max_p).values() if len(v)]
+        return min(firsts) if firsts else None
+
+    def trend(self, field, phase=1):
+        """某列按循环的线性趋势斜率 (每 100 循环的变化量)；循环不足两个时为 nan"""
+        c = self.cycles()
+        c = c[self.count[phase, c] > 0]
+        if len(c) < 2:
+            return np.nan
+        if field == "end_p":
+            y = self.end_sum[phase, c] / self.count[phase, c]
+        elif field == "max_p":
+            y = self.max_max[phase, c]
+        else:
+            y = self.min_min[phase, c]
+        return float(np.polyfit(c.astype(np.float64), y.astype(np.float64), 1)[0]) * 100.0
+
+    def cycle_table(self):
+        """每 (循环, 阶段) 一行的结构化数组"""
+        c = self.cycles()
+        ph, cc = np.nonzero(self.count[:, c] > 0)
+        cyc = c[cc]
+        out = np.zeros(len(cyc), dtype=CYCLE_DTYPE)
+        out["cycle"] = cyc
+        out["phase"] = ph + 1
+        out["rows"] = self.count[ph, cyc]
+        out["rounds"] = self.last_round[ph, cyc]
+        out["end_p_mean"] = self.end_sum[ph, cyc] / self.count[ph, cyc]
+        out["end_p_last"] = self.end_last[ph, cyc]
+        out["max_p"] = self.max_max[ph, cyc]
+        out["min_p"] = self.min_min[ph, cyc]
+        order = np.lexsort((out["phase"], out["cycle"]))
+        return out[order]
+
+    def phase_table(self):
+        """每阶段一行: 记录数、End_P 均值、Max_P 均值/最大、Min_P 最小"""
+        rows = []
+        for ph in (0, 1):
+            sel = self.count[ph] > 0
+            n = int(self.count[ph, sel].sum())
+            if n == 0:
+                continue
+            rows.append((PHASES[ph], n,
+                         float(self.end_sum[ph, sel].sum() / n),
+                         float(self.max_max[ph, sel].mean()),
+                         float(self.max_max[ph, sel].max()),
+                         float(self.min_min[ph, sel].min())))
+        return rows
+
+    def summary(self, target_p=None, max_p=None):
+        c = self.cycles()
+        info = self.info
+        return {
+            "station": info.station if info else "",
+            "run": info.ts if info else "",
+            "file": os.path.basename(info.path) if info else "",
+            "rows": self.rows,
+            "cycles": len(c),
+            "last_cycle": int(c[-1]) if len(c) else 0,
+            "first_fault_cycle": self.first_fault(target_p, max_p),
+            "retries": int(np.maximum(self.count[0, c] - 1, 0).sum()),
+            "end_p_trend": self.trend("end_p"),
+            "max_p_trend": self.trend("max_p"),
+            "min_p_trend": self.trend("min_p"),
+        }
+
+
+def analyze_file(info, chunk_rows=CHUNK_ROWS):
+    """流式读取一个文件并返回 RunAggregate"""
+    agg = RunAggregate(info)
+    for chunk in iter_log_chunks(info.path, chunk_rows):
+        agg.add(chunk)
+    return agg
+
+
+def _analyze_file_safe(args):
+    info, chunk_rows = args
+    try:
+        return analyze_file(info, chunk_rows)
+    except (OSError, ValueError) as e:
+        log.warning("分析失败 (%s): %s", info.path, e)
+        return None
+
+
+def analyze_directory(directory, recursive=False, chunk_rows=CHUNK_ROWS, jobs=1):
+    """分析目录下全部日志，返回 RunAggregate 列表 (jobs > 1 时多进程并行)"""
+    infos = scan_logs(directory, recursive)
+    tasks = [(info, chunk_rows) for info in infos]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            results = list(ex.map(_analyze_file_safe, tasks, chunksize=16))
+    else:
+        results = [_analyze_file_safe(t) for t in tasks]
+    return [r for r in results if r is not None]
+
+
+# ============================================================================
+# [SECTION 4] 输出 (Reports)
+# ============================================================================
+
+SUMMARY_COLUMNS = ["station", "run", "file", "rows", "cycles", "last_cycle",
+                   "first_fault_cycle", "retries",
+                   "end_p_trend", "max_p_trend", "min_p_trend"]
+
+
+def _fmt(v):
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        return "" if np.isnan(v) else f"{v:.4f}"
+    return str(v)
+
+
+def write_reports(runs, out_dir, target_p=None, max_p=None):
+    """写出 stations.csv / cycles.csv / phases.csv"""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "stations.csv"), "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(SUMMARY_COLUMNS)
+        for r in runs:
+            s = r.summary(target_p, max_p)
+            w.writerow([_fmt(s[k]) for k in SUMMARY_COLUMNS])
+
+    with open(os.path.join(out_dir, "cycles.csv"), "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["station", "run", "cycle", "phase", "rows", "rounds",
+                    "end_p_mean", "end_p_last", "max_p", "min_p"])
+        for r in runs:
+            station, run = r.info.station, r.info.ts
+            for row in r.cycle_table().tolist():
+                w.writerow([station, run, row[0], PHASES[row[1] - 1], row[2], row[3],
+                            f"{row[4]:.3f}", f"{row[5]:.2f}", f"{row[6]:.2f}", f"{row[7]:.2f}"])
+
+    with open(os.path.join(out_dir, "phases.csv"), "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["station", "run", "phase", "rows",
+                    "end_p_mean", "max_p_mean", "max_p_max", "min_p_min"])
+        for r in runs:
+            for row in r.phase_table():
+                w.writerow([r.info.station, r.info.ts, row[0], row[1]]
+                           + [f"{v:.3f}" for v in row[2:]])
+
+
+def print_summary(runs, target_p=None, max_p=None, file=None):
+    file = file or sys.stdout
+    print(f"{'台架':<20} {'运行':<16} {'循环':>6} {'首次故障':>8} {'重跑':>5} "
+          f"{'Max_P趋势/100循环':>18}", file=file)
+    for r in runs:
+        s = r.summary(target_p, max_p)
+        ff = s["first_fault_cycle"]
+        print(f"{s['station']:<20} {s['run']:<16} {s['cycles']:>6} "
+              f"{'-' if ff is None else ff:>8} {s['retries']:>5} "
+              f"{_fmt(s['max_p_trend']) or '-':>18}", file=file)
+
+
+# ============================================================================
+# [SECTION 5] 基准测试 (Benchmark)
+# ============================================================================
+
+def write_synthetic_log(path, cycles, rounds=30, seed=0, fault_cycle=None):
+    """生成与 TestWorker.log_csv() 格式一致的合成日志"""
+    rng = np.random.default_rng(seed)
+    per_cycle = rounds + 1
+    n = cycles * per_cycle
+    end_p = rng.uniform(0.0, 0.05, n)
+    max_p = 2.3 + 0.0005 * np.repeat(np.arange(cycles), per_cycle) + rng.normal(0, 0.02, n)
+    min_p = rng.uniform(0.0, 0.02, n)
+    lines = [",".join(LOG_HEADER) + "\n"]
+    k = 0
+    for c in range(1, cycles + 1):
+        repeat = 2 if c == fault_cycle else 1
+        for _ in range(repeat):
+            lines.append(f"2025-01-01,00:00:00,{c},Phase_1,1/1 Done,"
+                         f"{end_p[k]:.2f},{max_p[k] - 0.3:.2f},{min_p[k]:.2f}\n")
+        k += 1
+        for r in range(1, rounds + 1):
+            lines.append(f"2025-01-01,00:00:00,{c},Phase_2,{r}/{rounds} Done,"
+                         f"{end_p[k]:.2f},{max_p[k]:.2f},{min_p[k]:.2f}\n")
+            k += 1
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(lines)
+    return n
+
+
+def run_benchmark(files=2000, cycles=50, jobs=None, keep_dir=None):
+    """生成 files 个合成日志并计时分析，返回 (行数, 秒)"""
+    jobs = jobs or os.cpu_count() or 1
+    tmp = keep_dir or tempfile.mkdtemp(prefix="log_bench_")
+    try:
+        t0 = time.perf_counter()
+        total_rows = 0
+        for i in range(files):
+            name = f"Log_Dev{i // 4 + 1}_Grp{i % 4}_20250101_{i // 60 % 60:02d}{i % 60:02d}00.csv"
+            fault = cycles // 2 if i % 10 == 0 else None
+            total_rows += write_synthetic_log(os.path.join(tmp, name), cycles,
+                                              seed=i, fault_cycle=fault)
+        gen_s = time.perf_counter() - t0
+        print(f"生成 {files} 个文件 / {total_rows} 行: {gen_s:.2f} s")
+
+        t0 = time.perf_counter()
+        runs = analyze_directory(tmp, jobs=jobs)
+        elapsed = time.perf_counter() - t0
+        faults = sum(1 for r in runs if r.first_fault() is not None)
+        print(f"分析 {len(runs)} 个文件 ({jobs} 进程): {elapsed:.2f} s, "
+              f"{total_rows / elapsed / 1e6:.2f} M 行/s, 检出故障运行 {faults}")
+        return total_rows, elapsed
+    finally:
+        if keep_dir is None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ============================================================================
+# [SECTION 6] 命令行 (CLI)
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="压缩机寿命测试 Log_*.csv 离线分析")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_an = sub.add_parser("analyze", help="分析目录下的日志文件")
+    p_an.add_argument("directory")
+    p_an.add_argument("-o", "--out", help="输出 stations/cycles/phases.csv 的目录")
+    p_an.add_argument("-r", "--recursive", action="store_true", help="递归扫描子目录")
+    p_an.add_argument("--target", type=float, help="高压目标 (Phase_1 Max_P 低于此值视为故障)")
+    p_an.add_argument("--max-p", type=float, help="保护上限 (Max_P 超过此值视为故障)")
+    p_an.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="单块解析行数")
+    p_an.add_argument("-j", "--jobs", type=int, default=1, help="并行进程数")
+
+    p_bench = sub.add_parser("bench", help="用合成日志测试分析速度")
+    p_bench.add_argument("--files", type=int, default=2000)
+    p_bench.add_argument("--cycles", type=int, default=50, help="每个文件的循环数")
+    p_bench.add_argument("-j", "--jobs", type=int, default=None)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+
+    if args.cmd == "bench":
+        run_benchmark(args.files, args.cycles, args.jobs)
+        return 0
+
+    t0 = time.perf_counter()
+    runs = analyze_directory(args.directory, args.recursive, args.chunk_rows, args.jobs)
+    if not runs:
+        print("未找到可分析的 Log_*.csv 文件")
+        return 1
+    print_summary(runs, args.target, args.max_p)
+    if args.out:
+        write_reports(runs, args.out, args.target, args.max_p)
+        print(f"报告已写入: {args.out}")
+    print(f"共 {len(runs)} 个文件, {sum(r.rows for r in runs)} 行, "
+          f"{time.perf_counter() - t0:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
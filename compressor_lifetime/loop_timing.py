@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : loop_timing.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    测试线程控制回路的时序统计 (与 Qt 无关)。
+
+    LatencyHistogram 为对数分桶直方图 (每倍频 8 桶，1 µs ~ 2 min)，记录一次
+    只有一次 log2 和一次列表自增，不保存原始样本。LoopTiming 为每个台架
+    维护一组直方图:
+      loop       相邻两次压力读取的间隔 (名义 100 ms tick)
+      read       一次 AI 读取 + 滤波的耗时
+      do_write   一次 DO 写入的耗时
+      emit       一次向 GUI / 运行器发送事件的耗时
+      tick_late  可中断等待比请求时长多出的部分 (仅真实时钟)
+      step_over  DO 步骤 (脉冲宽度) 比名义时长多出的部分 (仅真实时钟)
+    每个循环结束时取出本循环的统计写入 Timing_*.csv，并累加到全程统计
+    (界面的状态提示与结束日志)。
+==============================================================================
+"""
+
+import math
+
+TIMING_METRICS = (
+    ("loop", "循环周期"),
+    ("read", "压力读取"),
+    ("do_write", "DO 写入"),
+    ("emit", "事件发送"),
+    ("tick_late", "tick 延迟"),
+    ("step_over", "步骤超时"),
+)
+TIMING_HEADER = ["Cycle", "Metric", "Count", "Mean_ms", "P50_ms", "P90_ms", "P99_ms", "Max_ms"]
+
+
+class LatencyHistogram:
+    """对数分桶的耗时直方图: record() O(1)，分位数精度为一个桶 (约 9%)"""
+
+    BUCKETS_PER_OCTAVE = 8
+    N_BUCKETS = 8 * 27 + 1          # 桶 0: <= 1 µs；最后一个桶: >= 2^27 µs (约 134 s)
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * self.N_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        us = seconds * 1e6
+        if us <= 1.0:
+            i = 0
+        else:
+            i = min(self.N_BUCKETS - 1, int(math.log2(us) * self.BUCKETS_PER_OCTAVE) + 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """分位数 (s)，取所在桶的上边界，不超过最大值"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                edge = 2.0 ** (i / self.BUCKETS_PER_OCTAVE) * 1e-6
+                return min(edge, self.max)
+        return self.max
+
+    def summary(self):
+        """{count, mean_ms, p50_ms, p90_ms, p99_ms, max_ms}"""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000.0 if self.count else 0.0,
+            "p50_ms": self.quantile(0.50) * 1000.0,
+            "p90_ms": self.quantile(0.90) * 1000.0,
+            "p99_ms": self.quantile(0.99) * 1000.0,
+            "max_ms": self.max * 1000.0,
+        }
+
+
+class LoopTiming:
+    """一个台架的全部时序直方图: 当前循环 + 全程累计"""
+
+    def __init__(self):
+        self.cycle = {name: LatencyHistogram() for name, _ in TIMING_METRICS}
+        self.total = {name: LatencyHistogram() for name, _ in TIMING_METRICS}
+
+    def record(self, name, seconds):
+        self.cycle[name].record(seconds)
+
+    def end_cycle(self, cycle):
+        """结束一个循环: 返回本循环各指标的 CSV 行，并累加到全程统计"""
+        rows = []
+        for name, _ in TIMING_METRICS:
+            h = self.cycle[name]
+            if not h.count:
+                continue
+            s = h.summary()
+            rows.append([cycle, name, s["count"]] + [
+                f"{s[k]:.3f}" for k in ("mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")])
+            self.total[name].merge(h)
+            self.cycle[name] = LatencyHistogram()
+        return rows
+
+    def summary(self):
+        """全程 (含当前未结束的循环) 各指标的统计，省略没有样本的指标"""
+        out = {}
+        for name, _ in TIMING_METRICS:
+            h = LatencyHistogram()
+            h.merge(self.total[name])
+            h.merge(self.cycle[name])
+            if h.count:
+                out[name] = h.summary()
+        return out
+
+
+def format_timing(summary, sep=" | "):
+    """把 summary() 的结果格式化为一行文本 (中位数 / p99 / 最大值，单位 ms)"""
+    parts = []
+    for name, label in TIMING_METRICS:
+        s = summary.get(name)
+        if s:
+            parts.append(f"{label} {s['p50_ms']:.2f}/{s['p99_ms']:.2f}/{s['max_ms']:.2f}")
+    return sep.join(parts)
@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : plot_data.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    台架曲线的数据存储 (与 Qt 无关)。
+
+    1. PlotRingBuffer: 预分配的 NumPy 双倍镜像环形缓冲区。每个样本同时写入
+       i 和 i+capacity 两个位置，因此最近 N 个样本始终是一段连续内存，
+       可以不经拷贝直接交给 pyqtgraph 绘制。
+    2. PressureHistory: 全程压力历史的多分辨率 min/max/mean 金字塔。第 0 层
+       保存最近的原始样本，第 k 层每个桶汇总 4^k 个样本；每层都是固定容量的
+       环形缓冲区 (float32 数值 + float64 时间)，内存与运行时长无关。被挤出
+       第 0 层的原始样本可选写入磁盘文件 (spill)。view(x0, x1) 选择覆盖该
+       时间范围且点数不超过上限的最细一层，重绘成本恒定。
+==============================================================================
+"""
+
+import numpy as np
+
+HISTORY_LEVEL_CAPACITY = 8192   # 每层的桶数 (第 0 层为原始样本数，10 Hz 下约 13 min)
+HISTORY_FACTOR = 4              # 相邻两层的桶宽之比
+HISTORY_LEVELS = 8              # 含第 0 层；第 7 层覆盖 8192 * 4^7 个样本 (10 Hz 下约 4 年)
+
+_SPILL_DTYPE = np.dtype([("t", "<f8"), ("p", "<f4")])
+_SPILL_INDEX_STRIDE = 1024      # 落盘文件每 1024 条记录在内存中保留一个时间索引
+
+
+# ============================================================================
+# [SECTION 1] 环形缓冲区 (Ring Buffer)
+# ============================================================================
+
+class PlotRingBuffer:
+    """固定容量的 (x, y) 环形缓冲区，view() 返回按时间顺序排列的连续视图"""
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = capacity
+        self._x = np.zeros(2 * capacity, dtype=dtype)
+        self._y = np.zeros(2 * capacity, dtype=dtype)
+        self._pos = 0       # 下一个写入槽位 (0 .. capacity-1)
+        self._count = 0
+        self.total_written = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self._pos = 0
+        self._count = 0
+        self.total_written = 0
+
+    def append(self, x, y):
+        p = self._pos
+        self._x[p] = self._x[p + self.capacity] = x
+        self._y[p] = self._y[p + self.capacity] = y
+        self._pos = (p + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.total_written += 1
+
+    def extend(self, xs, ys):
+        """批量写入 (向量化)，超过容量时只保留最新的 capacity 个样本"""
+        n = len(xs)
+        if n == 0:
+            return
+        self.total_written += n
+        if n > self.capacity:
+            xs = xs[-self.capacity:]
+            ys = ys[-self.capacity:]
+            n = self.capacity
+        cap = self.capacity
+        p = self._pos
+        first = min(n, cap - p)
+        for buf, src in ((self._x, xs), (self._y, ys)):
+            buf[p:p + first] = src[:first]
+            buf[p + cap:p + cap + first] = src[:first]
+            if n > first:
+                rest = n - first
+                buf[:rest] = src[first:]
+                buf[cap:cap + rest] = src[first:]
+        self._pos = (p + n) % cap
+        self._count = min(self._count + n, cap)
+
+    def view(self):
+        """最近 len(self) 个样本的 (x, y) 连续视图 (不拷贝，下次写入前有效)"""
+        end = self._pos + self.capacity
+        start = end - self._count
+        return self._x[start:end], self._y[start:end]
+
+    def last(self):
+        if self._count == 0:
+            return None
+        i = self._pos - 1 + self.capacity
+        return self._x[i], self._y[i]
+
+
+# ============================================================================
+# [SECTION 2] 全程历史金字塔 (Min/Max/Mean Pyramid)
+# ============================================================================
+
+class _LevelRing:
+    """固定容量的多字段环形缓冲区 (按时间追加，最旧的被覆盖)"""
+
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = [np.zeros(capacity, dtype=dt) for dt in fields]
+        self._pos = 0
+        self._count = 0
+        self.evicted = 0        # 已被覆盖的条目数 (> 0 表示本层不再覆盖最早的数据)
+
+    def __len__(self):
+        return self._count
+
+    def extend(self, columns, on_evict=None):
+        """追加各字段的新条目；on_evict(columns) 收到即将被覆盖的最旧条目"""
+        n = len(columns[0])
+        if n == 0:
+            return
+        cap = self.capacity
+        over = self._count + n - cap
+        if over > 0:
+            if on_evict is not None:
+                k = min(over, self._count)
+                evicted = self.oldest(k)
+                if over > k:        # 新数据本身超过容量时，其开头部分也直接被挤出
+                    evicted = [np.concatenate([e, c[:over - k]])
+                               for e, c in zip(evicted, columns)]
+                on_evict(evicted)
+            self.evicted += over
+        if n > cap:
+            columns = [c[-cap:] for c in columns]
+            n = cap
+        p = self._pos
+        first = min(n, cap - p)
+        for buf, src in zip(self.fields, columns):
+            buf[p:p + first] = src[:first]
+            if n > first:
+                buf[:n - first] = src[first:]
+        self._pos = (p + n) % cap
+        self._count = min(self._count + n, cap)
+
+    def oldest(self, k):
+        """最旧的 k 个条目 (各字段拷贝)"""
+        idx = (self._pos - self._count + np.arange(k)) % self.capacity
+        return [f[idx] for f in self.fields]
+
+    def newest(self, k):
+        """最新的 k 个条目 (各字段拷贝，按时间顺序)"""
+        k = min(k, self._count)
+        idx = (self._pos - k + np.arange(k)) % self.capacity
+        return [f[idx] for f in self.fields]
+
+    def ordered(self):
+        """按时间顺序的各字段 (拷贝)"""
+        start = (self._pos - self._count) % self.capacity
+        if start + self._count <= self.capacity:
+            return [f[start:start + self._count].copy() for f in self.fields]
+        return [np.concatenate([f[start:], f[:self._pos]]) for f in self.fields]
+
+    def clear(self):
+        self._pos = 0
+        self._count = 0
+        self.evicted = 0
+
+
+class PressureHistory:
+    """一个台架全程压力的多分辨率历史
+
+    extend() 为向量化追加；recent(n) 返回最近 n 个原始样本 (跟随模式)，
+    view(x0, x1, max_points) 返回可见范围内的曲线: 原始样本，或各桶的
+    (min, max) 包络 (每桶两个点)。
+    """
+
+    def __init__(self, capacity=HISTORY_LEVEL_CAPACITY, levels=HISTORY_LEVELS,
+                 factor=HISTORY_FACTOR, spill_path=None):
+        self.factor = factor
+        self.raw = _LevelRing(capacity, (np.float64, np.float32))
+        # 第 k 层 (k >= 1): 桶的首个样本时间、min、max、mean
+        self.levels = [_LevelRing(capacity, (np.float64, np.float32, np.float32, np.float32))
+                       for _ in range(levels - 1)]
+        # 每层尚未凑满一个桶的下层条目 (t, lo, hi, mean)
+        self._acc = [[np.zeros(0), np.zeros(0, np.float32), np.zeros(0, np.float32),
+                      np.zeros(0, np.float32)] for _ in self.levels]
+        self.spill_path = spill_path
+        self._spill = None
+        self._spill_count = 0
+        self._spill_index = []      # 落盘记录 0, 1024, 2048 ... 的时间
+        self.first_t = None
+        self.total_written = 0
+
+    def __len__(self):
+        return self.total_written
+
+    def clear(self):
+        self.raw.clear()
+        for lv in self.levels:
+            lv.clear()
+        for acc in self._acc:
+            for i, a in enumerate(acc):
+                acc[i] = a[:0]
+        self.set_spill(self.spill_path)
+        self.first_t = None
+        self.total_written = 0
+
+    def set_spill(self, path):
+        """之后被挤出第 0 层的原始样本写入 path (新文件；None 表示不落盘)"""
+        self.close_spill()
+        self.spill_path = path
+        self._spill_count = 0
+        self._spill_index = []
+
+    def close_spill(self):
+        """关闭落盘文件 (运行结束时调用)；已落盘的数据仍可通过 view() 读取"""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    @property
+    def nbytes(self):
+        rings = [self.raw] + self.levels
+        return sum(f.nbytes for r in rings for f in r.fields)
+
+    # --- 写入 ---
+
+    def extend(self, xs, ys):
+        n = len(xs)
+        if n == 0:
+            return
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float32)
+        if self.first_t is None:
+            self.first_t = float(xs[0])
+        self.total_written += n
+        self.raw.extend([xs, ys], self._spill_out if self.spill_path else None)
+        cols = [xs, ys, ys, ys]
+        for lv, acc in zip(self.levels, self._acc):
+            cols = self._aggregate(acc, cols)
+            if cols is None:
+                break
+            lv.extend(cols)
+
+    def _aggregate(self, acc, cols):
+        """把下层新条目并入累加器，返回凑满的桶 (没有时返回 None)"""
+        merged = [np.concatenate([a, c]) if len(a) else c for a, c in zip(acc, cols)]
+        f = self.factor
+        m = len(merged[0]) // f * f
+        for i, col in enumerate(merged):
+            acc[i] = col[m:].copy()
+        if m == 0:
+            return None
+        t, lo, hi, mean = (col[:m] for col in merged)
+        return [t[::f],
+                lo.reshape(-1, f).min(axis=1),
+                hi.reshape(-1, f).max(axis=1),
+                mean.reshape(-1, f).mean(axis=1, dtype=np.float64).astype(np.float32)]
+
+    def _spill_out(self, cols):
+        if self._spill is None:
+            self._spill = open(self.spill_path, "wb")
+        rec = np.empty(len(cols[0]), dtype=_SPILL_DTYPE)
+        rec["t"] = cols[0]
+        rec["p"] = cols[1]
+        rec.tofile(self._spill)
+        # 新记录中落在索引步长整数倍上的时间
+        first = -self._spill_count % _SPILL_INDEX_STRIDE
+        self._spill_index.extend(cols[0][first::_SPILL_INDEX_STRIDE].tolist())
+        self._spill_count += len(rec)
+
+    # --- 读取 ---
+
+    def recent(self, n):
+        """最近 n 个原始样本 (x, y)"""
+        return self.raw.newest(n)
+
+    def view(self, x0, x1, max_points):
+        """[x0, x1] 内的曲线 (x, y)，点数不超过 max_points (外加两端各一个相邻点)"""
+        if self.total_written == 0:
+            return np.zeros(0), np.zeros(0, np.float32)
+        if self.raw.evicted == 0 or self.raw.oldest(1)[0][0] <= x0:
+            t, p = self.raw.ordered()
+            i0, i1 = _window(t, x0, x1)
+            if i1 - i0 <= max_points:
+                return t[i0:i1], p[i0:i1]
+        elif self._spill_count:
+            t, p = self._spill_window(x0, x1, max_points)
+            if t is not None:
+                return t, p
+        for k, lv in enumerate(self.levels):
+            if len(lv) == 0:
+                break
+            t, lo, hi = lv.ordered()[:3]
+            last = k == len(self.levels) - 1 or len(self.levels[k + 1]) == 0
+            if lv.evicted and t[0] > x0 and not last:
+                continue
+            t, lo, hi = self._with_tail(k, t, lo, hi)
+            i0, i1 = _window(t, x0, x1)
+            if 2 * (i1 - i0) <= max_points or last:
+                return _envelope(t[i0:i1], lo[i0:i1], hi[i0:i1])
+        t, p = self.raw.ordered()
+        return t, p
+
+    def _with_tail(self, k, t, lo, hi):
+        """第 k 层的桶 + 尚未汇总进该层的最新数据 (各层累加器的部分桶)"""
+        tails = []
+        for acc in reversed(self._acc[:k + 1]):
+            if len(acc[0]):
+                tails.append((acc[0][0], acc[1].min(), acc[2].max()))
+        if not tails:
+            return t, lo, hi
+        tt, tl, th = zip(*tails)
+        return (np.concatenate([t, tt]), np.concatenate([lo, np.asarray(tl, np.float32)]),
+                np.concatenate([hi, np.asarray(th, np.float32)]))
+
+    def _spill_window(self, x0, x1, max_points):
+        """从磁盘文件读取已挤出第 0 层的原始样本 (范围内样本过多时返回 None)"""
+        stride = _SPILL_INDEX_STRIDE
+        b0, b1 = _window(self._spill_index, x0, x1)
+        r0 = b0 * stride
+        r1 = min(self._spill_count, b1 * stride)
+        if r1 - r0 > max_points + 2 * stride:
+            return None, None
+        if self._spill is not None:
+            self._spill.flush()
+        rec = np.fromfile(self.spill_path, dtype=_SPILL_DTYPE, count=r1 - r0,
+                          offset=r0 * _SPILL_DTYPE.itemsize)
+        i0, i1 = _window(rec["t"], x0, x1)
+        t, p = rec["t"][i0:i1], rec["p"][i0:i1]
+        if i1 == len(rec):          # 范围延伸到仍在内存中的原始样本
+            t_raw, p_raw = self.raw.ordered()
+            j0, j1 = _window(t_raw, x0, x1)
+            t, p = np.concatenate([t, t_raw[j0:j1]]), np.concatenate([p, p_raw[j0:j1]])
+        if len(t) > max_points:
+            return None, None
+        return t, p
+
+
+def _window(t, x0, x1):
+    """[x0, x1] 对应的下标范围，两端各多取一个点使曲线延伸到视图边缘"""
+    i0 = max(0, int(np.searchsorted(t, x0, side="left")) - 1)
+    i1 = min(len(t), int(np.searchsorted(t, x1, side="right")) + 1)
+    return i0, i1
+
+
+def _envelope(t, lo, hi):
+    """每个桶输出 (t, min) 与 (t, max) 两个点，连线即为包络"""
+    x = np.repeat(t, 2)
+    y = np.empty(2 * len(t), dtype=np.float32)
+    y[0::2] = lo
+    y[1::2] = hi
+    return x, y
@@ -0,0 +1,479 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : pressure_filters.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    可组合的流式压力滤波管线。
+
+    每个算子保存自己的跨块状态 (窗口尾部样本、EMA 当前值等)，一次调用处理
+    整个 NumPy 样本块，逐块调用与一次处理拼接后的数据结果一致:
+      - block_median   块中值 (归约算子: 每个读取块输出一个值)
+      - running_median 最近 window 个样本的滑动中值 (增量有序窗口，每样本 O(log window))
+      - ema            指数滑动平均 (分段闭式解，每样本 O(1))
+      - boxcar         最近 n 个值的滑动平均 (前缀和，每样本 O(1))
+      - deadband       死区: 变化超过 band 才更新输出 (每样本 O(1)，标量循环)
+      - spike_reject   尖峰剔除: 偏离前 window 个样本中值超过 threshold 的样本
+                       用该中值替换
+      - clip / zero_clamp  限幅 / 小于阈值归零
+    归约算子之前的算子按 500 Hz 样本运行，之后的算子按读取块运行。
+
+    配置 (台架配置 "filters" 键) 为预设名或算子列表:
+      "standard"
+      [{"op": "spike_reject", "threshold": 0.2}, {"op": "ema", "alpha": 0.05}, "zero_clamp"]
+
+    命令行:
+      python pressure_filters.py show [preset]
+      python pressure_filters.py bench [--block 25]      # 每 1000 样本耗时
+==============================================================================
+"""
+
+import sys
+import copy
+import math
+import time
+import argparse
+from bisect import bisect_left, insort
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# ============================================================================
+# [SECTION 1] 算子 (Operators)
+# ============================================================================
+
+
+class FilterOp:
+    """流式算子基类: process(x) 输入一维数组，输出等长数组"""
+
+    name = ""
+    reduces = False
+
+    def params(self):
+        return {}
+
+    def process(self, x):
+        raise NotImplementedError
+
+    def describe(self):
+        args = ", ".join(f"{k}={v:g}" if isinstance(v, float) else f"{k}={v}"
+                         for k, v in self.params().items())
+        return f"{self.name}({args})" if args else self.name
+
+
+def _check_range(name, value, lo, hi=None):
+    if value < lo or (hi is not None and value > hi):
+        rng = f"[{lo}, {hi}]" if hi is not None else f">= {lo}"
+        raise ValueError(f"滤波参数 {name} 超出有效范围 {rng}: {value}")
+    return value
+
+
+class BlockMedian(FilterOp):
+    """块中值: 每个读取块归约为一个值；少于 3 个样本的块取首样本 (或均值)"""
+
+    name = "block_median"
+    reduces = True
+
+    def __init__(self, small_block_mean=False):
+        self.small_block_mean = bool(small_block_mean)
+
+    def params(self):
+        return {"small_block_mean": True} if self.small_block_mean else {}
+
+    def reduce(self, blocks):
+        n = blocks.shape[1]
+        if n >= 3:
+            # partition 求中值 (np.median 对小块的固定开销较大)
+            k = n // 2
+            if n % 2:
+                return np.partition(blocks, k, axis=1)[:, k]
+            p2 = np.partition(blocks, (k - 1, k), axis=1)
+            return (p2[:, k - 1] + p2[:, k]) * 0.5
+        if self.small_block_mean:
+            return blocks.mean(axis=1)
+        return blocks[:, 0].copy()
+
+
+class Clip(FilterOp):
+    name = "clip"
+
+    def __init__(self, lo=0.0, hi=None):
+        self.lo = None if lo is None else float(lo)
+        self.hi = None if hi is None else float(hi)
+
+    def params(self):
+        return {k: v for k, v in (("lo", self.lo), ("hi", self.hi)) if v is not None}
+
+    def process(self, x):
+        if self.lo is None and self.hi is None:
+            return x.copy()
+        return np.clip(x, self.lo, self.hi)
+
+
+class ZeroClamp(FilterOp):
+    """小于 below 的值归零 (传感器零点附近的噪声)"""
+
+    name = "zero_clamp"
+
+    def __init__(self, below=0.015):
+        self.below = _check_range("below", float(below), 0.0)
+
+    def params(self):
+        return {"below": self.below}
+
+    def process(self, x):
+        y = x.copy()
+        y[y < self.below] = 0.0
+        return y
+
+
+class Boxcar(FilterOp):
+    """最近 n 个值的滑动平均；启动阶段对已有的值求平均"""
+
+    name = "boxcar"
+
+    def __init__(self, n=4):
+        self.n = int(_check_range("n", int(n), 1))
+        self._tail = []
+
+    def params(self):
+        return {"n": self.n}
+
+    def process(self, x):
+        tail = self._tail
+        keep = self.n - 1
+        if len(x) == 1:
+            # 块速率 (归约之后) 每次只有一个值: 标量计算
+            v = float(x[0])
+            out = np.array([(sum(tail) + v) / (len(tail) + 1)])
+            if keep:
+                tail.append(v)
+                del tail[:-keep]
+            return out
+        seq = np.concatenate([tail, x]) if tail else x
+        csum = np.concatenate([[0.0], np.cumsum(seq)])
+        end = np.arange(len(tail) + 1, len(seq) + 1)
+        start = np.maximum(end - self.n, 0)
+        out = (csum[end] - csum[start]) / (end - start)
+        self._tail = seq[max(0, len(seq) - keep):].tolist() if keep else []
+        return out
+
+
+class Ema(FilterOp):
+    """指数滑动平均 y += alpha * (x - y)，首个样本直接作为初值
+
+    按段用闭式解 y_t = d^t * (y_0 + alpha * Σ x_s * d^-s) 向量化 (d = 1 - alpha)，
+    段长保证 d^-t 不溢出。
+    """
+
+    name = "ema"
+    MAX_CHUNK = 4096
+
+    def __init__(self, alpha=0.1):
+        self.alpha = _check_range("alpha", float(alpha), 1e-6, 1.0)
+        d = 1.0 - self.alpha
+        chunk = self.MAX_CHUNK if d <= 0.0 else min(self.MAX_CHUNK, int(500.0 / -math.log(d)))
+        self._pw = d ** np.arange(1, max(1, chunk) + 1)
+        self._y = None
+
+    def params(self):
+        return {"alpha": self.alpha}
+
+    def process(self, x):
+        n = len(x)
+        if n == 0:
+            return x.copy()
+        if self.alpha >= 1.0:
+            self._y = float(x[-1])
+            return x.copy()
+        y = float(x[0]) if self._y is None else self._y
+        out = np.empty(n)
+        a = self.alpha
+        chunk = len(self._pw)
+        for i in range(0, n, chunk):
+            seg = x[i:i + chunk]
+            pw = self._pw[:len(seg)]
+            out[i:i + len(seg)] = pw * (y + a * np.cumsum(seg / pw))
+            y = float(out[i + len(seg) - 1])
+        self._y = y
+        return out
+
+
+class Deadband(FilterOp):
+    """死区: 输入偏离当前输出超过 band 时才更新输出
+
+    输出依赖前一个输出，无法向量化；逐样本标量循环，开销与变化频度无关。
+    """
+
+    name = "deadband"
+
+    def __init__(self, band=0.01):
+        self.band = _check_range("band", float(band), 0.0)
+        self._held = None
+
+    def params(self):
+        return {"band": self.band}
+
+    def process(self, x):
+        if len(x) == 0:
+            return np.empty(0)
+        vals = x.tolist()
+        h = vals[0] if self._held is None else self._held
+        band = self.band
+        for i, v in enumerate(vals):
+            if abs(v - h) > band:
+                h = v
+            vals[i] = h
+        self._held = h
+        return np.array(vals)
+
+
+def _window_median(seq, w):
+    """seq 中每个长度 w 的窗口的中值"""
+    win = sliding_window_view(seq, w)
+    k = w // 2
+    if w % 2:
+        return np.partition(win, k, axis=1)[:, k]
+    p2 = np.partition(win, (k - 1, k), axis=1)
+    return (p2[:, k - 1] + p2[:, k]) * 0.5
+
+
+class RunningMedian(FilterOp):
+    """最近 window 个样本 (含当前样本) 的滑动中值
+
+    增量维护窗口的有序副本: 每个样本二分查找插入新值、删除移出窗口的旧值
+    (O(log window) 比较，插入/删除的指针移动在 C 层)，取中间元素，不再对
+    每个窗口重新排序。启动阶段样本不足一个窗口时对已有样本求中值。
+    """
+
+    name = "running_median"
+
+    def __init__(self, window=25):
+        self.window = int(_check_range("window", int(window), 1))
+        self._window = deque()      # 按到达顺序的窗口样本
+        self._sorted = []           # 同一批样本的有序副本
+
+    def params(self):
+        return {"window": self.window}
+
+    def process(self, x):
+        w = self.window
+        win, srt = self._window, self._sorted
+        vals = x.tolist()
+        for i, v in enumerate(vals):
+            win.append(v)
+            insort(srt, v)
+            if len(win) > w:
+                del srt[bisect_left(srt, win.popleft())]
+            n = len(srt)
+            k = n // 2
+            vals[i] = srt[k] if n % 2 else (srt[k - 1] + srt[k]) * 0.5
+        return np.array(vals, dtype=np.float64)
+
+
+class SpikeReject(FilterOp):
+    """尖峰剔除: 与前 window 个原始样本中值的偏差超过 threshold 时替换为该中值
+
+    参考中值只用过去的原始样本 (因果，无延迟)；真实的阶跃在约 window/2 个
+    样本后被中值跟上，不会被持续剔除。
+    """
+
+    name = "spike_reject"
+
+    def __init__(self, window=5, threshold=0.2):
+        self.window = int(_check_range("window", int(window), 1))
+        self.threshold = _check_range("threshold", float(threshold), 0.0)
+        self._tail = np.zeros(0)
+
+    def params(self):
+        return {"window": self.window, "threshold": self.threshold}
+
+    def process(self, x):
+        w = self.window
+        tail = self._tail
+        seq = np.concatenate([tail, x]) if len(tail) else x
+        out = x.copy()
+        # 第 i 个样本的参考窗口为 seq[i - w, i)；历史不足 w 个样本的位置直接通过
+        first = max(0, w - len(tail))
+        if len(x) > first:
+            start = len(tail) + first - w
+            med = _window_median(seq[start:len(seq) - 1], w)
+            cur = x[first:]
+            bad = np.abs(cur - med) > self.threshold
+            out[first:][bad] = med[bad]
+        self._tail = seq[-w:].copy()
+        return out
+
+
+OPS = {cls.name: cls for cls in (BlockMedian, Clip, ZeroClamp, Boxcar, Ema, Deadband,
+                                 RunningMedian, SpikeReject)}
+
+# ============================================================================
+# [SECTION 2] 管线与预设 (Pipeline & Presets)
+# ============================================================================
+
+# standard 与原有滤波完全一致: 块中值 -> 负值截断 -> 最近 4 块平均 -> 零点归零
+FILTER_PRESETS = {
+    "standard": ["block_median", {"op": "clip", "lo": 0.0}, {"op": "boxcar", "n": 4},
+                 {"op": "zero_clamp", "below": 0.015}],
+    "smooth": [{"op": "spike_reject", "window": 5, "threshold": 0.2},
+               {"op": "running_median", "window": 25}, {"op": "ema", "alpha": 0.02},
+               {"op": "clip", "lo": 0.0}, {"op": "zero_clamp", "below": 0.015}],
+    "fast": [{"op": "spike_reject", "window": 5, "threshold": 0.2},
+             {"op": "boxcar", "n": 25}, {"op": "clip", "lo": 0.0},
+             {"op": "zero_clamp", "below": 0.015}],
+}
+FILTER_PRESET_LABELS = {"standard": "标准", "smooth": "强滤波", "fast": "快速响应"}
+DEFAULT_FILTER = "standard"
+
+
+class FilterPipeline:
+    """按顺序执行的算子链；每个读取块输出一个滤波值"""
+
+    def __init__(self, ops, name=""):
+        self.ops = list(ops)
+        self.name = name
+
+    def describe(self):
+        chain = " -> ".join(op.describe() for op in self.ops)
+        return f"{self.name}: {chain}" if self.name else chain
+
+    def process(self, p):
+        """处理一个读取块 (压力样本)，返回块末的滤波值"""
+        return float(self.process_blocks(p.reshape(1, -1))[-1])
+
+    def process_blocks(self, blocks, stop_above=None):
+        """blocks 为 (块数, 每块样本数)，返回每块之后的滤波值，等价于逐块 process()
+
+        给定 stop_above 时在第一个滤波值超过它的块之前停下: 只有此前的块
+        改变状态，返回值也只包含这些块。
+        """
+        saved = copy.deepcopy(self.ops) if stop_above is not None else None
+        out = self._run(blocks)
+        if stop_above is not None:
+            over = np.flatnonzero(out > stop_above)
+            if len(over):
+                k = int(over[0])
+                self.ops = saved
+                if k == 0:
+                    return out[:0]
+                out = self._run(blocks[:k])
+        return out
+
+    def _run(self, blocks):
+        m, n = blocks.shape
+        y = blocks
+        for op in self.ops:
+            if op.reduces:
+                y = op.reduce(y)
+            elif y.ndim == 2:
+                y = op.process(y.ravel()).reshape(m, n)
+            else:
+                y = op.process(y)
+        if y.ndim == 2:
+            y = y[:, -1]
+        return y
+
+
+def build_pipeline(spec=None):
+    """由预设名或算子列表创建新的管线 (算子有状态，每个读取方各用一个)"""
+    if spec is None:
+        spec = DEFAULT_FILTER
+    name = ""
+    if isinstance(spec, str):
+        if spec not in FILTER_PRESETS:
+            raise ValueError(f"未知的滤波预设: {spec} (可选: {', '.join(FILTER_PRESETS)})")
+        name, spec = spec, FILTER_PRESETS[spec]
+    if not isinstance(spec, (list, tuple)) or not spec:
+        raise ValueError("滤波配置必须是预设名或非空的算子列表")
+    ops = []
+    for item in spec:
+        if isinstance(item, str):
+            item = {"op": item}
+        if not isinstance(item, dict) or "op" not in item:
+            raise ValueError(f"无效的滤波算子: {item!r}")
+        kwargs = dict(item)
+        op_name = kwargs.pop("op")
+        cls = OPS.get(op_name)
+        if cls is None:
+            raise ValueError(f"未知的滤波算子: {op_name} (可选: {', '.join(OPS)})")
+        try:
+            ops.append(cls(**kwargs))
+        except TypeError as e:
+            raise ValueError(f"滤波算子 {op_name} 参数错误: {e}")
+    if sum(op.reduces for op in ops) > 1:
+        raise ValueError("滤波管线中最多只能有一个归约算子 (block_median)")
+    return FilterPipeline(ops, name)
+
+
+# ============================================================================
+# [SECTION 3] 基准测试与命令行 (Benchmark & CLI)
+# ============================================================================
+
+def _bench(make, blocks, repeat, batch=False):
+    best = float("inf")
+    for _ in range(repeat):
+        pipe = make()
+        t0 = time.perf_counter()
+        if batch:
+            pipe.process_blocks(blocks)
+        else:
+            for b in blocks:
+                pipe.process(b)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_benchmark(block=25, seconds=20.0, rate=500, repeat=3, out=sys.stdout):
+    """输出每个算子与每个预设处理 1000 个样本的耗时 (µs)
+
+    逐块: 每次 process() 一个读取块 (含每次调用的固定开销)；
+    批量: process_blocks() 一次处理全部块 (极速仿真的路径)。
+    """
+    rng = np.random.default_rng(0)
+    n = int(seconds * rate)
+    t = np.arange(n) / rate
+    p = 1.0 + np.sin(t) + rng.normal(0.0, 0.02, n)
+    p[rng.integers(0, n, n // 500)] += 1.0       # 偶发尖峰
+    n_blocks = n // block
+    blocks = p[:n_blocks * block].reshape(n_blocks, block)
+    per_k = 1000.0 / (n_blocks * block) * 1e6
+
+    print(f"{n_blocks * block} 个样本, 每块 {block} 个 (取 {repeat} 次最优), "
+          f"单位: µs / 1000 样本", file=out)
+    print(f"{'算子 / 预设':<28}{'逐块':>10}{'批量':>10}", file=out)
+    rows = [(name, lambda name=name: build_pipeline([name])) for name in OPS]
+    rows += [(f"[{name}]", lambda name=name: build_pipeline(name)) for name in FILTER_PRESETS]
+    for label, make in rows:
+        per_block = _bench(make, blocks, repeat) * per_k
+        batch = _bench(make, blocks, repeat, batch=True) * per_k
+        print(f"{label:<30}{per_block:>10.1f}{batch:>10.1f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="压力滤波管线: 查看预设与基准测试")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_show = sub.add_parser("show", help="显示预设的算子链")
+    p_show.add_argument("preset", nargs="?", help="预设名 (缺省显示全部)")
+    p_bench = sub.add_parser("bench", help="每 1000 样本的处理耗时")
+    p_bench.add_argument("--block", type=int, default=25, help="每次读取的样本数 (缺省 25)")
+    p_bench.add_argument("--seconds", type=float, default=20.0, help="测试数据时长 (s)")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "show":
+        names = [args.preset] if args.preset else list(FILTER_PRESETS)
+        try:
+            for name in names:
+                print(build_pipeline(name).describe())
+        except ValueError as e:
+            print(f"错误: {e}", file=sys.stderr)
+            return 2
+        return 0
+    run_benchmark(block=max(1, args.block), seconds=args.seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,588 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : pressure_sim.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    基于物理模型的向量化压力仿真 (替代硬件 AI/DO)。
+
+    模型 (每个台架一个等温容器，压力为表压 bar):
+      dp/dt = Patm / V * (Q_comp(p) - Σ C_i * g(p))
+      - 压缩机 (V1 打开且压缩机运行时充气): Q_comp = Q0 * (1 - p / p_stall)
+      - 孔口流量 (V2/V3 排气、V1 单独打开时经压缩机回流、容器微漏):
+        p >= P_CRIT 时为阻塞流 g(p) = p + Patm；低于 P_CRIT 时按亚音速区
+        线性化 g(p) = K_SUB * p，两段在 P_CRIT 处连续。
+      每一段都是线性常微分方程，在 DO 状态不变时有精确的指数解，且轨迹
+      单调、最多跨越 P_CRIT 一次，因此任意时长/任意采样点都可以一次向量
+      化求值 (不需要逐步积分，不存在步长稳定性问题)。
+    传感器: 0-10 V 输出 (p = (v - 1) * 2.5)，叠加高斯电压噪声。
+
+    1. PressureSimulator: N 个台架的模型参数与状态 (NumPy 数组)，固定随机
+       种子，台架之间参数有小幅随机差异。
+    2. SimulatedAcquisitionService: 实时仿真 (1x)，一个后台线程以 500 Hz
+       同时推进所有仿真台架，样本经与硬件相同的订阅/PressureReader 路径读取。
+    3. VirtualSimChannel: 虚拟时钟 (加速/极速) 下每个测试引擎独立的仿真
+       通道，按引擎自己的虚拟时间按需生成样本。
+    4. SimWatchdog: 与硬件 DO 看门狗接口相同的软件看门狗，超时后把仿真
+       台架置于故障安全状态，用于无硬件时验证看门狗流程。
+==============================================================================
+"""
+
+import sys
+import math
+import time
+import zlib
+import argparse
+import threading
+import logging
+
+import numpy as np
+
+from daq_io import (ChannelSubscription, ChannelTap, AI_SAMPLE_RATE, AI_READ_INTERVAL,
+                    SUBSCRIPTION_CAPACITY, DO_WATCHDOG_PET_INTERVAL, fail_safe_states)
+
+log = logging.getLogger(__name__)
+
+# ============================================================================
+# [SECTION 1] 模型参数 (Model Parameters)
+# ============================================================================
+
+P_ATM = 1.01325                         # 大气压 (bar)
+CRITICAL_RATIO = 0.528                  # 空气临界压比
+P_CRIT = P_ATM / CRITICAL_RATIO - P_ATM # 阻塞流起始表压 (约 0.906 bar)
+K_SUB = (P_CRIT + P_ATM) / P_CRIT       # 亚音速区线性化系数 (与阻塞流在 P_CRIT 处连续)
+
+SIM_VESSEL_L = 4.0          # 容器容积 (L)
+SIM_COMP_FLOW = 1.2         # 压缩机零压流量 (NL/s)
+SIM_COMP_STALL = 6.0        # 压缩机憋压压力 (bar)
+SIM_VENT_C = 0.5            # V2/V3 排气阀流导 (NL/s/bar)
+SIM_BACKFLOW_C = 0.24       # V1 打开、压缩机停机时经压缩机回流的流导
+SIM_LEAK_C = 0.002          # 容器微漏流导
+SIM_NOISE_V = 0.004         # 传感器电压噪声 (V, 1σ)
+SIM_PARAM_SPREAD = 0.03     # 台架之间参数的随机差异 (±3%)
+SIM_SEED = 20251217
+
+
+def bar_to_volts(p):
+    """压力 (Bar) -> 传感器电压，daq_io.volts_to_bar 的逆变换"""
+    return p * 0.4 + 1.0
+
+
+# ============================================================================
+# [SECTION 2] 向量化模型 (Vectorized Model)
+# ============================================================================
+
+class PressureSimulator:
+    """N 个仿真台架: 参数、压力状态与 DO 状态均为数组，一次推进全部台架"""
+
+    def __init__(self, n_stations=0, rate=AI_SAMPLE_RATE, seed=SIM_SEED,
+                 spread=SIM_PARAM_SPREAD, noise_v=SIM_NOISE_V):
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.spread = spread
+        self.noise_v = noise_v
+        self._rng = np.random.default_rng(seed)
+        self.n = 0
+        self.k = np.zeros(0)            # Patm / V
+        self.q0 = np.zeros(0)
+        self.c_vent = np.zeros((2, 0))  # V2, V3
+        self.c_back = np.zeros(0)
+        self.c_leak = np.zeros(0)
+        self.p = np.zeros(0)
+        self.do = np.zeros((0, 8), dtype=bool)
+        self._coef = np.zeros((4, 0))   # a_choked, b_choked, a_sub, b_sub
+        self.add_stations(n_stations)
+
+    def _vary(self, value, n):
+        return value * (1.0 + self.spread * self._rng.uniform(-1.0, 1.0, n))
+
+    def add_stations(self, n):
+        """追加 n 个台架 (参数按种子随机生成)，返回第一个新台架的序号"""
+        first = self.n
+        if n <= 0:
+            return first
+        self.k = np.concatenate([self.k, P_ATM / self._vary(SIM_VESSEL_L, n)])
+        self.q0 = np.concatenate([self.q0, self._vary(SIM_COMP_FLOW, n)])
+        self.c_vent = np.concatenate(
+            [self.c_vent, np.vstack([self._vary(SIM_VENT_C, n), self._vary(SIM_VENT_C, n)])],
+            axis=1)
+        self.c_back = np.concatenate([self.c_back, self._vary(SIM_BACKFLOW_C, n)])
+        self.c_leak = np.concatenate([self.c_leak, self._vary(SIM_LEAK_C, n)])
+        self.p = np.concatenate([self.p, np.zeros(n)])
+        self.do = np.concatenate([self.do, np.zeros((n, 8), dtype=bool)])
+        self._coef = np.concatenate([self._coef, np.zeros((4, n))], axis=1)
+        self.n += n
+        self._update_coef(slice(first, self.n))
+        return first
+
+    def set_do(self, i, states):
+        self.do[i] = states[:8]
+        # 单个台架用标量计算，避免小数组的 NumPy 调用开销 (脉冲阶段每秒切换多次)
+        d = [1.0 if x else 0.0 for x in states[:4]]
+        self._coef[:, i] = self._coefficients(
+            d, self.k[i], self.q0[i], self.c_vent[0, i], self.c_vent[1, i],
+            self.c_back[i], self.c_leak[i])
+
+    def reset(self, i, p=0.0):
+        self.p[i] = p
+
+    def _update_coef(self, sel):
+        d = self.do[sel, :4].T.astype(np.float64)
+        self._coef[:, sel] = self._coefficients(
+            d, self.k[sel], self.q0[sel], self.c_vent[0, sel], self.c_vent[1, sel],
+            self.c_back[sel], self.c_leak[sel])
+
+    @staticmethod
+    def _coefficients(d, k, q0, c_v2, c_v3, c_back, c_leak):
+        """DO 状态 d[0..3] (0/1) -> dp/dt = a - b*p 两段的系数 (a_c, b_c, a_s, b_s)
+
+        标量与数组 (每个台架一列) 通用。
+        """
+        q = q0 * d[0] * d[3]                                    # V1 + 压缩机: 充气
+        c_out = (c_v2 * d[1] + c_v3 * d[2]                      # V2/V3 排气
+                 + c_back * d[0] * (1.0 - d[3]) + c_leak)       # V1 单独打开: 回流
+        return (k * (q - c_out * P_ATM), k * (q / SIM_COMP_STALL + c_out),
+                k * q, k * (q / SIM_COMP_STALL + c_out * K_SUB))
+
+    def solve(self, t, sel=slice(None)):
+        """当前状态下 (DO 不变) 相对时间 t 处的压力，返回 (台架数, len(t))，不修改状态"""
+        if self.n == 1:
+            return self._solve_one(np.asarray(t, dtype=np.float64))[None, :]
+        t = np.asarray(t, dtype=np.float64)[None, :]
+        p0 = self.p[sel][:, None]
+        a_c, b_c, a_s, b_s = (c[sel][:, None] for c in self._coef)
+        choked = p0 >= P_CRIT
+        a1 = np.where(choked, a_c, a_s)
+        b1 = np.where(choked, b_c, b_s)
+        pinf1 = a1 / b1
+        p = pinf1 + (p0 - pinf1) * np.exp(-b1 * t)
+
+        # 轨迹单调，终值落在 P_CRIT 另一侧时恰好跨越一次，之后换用另一段的解
+        cross = np.where(choked, pinf1 < P_CRIT, pinf1 > P_CRIT)
+        if cross.any():
+            a2 = np.where(choked, a_s, a_c)
+            b2 = np.where(choked, b_s, b_c)
+            pinf2 = a2 / b2
+            with np.errstate(divide="ignore", invalid="ignore"):
+                tc = np.log((p0 - pinf1) / (P_CRIT - pinf1)) / b1
+            tc = np.where(cross, tc, np.inf)
+            after = t > tc
+            if after.any():
+                p2 = pinf2 + (P_CRIT - pinf2) * np.exp(-b2 * np.maximum(t - tc, 0.0))
+                p = np.where(after, p2, p)
+        return np.maximum(p, 0.0)
+
+    def _solve_one(self, t):
+        """solve() 的单台架标量版本 (VirtualSimChannel 每次只有一个台架)"""
+        p0 = float(self.p[0])
+        a_c, b_c, a_s, b_s = self._coef[:, 0].tolist()
+        choked = p0 >= P_CRIT
+        a1, b1, a2, b2 = (a_c, b_c, a_s, b_s) if choked else (a_s, b_s, a_c, b_c)
+        pinf1 = a1 / b1
+        p = pinf1 + (p0 - pinf1) * np.exp(-b1 * t)
+        if (pinf1 < P_CRIT) if choked else (pinf1 > P_CRIT):
+            tc = math.log((p0 - pinf1) / (P_CRIT - pinf1)) / b1
+            after = t > tc
+            if after.any():
+                pinf2 = a2 / b2
+                p[after] = pinf2 + (P_CRIT - pinf2) * np.exp(-b2 * (t[after] - tc))
+        return np.maximum(p, 0.0, out=p)
+
+    def advance(self, n_samples, sel=slice(None)):
+        """推进 n_samples 个采样周期，返回每个采样点的压力 (台架数, n_samples)"""
+        p = self.solve(self.dt * np.arange(1, n_samples + 1), sel)
+        self.p[sel] = p[:, -1]
+        return p
+
+    def sensor_volts(self, p):
+        """压力 -> 带噪声的传感器电压"""
+        v = bar_to_volts(p)
+        if self.noise_v:
+            v = v + self._rng.normal(0.0, self.noise_v, v.shape)
+        return v
+
+
+# ============================================================================
+# [SECTION 3] 实时仿真采集 (Shared Simulated Acquisition, 1x)
+# ============================================================================
+
+class SimWatchdog:
+    """仿真 DO 看门狗: 接口与 WatchdogLease 相同，按真实时间计时 (防护的是主机停顿)
+
+    超时后调用 on_expire() 把台架置于故障安全状态，并保持到 clear()；
+    期间的 DO 写入由仿真强制为故障安全状态 (对应硬件上写入被拒绝)。
+    """
+
+    def __init__(self, timeout, on_expire, on_close, pet_interval=DO_WATCHDOG_PET_INTERVAL):
+        self.timeout = timeout
+        self.pet_interval = pet_interval
+        self._on_expire = on_expire
+        self._on_close = on_close
+        self._last_pet = time.monotonic()
+        self.expired = False
+        self.closed = False
+
+    def check(self, now=None):
+        """超时则进入超时状态，返回是否处于超时状态"""
+        if now is None:
+            now = time.monotonic()
+        if not self.expired and now - self._last_pet > self.timeout:
+            self.expired = True
+            self._on_expire()
+        return self.expired
+
+    def pet(self):
+        now = time.monotonic()
+        if now - self._last_pet < self.pet_interval:
+            return self.expired
+        if self.check(now):
+            return True
+        self._last_pet = now
+        return False
+
+    def clear(self):
+        self.expired = False
+        self._last_pet = time.monotonic()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._on_close(self)
+
+
+class SimStation:
+    """共享仿真中的一个台架: subscription 供 PressureReader 读取，set_do() 驱动模型"""
+
+    def __init__(self, service, slot):
+        self.service = service
+        self.slot = slot
+        self.subscription = ChannelSubscription(service, slot)
+        self.closed = False
+
+    def set_do(self, states):
+        self.service.set_do(self.slot, states)
+
+    def tap(self, callback):
+        """在推进线程上监听本台架的每个数据块"""
+        return self.service.tap(self.slot, callback)
+
+    def sync(self):
+        pass
+
+    def arm_watchdog(self, timeout):
+        return self.service.arm_watchdog(self.slot, timeout)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.subscription.close()
+
+
+class SimulatedAcquisitionService:
+    """所有实时仿真台架共用一个模型和一个 500 Hz 推进线程 (惰性启动的单例)"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, seed=SIM_SEED):
+        self.sim = PressureSimulator(0, seed=seed)
+        self._lock = threading.Lock()
+        self._subs = {}             # slot -> ChannelSubscription
+        self._taps = []             # ChannelTap (channel 为槽位号)
+        self._watchdogs = {}        # slot -> SimWatchdog
+        self._free = []
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.steps = 0
+        self.step_cost_ms = 0.0
+
+    @classmethod
+    def attach(cls):
+        """分配一个仿真台架 (复用已释放的槽位)，首个台架负责启动推进线程"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            svc = cls._instance
+            with svc._lock:
+                if svc._free:
+                    slot = svc._free.pop()
+                    svc.sim.reset(slot)
+                    svc.sim.set_do(slot, [False] * 8)
+                else:
+                    slot = svc.sim.add_stations(1)
+                st = SimStation(svc, slot)
+                svc._subs[slot] = st.subscription
+                if svc._thread is None:
+                    svc._stop_event.clear()
+                    svc._thread = threading.Thread(
+                        target=svc._run, name="SimAcquisition", daemon=True)
+                    svc._thread.start()
+            return st
+
+    def set_do(self, slot, states):
+        with self._lock:
+            wd = self._watchdogs.get(slot)
+            if wd is not None and wd.expired:
+                states = fail_safe_states(states)
+            self.sim.set_do(slot, states)
+
+    def arm_watchdog(self, slot, timeout):
+        """由推进线程每个周期检查超时"""
+        wd = SimWatchdog(timeout, lambda: self._expire_watchdog(slot), self._release_watchdog)
+        with self._lock:
+            self._watchdogs[slot] = wd
+        return wd
+
+    def _expire_watchdog(self, slot):
+        with self._lock:
+            self.sim.set_do(slot, fail_safe_states(self.sim.do[slot]))
+
+    def _release_watchdog(self, wd):
+        with self._lock:
+            for slot, w in list(self._watchdogs.items()):
+                if w is wd:
+                    del self._watchdogs[slot]
+
+    def tap(self, slot, callback):
+        tap = ChannelTap(self, slot, callback)
+        with self._lock:
+            self._taps.append(tap)
+        return tap
+
+    def unsubscribe(self, sub):
+        if isinstance(sub, ChannelTap):
+            with self._lock:
+                if sub in self._taps:
+                    self._taps.remove(sub)
+            return
+        with SimulatedAcquisitionService._instance_lock:
+            with self._lock:
+                if self._subs.pop(sub.channel, None) is None:
+                    return
+                self._free.append(sub.channel)
+                self.sim.set_do(sub.channel, [False] * 8)
+                idle = not self._subs
+            if idle:
+                self._stop_event.set()
+                thread, self._thread = self._thread, None
+                if thread is not None and thread is not threading.current_thread():
+                    thread.join(timeout=2.0)
+
+    def _run(self):
+        produced = 0
+        t0 = time.monotonic()
+        while not self._stop_event.wait(AI_READ_INTERVAL):
+            due = int((time.monotonic() - t0) * self.sim.rate) - produced
+            if due <= 0:
+                continue
+            c0 = time.perf_counter()
+            with self._lock:
+                watchdogs = list(self._watchdogs.values())
+            now = time.monotonic()
+            for wd in watchdogs:
+                wd.check(now)
+            with self._lock:
+                volts = self.sim.sensor_volts(self.sim.advance(due))
+                subs = list(self._subs.items())
+                taps = list(self._taps)
+            # 回调在锁外执行: 监听方可以在回调内直接 set_do()
+            for tap in taps:
+                tap._push(volts[tap.channel])
+            for slot, sub in subs:
+                sub._push(volts[slot])
+            produced += due
+            self.steps += 1
+            self.step_cost_ms = (time.perf_counter() - c0) * 1000.0
+
+
+# ============================================================================
+# [SECTION 4] 虚拟时钟下的独立仿真通道 (Per-engine Channel, Virtual Clock)
+# ============================================================================
+
+class VirtualSimChannel:
+    """按测试引擎的虚拟时钟按需生成样本；接口与 ChannelSubscription 兼容"""
+
+    def __init__(self, clock, seed=SIM_SEED, rate=AI_SAMPLE_RATE,
+                 capacity=SUBSCRIPTION_CAPACITY):
+        self.clock = clock
+        self.capacity = capacity
+        self.sim = PressureSimulator(1, rate=rate, seed=seed)
+        self._t0 = clock.time()
+        self._produced = 0
+        self._pending = []      # 已生成、尚未被读取的样本块 (电压)
+        self._taps = []
+        self.watchdog = None
+        self.closed = False
+        self.reads = 0
+        self.samples_read = 0
+        self.max_per_read = 0
+        self.dropped = 0
+        self.overruns = 0
+        self.samples_lost = 0
+
+    @property
+    def subscription(self):
+        return self
+
+    def _due(self):
+        return int((self.clock.time() - self._t0) * self.sim.rate) - self._produced
+
+    def _generate(self, n):
+        self._produced += n
+        # 积压超过缓冲区时监听方 (安全监测/记录) 仍收到全部样本，读取方只保留
+        # 最新的 capacity 个 (与环形订阅缓冲区一致)，其余计入 dropped
+        out = None
+        while n > 0:
+            k = min(n, self.capacity)
+            volts = self.sim.sensor_volts(self.sim.advance(k)[0])
+            for tap in self._taps:
+                tap._push(volts)
+            if out is not None:
+                volts = np.concatenate((out, volts))
+                over = len(volts) - self.capacity
+                if over > 0:
+                    self.dropped += over
+                    volts = volts[over:]
+            out = volts
+            n -= k
+        return out
+
+    def tap(self, callback):
+        """监听生成的每个样本块 (在生成样本的线程内回调)"""
+        tap = ChannelTap(self, 0, callback)
+        self._taps.append(tap)
+        return tap
+
+    def unsubscribe(self, tap):
+        if tap in self._taps:
+            self._taps.remove(tap)
+
+    def sync(self):
+        """生成到当前虚拟时刻为止的样本 (监听方据此检查)"""
+        n = self._due()
+        if n > 0:
+            self._pending.append(self._generate(n))
+
+    def set_do(self, states):
+        # 先按旧状态生成到当前时刻为止的样本，保证 DO 切换发生在正确的虚拟时刻
+        self.sync()
+        if self.watchdog is not None and self.watchdog.expired:
+            states = fail_safe_states(states)
+        self.sim.set_do(0, states)
+
+    def arm_watchdog(self, timeout):
+        """虚拟时钟下没有独立的推进线程，超时在测试线程恢复后喂狗时被发现"""
+        self.watchdog = SimWatchdog(timeout, self._expire_watchdog, self._release_watchdog)
+        return self.watchdog
+
+    def _expire_watchdog(self):
+        self.sync()
+        self.sim.set_do(0, fail_safe_states(self.sim.do[0]))
+
+    def _release_watchdog(self, wd):
+        if self.watchdog is wd:
+            self.watchdog = None
+
+    def read_into(self, out):
+        """取出从上次读取到当前虚拟时间的全部样本 (电压)，返回样本数"""
+        self.sync()
+        if not self._pending:
+            return 0
+        data = self._pending[0] if len(self._pending) == 1 else np.concatenate(self._pending)
+        self._pending = []
+        if len(data) > len(out):
+            self.dropped += len(data) - len(out)
+            data = data[-len(out):]
+        n = len(data)
+        out[:n] = data
+        self.reads += 1
+        self.samples_read += n
+        if n > self.max_per_read:
+            self.max_per_read = n
+        return n
+
+    def health(self):
+        """与 ChannelSubscription.health() 相同的键 (虚拟时钟下不会溢出)"""
+        return {
+            "reads": self.reads,
+            "mean_per_read": self.samples_read / self.reads if self.reads else 0.0,
+            "max_per_read": self.max_per_read,
+            "max_backlog": self.max_per_read,
+            "capacity": self.capacity,
+            "dropped": self.dropped,
+            "overruns": self.overruns,
+            "lost": self.samples_lost,
+        }
+
+    def preview(self, n_samples):
+        """预先计算当前虚拟时刻之后 n_samples 个样本 (真实压力, 电压)，不推进状态
+
+        调用前应先用 read_into() 取走积压样本。
+        """
+        p = self.sim.solve(self.sim.dt * np.arange(1, n_samples + 1))[0]
+        return p, self.sim.sensor_volts(p)
+
+    def commit(self, n_samples, p_last, volts=None):
+        """确认 preview() 中的前 n_samples 个样本已被消费 (调用方随后推进时钟)
+
+        volts 为对应的电压样本，转交给监听方。
+        """
+        self.sim.p[0] = p_last
+        self._produced += n_samples
+        if volts is not None:
+            for tap in self._taps:
+                tap._push(volts[:n_samples])
+
+    def close(self):
+        self.closed = True
+
+
+def station_seed(base_seed, dev_name, group):
+    """同一台架 (设备名 + 组号) 在每次运行中得到相同的随机序列"""
+    return [int(base_seed), zlib.crc32(dev_name.encode("utf-8")), int(group)]
+
+
+# ============================================================================
+# [SECTION 5] 基准测试 (Benchmark)
+# ============================================================================
+
+def run_benchmark(stations=64, seconds=60.0, block_s=AI_READ_INTERVAL):
+    """以 500 Hz、每块 block_s 推进 stations 个台架 seconds 秒，返回实时倍数"""
+    sim = PressureSimulator(stations)
+    block = int(round(block_s * sim.rate))
+    n_blocks = int(seconds / block_s)
+    charge = [True, False, False, True, True, True, False, False]
+    vent = [False, True, True, False, True, True, False, False]
+    for i in range(stations):
+        sim.set_do(i, charge)
+    peak = np.zeros(stations)
+    t0 = time.perf_counter()
+    for b in range(n_blocks):
+        if b % 40 == 20:        # 每 2 s 切换一次充气/排气，模拟测试时序
+            for i in range(stations):
+                sim.set_do(i, vent)
+        elif b % 40 == 0:
+            for i in range(stations):
+                sim.set_do(i, charge)
+        volts = sim.sensor_volts(sim.advance(block))
+        np.maximum(peak, volts.max(axis=1), out=peak)
+    elapsed = time.perf_counter() - t0
+    factor = seconds / elapsed
+    print(f"{stations} 台架 x {seconds:.0f} s @ {sim.rate} Hz (块 {block} 样本): "
+          f"{elapsed:.2f} s, 实时倍数 {factor:.0f}x, "
+          f"单核占用约 {100.0 / factor:.2f}%")
+    return factor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="压力仿真模型基准测试")
+    parser.add_argument("--stations", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    args = parser.parse_args(argv)
+    run_benchmark(args.stations, args.seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
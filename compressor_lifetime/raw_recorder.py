@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : raw_recorder.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    全速率原始波形记录 (可选)。
+
+    每个台架把 AI 通道的每一个原始样本 (电压, float32) 追加写入一个分块
+    二进制文件，另有一个按 循环/阶段 建立的分块索引文件。写盘在后台线程
+    完成，采集/控制线程只做一次数组拷贝和入队，绝不阻塞。
+
+    文件格式 (小端):
+      Raw_*.bin   文件头 (FILE_HEADER, 256 字节) + 若干分块
+                  分块 = 块头 (CHUNK_HEADER) + n 个 float32 样本
+      Raw_*.idx   每个分块一条定长记录 (INDEX_DTYPE)，可直接 np.fromfile
+
+    first_sample 是分块首样本在采集数据流中的序号 (版本 2 起): 写盘积压丢弃
+    的块与 AI 溢出缺失的样本都计入序号，因此 first_sample / rate 即为相对
+    记录开始的时刻，缺口之后的时间轴不会前移。一个分块内的样本总是连续的。
+
+    数据量参考: 500 Hz 单通道约 2 KB/s，10 天约 1.7 GB。
+==============================================================================
+"""
+
+import os
+import time
+import queue
+import struct
+import threading
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# ============================================================================
+# [SECTION 1] 文件格式 (File Format)
+# ============================================================================
+
+FILE_MAGIC = b"CLRAW001"
+CHUNK_MAGIC = b"CHNK"
+FILE_HEADER = struct.Struct("<8sHdd32sH196x")   # magic, version, rate, start_time, device, channel
+CHUNK_HEADER = struct.Struct("<4sI16sQI")       # magic, cycle, phase, first_sample, n_samples
+FORMAT_VERSION = 2              # 2: first_sample 为数据流序号 (含丢块/溢出缺口)
+
+INDEX_DTYPE = np.dtype([
+    ("cycle", "<u4"), ("phase", "S16"), ("first_sample", "<u8"),
+    ("n_samples", "<u4"), ("offset", "<u8"),
+])
+
+CHUNK_MAX_SAMPLES = 50000       # 单块上限 (500 Hz 下 100 s)
+FLUSH_INTERVAL = 2.0            # 写盘缓冲最长停留时间 (s)
+QUEUE_MAX_BLOCKS = 20000        # 写盘线程积压上限，超过则丢块并计数
+
+
+def _encode_fixed(text, size):
+    """UTF-8 编码并截断到 size 字节以内，按字符边界截断 (不切开多字节字符)"""
+    return text.encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+# ============================================================================
+# [SECTION 2] 记录器 (Recorder)
+# ============================================================================
+
+class RawWaveformRecorder:
+    """单通道原始样本记录器: write_block()/mark() 只入队，后台线程负责写盘"""
+
+    def __init__(self, path, device, channel, rate):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".idx"
+        self.device = device
+        self.channel = channel
+        self.rate = rate
+        self.start_time = time.time()
+
+        self.samples_written = 0
+        self.chunks_written = 0
+        self.dropped_blocks = 0
+        self.samples_missing = 0        # 丢块与溢出造成的缺失样本 (不写盘，只推进序号)
+        self._next_sample = 0           # 下一个样本在数据流中的序号 (只在采集线程中更新)
+
+        self._queue = queue.Queue(maxsize=QUEUE_MAX_BLOCKS)
+        self._file = open(path, "wb")
+        self._index = open(self.index_path, "wb")
+        self._file.write(FILE_HEADER.pack(
+            FILE_MAGIC, FORMAT_VERSION, float(rate), self.start_time,
+            _encode_fixed(device, 32), channel))
+        self._file.flush()
+
+        self._cycle = 0
+        self._phase = b""
+        self._pending = []
+        self._pending_n = 0
+        self._pending_first = 0
+        self._thread = threading.Thread(
+            target=self._writer_loop, name=f"RawRec-{device}-ai{channel}", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def write_block(self, samples):
+        """入队一个样本块 (立即拷贝为 float32，可在采集线程中调用)"""
+        first = self._next_sample
+        self._next_sample += len(samples)
+        try:
+            self._queue.put_nowait(("data", first, np.array(samples, dtype=np.float32)))
+        except queue.Full:
+            self.dropped_blocks += 1
+            self.samples_missing += len(samples)
+
+    def mark_gap(self, lost):
+        """AI 溢出缺失约 lost 个样本: 之后的样本序号跳过缺口 (采集线程中调用)"""
+        self._next_sample += int(lost)
+        self.samples_missing += int(lost)
+
+    def mark(self, cycle, phase):
+        """切换 循环/阶段 标记: 当前分块结束，之后的样本归入新标记"""
+        try:
+            self._queue.put_nowait(("mark", int(cycle), str(phase)))
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=10.0)
+
+    # --- 写盘线程 ---
+
+    def _writer_loop(self):
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=FLUSH_INTERVAL)
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    break
+                if item and item[0] == "data":
+                    _, first, data = item
+                    # 与待写样本不连续 (中间有丢块或溢出缺口) 时另起一块
+                    if self._pending_n and first != self._pending_first + self._pending_n:
+                        self._write_chunk()
+                    if not self._pending_n:
+                        self._pending_first = first
+                    self._pending.append(data)
+                    self._pending_n += len(data)
+                    if self._pending_n >= CHUNK_MAX_SAMPLES:
+                        self._write_chunk()
+                elif item:
+                    self._write_chunk()
+                    self._cycle = item[1]
+                    self._phase = _encode_fixed(item[2], 16)
+
+                now = time.monotonic()
+                if now - last_flush >= FLUSH_INTERVAL:
+                    self._write_chunk()
+                    self._file.flush()
+                    self._index.flush()
+                    last_flush = now
+        except OSError as e:
+            log.warning("原始波形写入失败 (%s): %s", self.path, e)
+        finally:
+            try:
+                self._write_chunk()
+            except OSError as e:
+                log.warning("原始波形写入失败 (%s): %s", self.path, e)
+            self._file.close()
+            self._index.close()
+
+    def _write_chunk(self):
+        if not self._pending_n:
+            return
+        data = self._pending[0] if len(self._pending) == 1 else np.concatenate(self._pending)
+        offset = self._file.tell()
+        self._file.write(CHUNK_HEADER.pack(
+            CHUNK_MAGIC, self._cycle, self._phase, self._pending_first, len(data)))
+        self._file.write(data.tobytes())
+        rec = np.array([(self._cycle, self._phase, self._pending_first, len(data), offset)],
+                       dtype=INDEX_DTYPE)
+        self._index.write(rec.tobytes())
+        self.samples_written += len(data)
+        self.chunks_written += 1
+        self._pending = []
+        self._pending_n = 0
+
+
+# ============================================================================
+# [SECTION 3] 读取 (Reader)
+# ============================================================================
+
+class RawRecording:
+    """读取 Raw_*.bin: 文件头 + 分块索引，按 循环/阶段 取样本 (内存映射)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, rate, start_time, device, channel = FILE_HEADER.unpack(
+                f.read(FILE_HEADER.size))
+        if magic != FILE_MAGIC:
+            raise ValueError(f"不是原始波形文件: {path}")
+        self.version = version
+        self.rate = rate
+        self.start_time = start_time
+        self.device = device.rstrip(b"\0").decode("utf-8")
+        self.channel = channel
+        index_path = os.path.splitext(path)[0] + ".idx"
+        self.index = np.fromfile(index_path, dtype=INDEX_DTYPE)
+
+    def chunks(self, cycle=None, phase=None):
+        sel = self.index
+        if cycle is not None:
+            sel = sel[sel["cycle"] == cycle]
+        if phase is not None:
+            sel = sel[sel["phase"] == _encode_fixed(phase, 16)]
+        return sel
+
+    def samples(self, cycle=None, phase=None):
+        """返回 (t, volts): t 为相对记录开始的秒数 (缺口处时间不连续)"""
+        sel = self.chunks(cycle, phase)
+        if len(sel) == 0:
+            return np.zeros(0), np.zeros(0, dtype=np.float32)
+        mm = np.memmap(self.path, dtype=np.uint8, mode="r")
+        parts = []
+        times = []
+        for rec in sel:
+            start = int(rec["offset"]) + CHUNK_HEADER.size
+            n = int(rec["n_samples"])
+            parts.append(mm[start:start + 4 * n].view("<f4"))
+            times.append((int(rec["first_sample"]) + np.arange(n)) / self.rate)
+        return np.concatenate(times), np.concatenate(parts)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : safety_monitor.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    全速率超压安全监测。
+
+    测试流程里的 _check_safety() 只看到每 100 ms 一次的滤波值 (4 个块中值的
+    滑动平均)，持续几十毫秒的压力尖峰完全看不到。SafetyMonitor 作为 AI 通道
+    监听 (ChannelTap) 挂在采集线程上，每个数据块到达时对全部原始样本做
+    向量化检查:
+      1. 阈值: 连续 persist 个样本超过 max_p (滤除单点电磁干扰)
+      2. 升压速率: rise_window 个样本内的平均升压速率超过 max_rise (bar/s)
+    触发后在采集线程内直接回调 on_trip (测试引擎在其中把压缩机线关断并
+    打开报警)，不依赖测试线程是否正在等待；随后测试线程按故障流程暂停。
+    触发后保持锁存，直到 rearm()。
+
+    升压速率检查缺省关闭 (max_rise = 0): 阈值尚未在真实阀门切换瞬态上验证，
+    需要的台架在配置中显式设置 max_rise。
+==============================================================================
+"""
+
+import time
+import logging
+import threading
+
+import numpy as np
+
+from daq_io import AI_SAMPLE_RATE
+
+log = logging.getLogger(__name__)
+
+SAFETY_PERSIST_SAMPLES = 3      # 超限需持续的样本数 (500 Hz 下 6 ms)
+SAFETY_RISE_WINDOW = 25         # 升压速率计算窗口 (样本数，50 ms)
+SAFETY_MAX_RISE = 0.0           # 默认升压速率上限 (bar/s)，0 表示不检查 (缺省关闭)
+
+
+class SafetyTrip:
+    """一次安全触发的记录"""
+
+    __slots__ = ("kind", "value", "message", "wall_time", "detect_t", "latency_ms")
+
+    def __init__(self, kind, value, message):
+        self.kind = kind                    # "over" | "rise"
+        self.value = value
+        self.message = message
+        self.wall_time = time.time()
+        self.detect_t = time.perf_counter()
+        self.latency_ms = None              # 检测 -> DO 安全状态写入完成
+
+
+class SafetyMonitor:
+    """逐块检查原始 AI 样本 (电压)，超限或升压过快时调用 on_trip(trip)"""
+
+    def __init__(self, max_p, max_rise=SAFETY_MAX_RISE, on_trip=None, rate=AI_SAMPLE_RATE,
+                 persist=SAFETY_PERSIST_SAMPLES, rise_window=SAFETY_RISE_WINDOW):
+        self.max_p = float(max_p)
+        self.max_rise = float(max_rise or 0.0)
+        self.on_trip = on_trip
+        self.rate = rate
+        self.persist = max(1, int(persist))
+        self.rise_window = max(1, int(rise_window))
+        # 判断在电压域进行 (传感器线性 1-5 V 对应 0-10 bar)，避免逐块换算
+        self._v_max = self.max_p / 2.5 + 1.0
+        self._dv_rise = self.max_rise / 2.5 * self.rise_window / self.rate
+        self._tail = np.zeros(0)            # 上一块末尾的样本 (跨块判断持续超限与升压速率)
+        self._tail_lo = np.inf              # 尾部样本最小值的下界
+        self._tail_len = max(self.persist - 1, self.rise_window)
+        # _tail/_tail_lo 由采集线程 feed() 更新、测试线程 rearm() 清空
+        self._lock = threading.Lock()
+        self.tripped = False
+        self.trips = []
+        self.samples_checked = 0
+        self.blocks_checked = 0
+
+    def first_violation(self, volts):
+        """只检查不改变状态: 返回 (块内样本序号, kind, value)，没有违规时返回 None"""
+        v = np.asarray(volts, dtype=np.float64)
+        with self._lock:
+            return self._scan(v, v.min())
+
+    def feed(self, volts):
+        """ChannelTap 回调: 检查一个数据块 (电压)"""
+        if len(volts) == 0:
+            return
+        v = np.asarray(volts, dtype=np.float64)
+        with self._lock:
+            if self.tripped:
+                return
+            self.samples_checked += len(v)
+            self.blocks_checked += 1
+            lo = v.min()
+            hit = self._scan(v, lo)
+            if len(v) >= self._tail_len:
+                self._tail = v[len(v) - self._tail_len:].copy()
+                self._tail_lo = lo
+            else:
+                self._tail = np.concatenate([self._tail, v])[-self._tail_len:]
+                self._tail_lo = min(self._tail_lo, lo)
+            if hit is not None:
+                self.tripped = True
+        # 回调 (关断 DO) 在锁外执行: 测试线程可能持有 DO 锁时调用 rearm()
+        if hit is not None:
+            self._trip(hit[1], hit[2])
+
+    def rearm(self):
+        """故障确认后重新启用 (历史样本清空，避免用故障前的数据判断升压速率)"""
+        with self._lock:
+            self._tail = np.zeros(0)
+            self._tail_lo = np.inf
+            self.tripped = False
+
+    def _scan(self, v, lo):
+        tail = self._tail
+        off = len(tail)
+        hi = v.max()
+        over_possible = hi > self._v_max
+        # 窗口内的升压不可能超过整段的极差，绝大多数数据块在这里直接通过
+        rise_possible = (self.max_rise > 0
+                         and hi - min(lo, self._tail_lo) > self._dv_rise)
+        if not over_possible and not rise_possible:
+            return None
+
+        seq = np.concatenate([tail, v]) if off else v
+        n = len(seq)
+        best = None
+        if over_possible:
+            k = self.persist
+            c = np.concatenate([[0], np.cumsum(seq > self._v_max)])
+            s0 = max(off, k - 1)
+            idx = np.flatnonzero(c[s0 + 1:] - c[s0 + 1 - k:n + 1 - k] >= k)
+            if len(idx):
+                j = s0 + int(idx[0])
+                best = (j - off, "over", (float(seq[j]) - 1.0) * 2.5)
+        if rise_possible:
+            w = self.rise_window
+            s0 = max(off, w)
+            idx = np.flatnonzero(seq[s0:] - seq[s0 - w:n - w] > self._dv_rise)
+            if len(idx):
+                j = s0 + int(idx[0])
+                if best is None or j - off < best[0]:
+                    rise = (float(seq[j]) - float(seq[j - w])) * 2.5 * self.rate / w
+                    best = (j - off, "rise", rise)
+        return best
+
+    def _trip(self, kind, value):
+        if kind == "over":
+            msg = f"压力超限 (原始样本): {value:.2f} > {self.max_p}"
+        else:
+            msg = f"升压速率超限: {value:.1f} bar/s > {self.max_rise:g}"
+        trip = SafetyTrip(kind, value, msg)
+        self.tripped = True
+        self.trips.append(trip)
+        if self.on_trip is not None:
+            try:
+                self.on_trip(trip)
+            except Exception:
+                log.exception("安全监测 on_trip 回调异常")
+
+    def stats(self):
+        last = self.trips[-1] if self.trips else None
+        return {
+            "samples": self.samples_checked,
+            "blocks": self.blocks_checked,
+            "trips": len(self.trips),
+            "last_latency_ms": last.latency_ms if last else None,
+        }
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : sim_clock.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    测试流程使用的时钟抽象。
+
+    1. RealClock: 真实时间 (硬件模式与 1x 仿真)，time()/sleep() 直接对应
+       time.time()/time.sleep()。
+    2. VirtualClock: 仿真用的虚拟时间。sleep() 只推进虚拟时间，可选按
+       加速倍数缩短真实等待；speedup=None 时完全不等待 (极速)，一次
+       350 循环的仿真只受 CPU 速度限制。
+
+    wait(cond, predicate, seconds) 是可中断的 sleep: 在 threading.Condition
+    上等待，predicate() 为真 (停止/暂停/故障) 时立即返回，不必等满一个 tick。
+
+    等待人工操作 (暂停、故障确认) 的循环不应使用本时钟，而应继续用真实
+    时间等待。
+==============================================================================
+"""
+
+import time
+
+SIM_SPEED_CHOICES = (1, 10, 100, 1000, None)    # None = 极速 (不等待)
+
+
+def sim_speed_label(speed):
+    return "极速" if speed is None else f"{speed}x"
+
+
+class RealClock:
+    """真实时钟"""
+
+    virtual = False
+    speedup = 1
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, cond, predicate, seconds):
+        """等待至多 seconds；predicate() 为真时立即返回 True (调用方被中断)"""
+        with cond:
+            return cond.wait_for(predicate, seconds)
+
+
+class VirtualClock:
+    """虚拟时钟: 从 start (默认当前真实时间) 开始，只在 sleep() 时前进"""
+
+    virtual = True
+
+    def __init__(self, speedup=None, start=None):
+        self.speedup = speedup
+        self._now = time.time() if start is None else float(start)
+        self._t0 = self._now
+        self._wall_t0 = time.monotonic()
+        self._wall_due = self._wall_t0
+
+    def time(self):
+        return self._now
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        self._now += seconds
+        if self.speedup:
+            # 按累计截止时间等待，避免逐次 sleep 的调度误差累积
+            self._wall_due += seconds / self.speedup
+            delay = self._wall_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def wait(self, cond, predicate, seconds):
+        """可中断的 sleep()；被中断时虚拟时间只推进实际经过的部分"""
+        if not self.speedup or seconds <= 0:
+            with cond:
+                if predicate():
+                    return True
+            self.sleep(seconds)
+            return False
+        self._wall_due += seconds / self.speedup
+        with cond:
+            hit = cond.wait_for(predicate, max(0.0, self._wall_due - time.monotonic()))
+        if not hit:
+            self._now += seconds
+            return False
+        now = time.monotonic()
+        remaining = max(0.0, self._wall_due - now) * self.speedup
+        self._wall_due = now
+        self._now += seconds - remaining
+        return True
+
+    @property
+    def elapsed(self):
+        """已经过的虚拟时间 (s)"""
+        return self._now - self._t0
+
+    @property
+    def effective_speedup(self):
+        """实际达到的加速倍数"""
+        wall = time.monotonic() - self._wall_t0
+        return self.elapsed / wall if wall > 0 else 0.0
+
+
+def make_clock(sim_mode, sim_speed, start=None):
+    """硬件模式或 1x 仿真返回 RealClock，其余返回 VirtualClock (start 为续跑时的起始时刻)"""
+    if not sim_mode or sim_speed == 1:
+        return RealClock()
+    return VirtualClock(sim_speed, start=start)
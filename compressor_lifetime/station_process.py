@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : station_process.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    台架独立进程运行 (与 Qt 无关)。
+
+    线程模式下所有 TestEngine 与 Qt 界面、pyqtgraph 绘制、呼吸灯动画共用
+    一个解释器和 GIL，台架多时一次重绘就会推迟所有台架的阀门时序。进程模式
+    下测试引擎与采集在子进程 (StationHost) 中运行:
+      1. 压力样本写入共享内存环形缓冲区 (TelemetryRing，单写者)，界面进程以
+         只读视图映射，按游标取走新样本；界面卡顿时旧样本被覆盖并计数，
+         子进程从不等待界面。
+      2. 状态、倒计时、日志、进度等低频事件 (每帧一条) 经事件队列发回。
+      3. 暂停 / 继续 / 停止命令经命令队列发给子进程。
+      4. 界面进程退出或崩溃时，子进程停止全部台架 (DO 写入安全状态) 后退出。
+
+    USB-6362/6363 每台设备只能运行一个硬件定时 AI 任务，因此硬件模式下同一
+    设备的台架共用一个子进程 (共享该设备的 AI 采集服务)；仿真模式下每个台架
+    一个子进程，吞吐随 CPU 核数扩展。
+
+    StationProcess 的接口与 TestEngine 的事件回调一致 (on_event(kind, payload))，
+    EVT_FRAME 的载荷在界面进程中重新组装为 TelemetryFrame。
+==============================================================================
+"""
+
+import queue
+import logging
+import itertools
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from telemetry import TelemetryFrame
+from test_engine import (TestEngine, EVT_FRAME, EVT_ERROR, EVT_FAULT_PAUSE, EVT_RESULT,
+                         EVT_FINISHED)
+
+log = logging.getLogger(__name__)
+
+TELEMETRY_RING_CAPACITY = 8192  # 每台架共享内存中的样本数 (t, p 各一份 float64)
+HOST_POLL_INTERVAL = 0.5        # 子进程命令轮询 / 父进程存活检查间隔 (s)
+HOST_JOIN_TIMEOUT = 10.0        # 子进程退出等待时间 (s)
+
+_RING_HEADER = 3                # int64: [已发布样本总数, 容量, 已预留样本总数]
+
+
+# ============================================================================
+# [SECTION 1] 共享内存遥测环 (Shared-Memory Telemetry Ring)
+# ============================================================================
+
+class TelemetryRing:
+    """单写者样本环: 子进程 write()，界面进程 read_new()
+
+    写者先发布预留总数 (hdr[2])，再写样本，最后更新已发布总数 (hdr[0])。读者
+    复制前读已发布总数确定范围，复制后读预留总数: 预留范围覆盖到的槽位可能
+    已被 (或正在被) 写入新数据，计入 lost 并丢弃，不会读到撕裂的数据。
+    """
+
+    def __init__(self, shm, owner, readonly):
+        self.shm = shm
+        self.name = shm.name
+        self.owner = owner
+        self._hdr = np.ndarray((_RING_HEADER,), dtype=np.int64, buffer=shm.buf)
+        cap = int(self._hdr[1])
+        self.capacity = cap
+        off = _RING_HEADER * 8
+        self._t = np.ndarray((cap,), dtype=np.float64, buffer=shm.buf, offset=off)
+        self._p = np.ndarray((cap,), dtype=np.float64, buffer=shm.buf, offset=off + cap * 8)
+        if readonly:
+            self._t.flags.writeable = False
+            self._p.flags.writeable = False
+        self._cursor = int(self._hdr[0])
+        self.lost = 0
+
+    @classmethod
+    def create(cls, capacity=TELEMETRY_RING_CAPACITY):
+        """界面进程创建 (拥有者，负责 unlink)，自身只读"""
+        shm = shared_memory.SharedMemory(create=True, size=(_RING_HEADER + 2 * capacity) * 8)
+        hdr = np.ndarray((_RING_HEADER,), dtype=np.int64, buffer=shm.buf)
+        hdr[0] = 0
+        hdr[1] = capacity
+        hdr[2] = 0
+        del hdr
+        return cls(shm, owner=True, readonly=True)
+
+    @classmethod
+    def attach(cls, name):
+        """子进程按名称映射 (写者)"""
+        return cls(shared_memory.SharedMemory(name=name), owner=False, readonly=False)
+
+    def write(self, t, p):
+        n = len(p)
+        if n == 0:
+            return
+        cap = self.capacity
+        count = int(self._hdr[0])
+        if n > cap:
+            t, p = t[n - cap:], p[n - cap:]
+            count += n - cap
+            n = cap
+        self._hdr[2] = count + n        # 先预留: 读者据此丢弃可能正在被覆盖的槽位
+        i = count % cap
+        k = min(n, cap - i)
+        self._t[i:i + k] = t[:k]
+        self._p[i:i + k] = p[:k]
+        if k < n:
+            self._t[:n - k] = t[k:]
+            self._p[:n - k] = p[k:]
+        self._hdr[0] = count + n
+
+    def read_new(self):
+        """取走上次读取之后的新样本，返回 (t, p) 副本"""
+        cap = self.capacity
+        end = int(self._hdr[0])
+        start = self._cursor
+        if end - start > cap:
+            self.lost += end - start - cap
+            start = end - cap
+        idx = np.arange(start, end) % cap
+        t = self._t[idx]
+        p = self._p[idx]
+        # 复制期间写者可能已预留 (正在或已经写入) 并绕回覆盖了最早的样本
+        overwritten = min(int(self._hdr[2]) - cap - start, end - start)
+        if overwritten > 0:
+            self.lost += overwritten
+            t, p = t[overwritten:], p[overwritten:]
+        self._cursor = end
+        return t, p
+
+    def close(self):
+        # 先释放指向共享内存的视图，否则 close() 会因仍有导出的缓冲区而失败
+        self._hdr = self._t = self._p = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# ============================================================================
+# [SECTION 2] 子进程 (Station Host Process)
+# ============================================================================
+
+_CMD_START = "start"
+_CMD_PAUSE = "pause"
+_CMD_STOP = "stop"
+_CMD_EXIT = "exit"
+
+
+class _HostedStation:
+    """子进程中的一个台架: TestEngine + 线程 + 遥测环写端"""
+
+    def __init__(self, sid, config, offset, log_dir, ring_name, evt_q):
+        self.sid = sid
+        self.evt_q = evt_q
+        self.ring = TelemetryRing.attach(ring_name)
+        self.engine = TestEngine(config, offset, log_dir, on_event=self._on_event)
+        self.thread = threading.Thread(target=self._run, name=f"Engine-{sid}", daemon=True)
+
+    def _on_event(self, kind, payload):
+        if kind == EVT_FRAME:
+            self.ring.write(payload.t, payload.p)
+            payload = (payload.timer, payload.status, payload.logs,
+                       payload.signals_coalesced, payload.signals_saved_per_s, payload.stats)
+        elif kind == EVT_FINISHED:
+            return          # 线程真正结束 (遥测环已关闭) 后由 _run 发出
+        self.evt_q.put((self.sid, kind, payload))
+
+    def _run(self):
+        try:
+            self.engine.run()
+        finally:
+            self.ring.close()
+            self.evt_q.put((self.sid, EVT_FINISHED, None))
+
+
+def _host_main(cmd_q, evt_q):
+    """子进程入口: 按命令启动/控制台架，直到收到退出命令或父进程消失"""
+    logging.basicConfig(level=logging.WARNING,
+                        format="%(asctime)s [%(levelname)s] %(processName)s %(message)s")
+    parent = multiprocessing.parent_process()
+    stations = {}
+    while True:
+        try:
+            cmd = cmd_q.get(timeout=HOST_POLL_INTERVAL)
+        except queue.Empty:
+            if parent is not None and not parent.is_alive():
+                log.warning("界面进程已退出，停止全部台架")
+                cmd = (_CMD_EXIT,)
+            else:
+                continue
+        op = cmd[0]
+        if op == _CMD_START:
+            _, sid, config, offset, log_dir, ring_name = cmd
+            try:
+                st = _HostedStation(sid, config, offset, log_dir, ring_name, evt_q)
+            except Exception as e:
+                log.exception("台架 %s 启动失败", sid)
+                evt_q.put((sid, EVT_ERROR, f"台架进程启动失败: {e}"))
+                evt_q.put((sid, EVT_RESULT, False))
+                evt_q.put((sid, EVT_FINISHED, None))
+                continue
+            stations[sid] = st
+            st.thread.start()
+        elif op == _CMD_PAUSE:
+            st = stations.get(cmd[1])
+            if st:
+                st.engine.set_pause(cmd[2])
+        elif op == _CMD_STOP:
+            st = stations.get(cmd[1])
+            if st:
+                st.engine.stop()
+        elif op == _CMD_EXIT:
+            for st in stations.values():
+                if st.thread.is_alive():
+                    st.engine.stop()
+            for st in stations.values():
+                st.thread.join(timeout=HOST_JOIN_TIMEOUT)
+            return
+
+
+# ============================================================================
+# [SECTION 3] 界面进程侧 (Parent Side)
+# ============================================================================
+
+class StationHost:
+    """一个子进程及其事件分发线程；按 key 共享 (硬件: 设备名，仿真: 每台架一个)"""
+
+    _hosts = {}
+    _registry_lock = threading.Lock()
+    _ids = itertools.count(1)
+
+    def __init__(self, key):
+        ctx = multiprocessing.get_context("spawn")
+        self.key = key
+        self._cmd_q = ctx.Queue()
+        self._evt_q = ctx.Queue()
+        self._stations = {}
+        self.process = ctx.Process(target=_host_main, args=(self._cmd_q, self._evt_q),
+                                   name=f"StationHost-{key}", daemon=True)
+        self.process.start()
+        self._dispatcher = threading.Thread(target=self._dispatch, name=f"HostEvents-{key}",
+                                            daemon=True)
+        self._dispatcher.start()
+
+    @classmethod
+    def register(cls, key, station):
+        """把台架加入 key 对应的子进程 (不存在时启动)，返回 (host, 台架 id)
+
+        key 为 None 时该台架独占一个子进程。
+        """
+        with cls._registry_lock:
+            sid = next(cls._ids)
+            if key is None:
+                key = f"sim-{sid}"
+            host = cls._hosts.get(key)
+            if host is None:
+                host = cls(key)
+                cls._hosts[key] = host
+            host._stations[sid] = station
+            return host, sid
+
+    def release(self, sid):
+        """台架结束: 最后一个台架结束时让子进程退出"""
+        with StationHost._registry_lock:
+            self._stations.pop(sid, None)
+            if self._stations:
+                return
+            if StationHost._hosts.get(self.key) is self:
+                del StationHost._hosts[self.key]
+        self.send(_CMD_EXIT)
+
+    def send(self, *cmd):
+        self._cmd_q.put(cmd)
+
+    def _dispatch(self):
+        while True:
+            try:
+                sid, kind, payload = self._evt_q.get(timeout=HOST_POLL_INTERVAL)
+            except queue.Empty:
+                if self.process.is_alive():
+                    continue
+                self._on_process_died()
+                return
+            with StationHost._registry_lock:
+                station = self._stations.get(sid)
+            if station is not None:
+                station._handle(kind, payload)
+            with StationHost._registry_lock:
+                done = not self._stations and StationHost._hosts.get(self.key) is not self
+            if done and self._evt_q.empty():
+                self.process.join(timeout=HOST_JOIN_TIMEOUT)
+                return
+
+    def _on_process_died(self):
+        with StationHost._registry_lock:
+            orphans = list(self._stations.values())
+        if not orphans:
+            return
+        log.error("台架进程 %s 意外退出 (exitcode=%s)", self.key, self.process.exitcode)
+        for station in orphans:
+            station._handle(EVT_ERROR, f"台架进程意外退出 (exitcode={self.process.exitcode})")
+            station._handle(EVT_RESULT, False)
+            station._handle(EVT_FINISHED, None)
+
+
+class StationProcess:
+    """在子进程中运行一个台架；on_event 在事件分发线程中调用，与 TestEngine 相同"""
+
+    def __init__(self, config, group_offset, log_dir, on_event=None):
+        self.config = config
+        self.offset = group_offset
+        self.log_dir = log_dir
+        self.on_event = on_event
+        self.is_paused = False
+        self.running = False
+        self.finished = threading.Event()
+        self.ring = None
+        self.host = None
+        self.sid = None
+
+    @property
+    def host_key(self):
+        if self.config.get('simulation'):
+            return None         # 仿真台架各用一个子进程
+        return self.config['device']
+
+    @property
+    def samples_lost(self):
+        return self.ring.lost if self.ring else 0
+
+    def start(self):
+        self.ring = TelemetryRing.create()
+        self.host, self.sid = StationHost.register(self.host_key, self)
+        self.running = True
+        self.finished.clear()
+        self.host.send(_CMD_START, self.sid, self.config, self.offset, self.log_dir,
+                       self.ring.name)
+
+    def set_pause(self, paused):
+        self.is_paused = paused
+        self.host.send(_CMD_PAUSE, self.sid, paused)
+
+    def stop(self):
+        self.is_paused = False
+        self.host.send(_CMD_STOP, self.sid)
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def _handle(self, kind, payload):
+        if kind == EVT_FRAME:
+            t, p = self.ring.read_new()
+            timer, status, logs, coalesced, saved_per_s, stats = payload
+            if stats is not None and self.ring.lost:
+                stats = dict(stats, ipc_samples_lost=self.ring.lost)
+            payload = TelemetryFrame(t, p, timer, status, logs, coalesced, saved_per_s, stats)
+        elif kind == EVT_FAULT_PAUSE:
+            self.is_paused = True
+        elif kind == EVT_FINISHED:
+            self.running = False
+            self.ring.close()
+            self.host.release(self.sid)
+        if self.on_event is not None:
+            self.on_event(kind, payload)
+        if kind == EVT_FINISHED:
+            self.finished.set()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : telemetry.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    测试线程 -> GUI 的批量遥测 (与 Qt 无关)。
+
+    工作线程把压力样本 (带时间戳)、倒计时、状态变化和日志行先收集进
+    TelemetryBatcher，按固定帧率打包成一个 TelemetryFrame 一次性发给 GUI，
+    GUI 在一个槽函数里应用整帧，避免成千上万个跨线程小信号。
+==============================================================================
+"""
+
+import time
+import threading
+
+import numpy as np
+
+TELEMETRY_FRAME_HZ = 5
+FRAME_MAX_SAMPLES = 256     # 单帧样本上限，写满时提前出帧
+
+
+class TelemetryFrame:
+    """一帧遥测数据: 样本数组 + 最新倒计时 + 最新状态 + 日志行"""
+
+    __slots__ = ("t", "p", "timer", "status", "logs",
+                 "signals_coalesced", "signals_saved_per_s", "stats")
+
+    def __init__(self, t, p, timer, status, logs, signals_coalesced, signals_saved_per_s,
+                 stats=None):
+        self.t = t
+        self.p = p
+        self.timer = timer
+        self.status = status
+        self.logs = logs
+        self.signals_coalesced = signals_coalesced
+        self.signals_saved_per_s = signals_saved_per_s
+        self.stats = stats      # 低频附带的运行统计 (dict)，大部分帧为 None
+
+
+class TelemetryBatcher:
+    """收集逐值更新并按帧率打包；所有方法线程安全 (GUI 线程的 stop() 也会写日志)"""
+
+    def __init__(self, frame_hz=TELEMETRY_FRAME_HZ, max_samples=FRAME_MAX_SAMPLES):
+        self.interval = 1.0 / frame_hz
+        self._lock = threading.Lock()
+        self._t = np.zeros(max_samples, dtype=np.float64)
+        self._p = np.zeros(max_samples, dtype=np.float64)
+        self._n = 0
+        self._timer = None
+        self._status = None
+        self._logs = []
+        self._stats = None
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        # 统计: 合并掉的信号数 (旧实现中每个值一个信号，现在每帧一个)
+        self.frames_emitted = 0
+        self.values_received = 0
+        self._rate_t0 = self._last_flush
+        self._rate_saved0 = 0
+        self.signals_saved_per_s = 0.0
+
+    @property
+    def signals_saved(self):
+        return self.values_received - self.frames_emitted
+
+    def add_pressure(self, t, p):
+        with self._lock:
+            if self._n == len(self._p):
+                # 帧已满: 丢弃最旧的一半，保证最近样本可用 (正常帧率下不会发生)
+                half = self._n // 2
+                self._t[:self._n - half] = self._t[half:self._n]
+                self._p[:self._n - half] = self._p[half:self._n]
+                self._n -= half
+            self._t[self._n] = t
+            self._p[self._n] = p
+            self._n += 1
+            self._pending += 1
+
+    def add_pressures(self, ts, ps):
+        """批量追加样本 (向量化)；超过单帧容量时只保留最新的部分"""
+        n = len(ps)
+        if n == 0:
+            return
+        cap = len(self._p)
+        with self._lock:
+            if n >= cap:
+                self._t[:] = ts[-cap:]
+                self._p[:] = ps[-cap:]
+                self._n = cap
+            else:
+                keep = min(self._n, cap - n)
+                if keep < self._n:
+                    self._t[:keep] = self._t[self._n - keep:self._n]
+                    self._p[:keep] = self._p[self._n - keep:self._n]
+                self._t[keep:keep + n] = ts
+                self._p[keep:keep + n] = ps
+                self._n = keep + n
+            self._pending += n
+
+    def set_timer(self, text):
+        with self._lock:
+            self._timer = text
+            self._pending += 1
+
+    def set_status(self, msg, style):
+        with self._lock:
+            self._status = (msg, style)
+            self._pending += 1
+
+    def add_log(self, msg):
+        with self._lock:
+            self._logs.append(msg)
+            self._pending += 1
+
+    def set_stats(self, stats):
+        """附带到下一帧的统计信息 (不单独触发出帧)"""
+        with self._lock:
+            self._stats = stats
+
+    def due(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        return self._pending and (now - self._last_flush >= self.interval
+                                  or self._n >= len(self._p))
+
+    def take_frame(self, now=None):
+        """取出当前累积的内容打包成帧；没有待发送内容时返回 None"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            if not self._pending:
+                return None
+            n = self._n
+            frame_t = self._t[:n].copy()
+            frame_p = self._p[:n].copy()
+            timer, status, logs, stats = self._timer, self._status, self._logs, self._stats
+            self._n = 0
+            self._timer = None
+            self._status = None
+            self._logs = []
+            self._stats = None
+            self.values_received += self._pending
+            self._pending = 0
+            self.frames_emitted += 1
+            self._last_flush = now
+
+            elapsed = now - self._rate_t0
+            if elapsed >= 1.0:
+                saved = self.signals_saved
+                self.signals_saved_per_s = (saved - self._rate_saved0) / elapsed
+                self._rate_t0 = now
+                self._rate_saved0 = saved
+
+            return TelemetryFrame(frame_t, frame_p, timer, status, logs,
+                                  self.signals_saved, self.signals_saved_per_s, stats)
@@ -0,0 +1,1304 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : test_engine.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    与 GUI 无关的测试引擎 + 无界面命令行运行器。
+
+    TestEngine 包含完整的测试时序、安全保护与日志逻辑，不依赖 PyQt6 /
+    pyqtgraph。输出通过 on_event(kind, payload) 回调 (或 queue_sink 包装
+    的队列) 发出；GUI 中的 TestWorker 只是把事件转发为 Qt 信号的薄适配层。
+
+    命令行用法 (在机架工控机或回归任务中无界面运行):
+      python test_engine.py stations.json [--sim] [--speed max] [--jsonl] [--resume]
+    --resume: 日志目录中有上次中断留下的检查点时从最后完成的一轮继续，
+    追加到原来的日志 (见 checkpoint.py)。
+
+    配置文件 (JSON):
+      {
+        "log_dir": "D:/Logs",
+        "simulation": false,
+        "defaults": {"cycles": 350, "target_p": 2.0, "floor_p": 0.5, "max_p": 2.5},
+        "stations": [
+          {"device": "Dev1", "group": 0},
+          {"device": "Dev1", "group": 1, "cycles": 100, "sequence": "short_pulse.json"}
+        ]
+      }
+    sequence 为序列定义文件 (相对配置文件目录) 或内联对象，缺省为标准寿命
+    循环，格式见 test_sequence.py。
+    max_rise 为原始样本的升压速率上限 (bar/s，缺省 0 即只检查 max_p，需要时
+    显式启用)，见 safety_monitor.py。watchdog: true 启用 DO 看门狗 (watchdog_timeout 秒
+    未喂狗时由板卡关断压缩机并报警，缺省 5 s)。filters 为压力滤波预设名
+    (standard / smooth / fast) 或算子列表，见 pressure_filters.py。
+    record_trace: false 关闭曲线存档 (Trace_*.trc，缺省开启)，见 trace_store.py。
+==============================================================================
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+import numpy as np
+import nidaqmx
+
+from daq_io import (DeviceAcquisitionService, PressureReader, StationDoOutput, DeviceWatchdog,
+                    DoTimingBusy, compile_pulse_train, fail_safe_states, AI_SAMPLE_RATE, DO_WATCHDOG_TIMEOUT)
+from raw_recorder import RawWaveformRecorder
+from trace_store import TraceStoreWriter, pack_do
+from checkpoint import (RunCheckpoint, checkpoint_path, check_resume, describe_checkpoint,
+                        load_checkpoint)
+from pressure_sim import (SimulatedAcquisitionService, VirtualSimChannel, station_seed,
+                          SIM_SEED)
+from csv_logger import CsvLogWriter
+from pressure_filters import build_pipeline, DEFAULT_FILTER
+from safety_monitor import SafetyMonitor, SAFETY_MAX_RISE
+from test_sequence import (compile_sequence, load_sequence, CompiledSequence, runtime_context,
+                           MASK_STATES, SAFE_IDLE_MASK, OP_STATUS, OP_MARK, OP_PHASE, OP_ROUND, OP_HOLD,
+                           OP_TRAIN, OP_REGULATE, OP_RECORD, OP_REQUIRE)
+from sim_clock import make_clock, sim_speed_label
+from telemetry import TelemetryBatcher, TELEMETRY_FRAME_HZ
+from loop_timing import LoopTiming, TIMING_HEADER, format_timing
+
+log = logging.getLogger(__name__)
+
+# ============================================================================
+# [SECTION 1] 常量与事件 (Constants & Events)
+# ============================================================================
+
+SIM_TICK = 0.1              # 等待循环的轮询间隔 (s)
+PAUSE_READ_INTERVAL = 0.1   # 暂停期间读取压力的间隔 (s)，恢复/停止会立即唤醒
+STATS_INTERVAL = 2.0        # 运行统计随遥测帧附带的间隔 (s)
+
+# on_event(kind, payload) 的事件类型
+EVT_FRAME = "frame"             # TelemetryFrame: 压力样本/倒计时/状态/日志
+EVT_PROGRESS = "progress"       # int: 已完成的循环数
+EVT_ERROR = "error"             # str: 故障或异常信息
+EVT_FAULT_PAUSE = "fault_pause" # None: 故障暂停，等待 set_pause(False) 重跑或 stop()
+EVT_RESULT = "result"           # bool: True = 完成, False = 出错/停止
+EVT_FINISHED = "finished"       # None: 线程即将退出 (资源已释放)
+
+# EVT_FRAME 中的 status 为 (文字, 样式键)，样式键取 "run" / "pause" / "err"，
+# 由界面自行映射为样式
+
+
+def queue_sink(q):
+    """把事件放入队列 (kind, payload) 的回调，供轮询式接收端使用"""
+    def _put(kind, payload):
+        q.put((kind, payload))
+    return _put
+
+
+# ============================================================================
+# [SECTION 2] 参数校验 (Validation)
+# ============================================================================
+
+def validate_positive_float(text, field_name, min_val=0.0, max_val=99.9):
+    try:
+        val = float(text)
+    except (ValueError, TypeError):
+        raise ValueError(f"{field_name} 必须为有效数字")
+    if val < min_val or val > max_val:
+        raise ValueError(f"{field_name} 超出有效范围 [{min_val}, {max_val}]")
+    return val
+
+
+def validate_positive_int(text, field_name, min_val=1, max_val=999999):
+    try:
+        val = int(text)
+    except (ValueError, TypeError):
+        raise ValueError(f"{field_name} 必须为正整数")
+    if val < min_val or val > max_val:
+        raise ValueError(f"{field_name} 超出有效范围 [{min_val}, {max_val}]")
+    return val
+
+
+def validate_test_params(cycles, target_p, floor_p, max_p):
+    """校验测试参数并返回 (cycles, target_p, floor_p, max_p)，不合法时抛 ValueError"""
+    cycles = validate_positive_int(cycles, "目标循环")
+    target_p = validate_positive_float(target_p, "高压目标", 0.01, 20.0)
+    floor_p = validate_positive_float(floor_p, "低压目标", 0.0, 20.0)
+    max_p = validate_positive_float(max_p, "保护上限", 0.1, 30.0)
+    if floor_p >= target_p:
+        raise ValueError("低压阈值必须小于高压目标")
+    if max_p <= target_p:
+        raise ValueError("保护上限必须大于高压目标")
+    return cycles, target_p, floor_p, max_p
+
+
+# ============================================================================
+# [SECTION 3] 测试引擎 (Test Engine)
+# ============================================================================
+
+class RetryCycleError(Exception):
+    """故障确认后重跑当前循环"""
+
+
+class TestEngine:
+    """单个台架的测试流程 (与 Qt 无关)
+
+    run() 阻塞执行整个测试，应在独立线程中调用。所有输出通过
+    on_event(kind, payload) 回调在该线程中发出，kind 见 EVT_*。
+    set_pause()/stop() 可从任意线程调用。
+    """
+
+    def __init__(self, config, group_offset, log_dir, on_event=None):
+        self.config = config
+        self.on_event = on_event
+        self.offset = group_offset
+        self.log_dir = log_dir
+        self.is_running = True
+        self.is_paused = False
+        # is_running / is_paused 只在 _cond 下修改并 notify_all，所有等待都能被立即唤醒
+        self._cond = threading.Condition()
+        self._stop_t = None
+        self.stop_latency_ms = None
+        self.do_out = None
+        self.ai_sub = None
+        self.pressure_reader = None
+        self.raw_recorder = None
+        self.raw_tap = None
+        self.trace = None
+        self._do_bits = 0
+        self.safety = None
+        self.safety_tap = None
+        self._safety_trip = None    # 采集线程检测到、尚未由测试线程处理的安全触发
+        self.watchdog = None
+        self.watchdog_timeout = float(config.get('watchdog_timeout', DO_WATCHDOG_TIMEOUT))
+        self.watchdog_expirations = 0
+        # DO 写入在测试线程与采集线程 (安全监测) 之间互斥
+        self._do_lock = threading.RLock()
+        self.csv_file = None
+        self.csv_log = None
+        self.timing_log = None
+        self.checkpoint = None
+        self.timing = LoopTiming()
+        self._last_read_t = None
+        self._ai_seen = (0, 0)      # 已报告过的 (驱动缓冲区溢出次数, 订阅丢弃样本数)
+        self.dev_name = config['device']
+        self.target_cycles = int(config['cycles'])
+        self.target_p = float(config['target_p'])
+        self.floor_p = float(config['floor_p'])
+        self.max_p = float(config['max_p'])
+        self.max_rise = float(config.get('max_rise', SAFETY_MAX_RISE))
+        self.sim_mode = config['simulation']
+        self.hw_timed_do = config.get('hw_timed_do', False) and not self.sim_mode
+        self.record_raw = config.get('record_raw', False)
+        self.record_trace = config.get('record_trace', True)
+        self.filters = config.get('filters', DEFAULT_FILTER)
+        seq = config.get('sequence')
+        self.sequence = seq if isinstance(seq, CompiledSequence) else compile_sequence(seq)
+        self.resume = config.get('resume')     # 上一次中断运行的检查点 (见 checkpoint.py)
+        self._waveforms = {}
+        self.hw_timing_fallbacks = 0    # DO 定时引擎被占用、改为软件定时的脉冲组数
+        self.clock = make_clock(self.sim_mode, config.get('sim_speed', 1),
+                                start=self.resume.get('clock') if self.resume else None)
+        self.sim = None
+        self.sim_seed = config.get('sim_seed', SIM_SEED)
+        # 极速仿真: 被动等待一次生成全部样本并向量化滤波
+        self._sim_batch = self.sim_mode and self.clock.virtual and not self.clock.speedup
+        self._last_pressure = 0.0
+        self._first_read = True
+        self.step_max_p = 0.0
+        self.step_min_p = 99.9
+        self.fault_triggered = False
+        self.last_do_states = [False] * 8
+        self._needs_emergency_shutdown = False
+        self.telemetry = TelemetryBatcher(config.get('frame_hz', TELEMETRY_FRAME_HZ))
+        self._last_stats = 0.0
+
+    def run(self):
+        try:
+            if self.resume:
+                check_resume(self.resume, self.sequence)
+            self.setup_hardware()
+            self.start_safety_monitor()
+            self.start_watchdog()
+            self.create_log_file()
+            self.start_raw_recording()
+            self.start_trace_store()
+            self._emit_log(f"启动: {self.dev_name} [Line {self.offset}-{self.offset+7}]")
+            if self.clock.virtual:
+                self._emit_log(f"虚拟时钟: 仿真倍速 {sim_speed_label(self.clock.speedup)}")
+            self._emit_log(f"测试序列: {self.sequence.name} "
+                           f"(单循环 {self.sequence.total_duration / 60:.1f} min)")
+            self._emit_log(f"压力滤波: {self.pressure_reader.pipeline.describe()}")
+
+            current_cycle, start_op, reached = 1, 0, 0
+            if self.resume:
+                current_cycle = int(self.resume['cycle'])
+                start_op, reached = int(self.resume['op']), int(self.resume['reached'])
+                self._emit_log(f"续跑: {describe_checkpoint(self.resume)}")
+                saved_t = self.resume.get('clock')
+                if saved_t is not None and self.clock.time() < saved_t:
+                    # 中断前为加速/极速仿真 (虚拟时间领先于真实时间)，本次为真实时钟
+                    self._emit_log(f"警告: 当前时钟早于中断时刻 {saved_t - self.clock.time():.0f} s，"
+                                   f"续跑部分的日志与曲线时间将倒退")
+            self._save_checkpoint(current_cycle, start_op, reached)
+            while current_cycle <= self.target_cycles:
+                if not self.is_running:
+                    break
+
+                try:
+                    self.check_pause_state()
+                    self._emit_status(f"循环 {current_cycle}: 启动", "run")
+
+                    if not self.run_sequence(current_cycle, start_op, reached):
+                        break
+                    start_op = reached = 0
+
+                    self._emit_event(EVT_PROGRESS, current_cycle)
+                    self._dump_timing(current_cycle)
+                    if self.csv_log:
+                        self.csv_log.sync()
+                    current_cycle += 1
+                    self._save_checkpoint(current_cycle, 0, 0)
+
+                except RetryCycleError:
+                    if not self.is_running:
+                        break
+                    self._emit_log(f"警告: 第 {current_cycle} 次循环发生故障，系统复位并重跑当前循环...")
+                    self._emit_status(f"正在复位循环 {current_cycle}...", "run")
+                    start_op = reached = 0
+                    self._save_checkpoint(current_cycle, 0, 0)
+                    self.finalize_success()
+                    self._sleep(2.0)
+                    continue
+
+            if self.is_running:
+                self.finalize_success()
+                if self.checkpoint:
+                    self.checkpoint.discard()
+                self._emit_status("测试完成", "run")
+                self._emit_log(f"{self.dev_name}: 测试流程已顺利完成")
+                self._emit_timer("--")
+                if self.clock.virtual:
+                    self._emit_log(
+                        f"虚拟时间 {self.clock.elapsed / 3600:.1f} h, "
+                        f"实际加速 {self.clock.effective_speedup:.0f}x")
+                self._emit_event(EVT_RESULT, True)
+            else:
+                # 先把 DO 置于安全状态，再发出状态与结果事件
+                if self._needs_emergency_shutdown:
+                    self._needs_emergency_shutdown = False
+                    self.emergency_shutdown()
+                self._emit_status("已停止", "err")
+                self._emit_event(EVT_RESULT, False)
+
+        except Exception as e:
+            self._emit_event(EVT_ERROR, f"系统异常: {e}")
+            log.exception("TestEngine 运行异常")
+            self.emergency_shutdown()
+            self._emit_event(EVT_RESULT, False)
+        finally:
+            self.cleanup()
+            self._emit_log(
+                f"遥测统计: {self.telemetry.frames_emitted} 帧合并了 "
+                f"{self.telemetry.values_received} 次更新 (减少 {self.telemetry.signals_saved} 个信号)")
+            self._emit_event(EVT_FINISHED)
+
+    # --- 遥测: 高频更新先进入批处理，按帧率打包成 EVT_FRAME 发出 ---
+
+    def _emit_pressure(self, p):
+        self.telemetry.add_pressure(self.clock.time(), p)
+        self._maybe_flush()
+
+    def _emit_timer(self, text):
+        self.telemetry.set_timer(text)
+        self._maybe_flush()
+
+    def _emit_status(self, msg, style):
+        self.telemetry.set_status(msg, style)
+        self._maybe_flush()
+
+    def _emit_log(self, msg):
+        self.telemetry.add_log(msg)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if self.telemetry.due():
+            self._flush_frame()
+
+    def _flush_frame(self):
+        now = time.monotonic()
+        if now - self._last_stats >= STATS_INTERVAL:
+            self._last_stats = now
+            self.telemetry.set_stats(self.collect_stats())
+        frame = self.telemetry.take_frame()
+        if frame is not None:
+            self._send(EVT_FRAME, frame)
+
+    def _emit_event(self, kind, payload=None):
+        """低频的独立事件: 先发出积压的帧，保证接收端的先后顺序"""
+        self._flush_frame()
+        self._send(kind, payload)
+
+    def _send(self, kind, payload):
+        if self.on_event is not None:
+            t0 = time.perf_counter()
+            self.on_event(kind, payload)
+            self.timing.record("emit", time.perf_counter() - t0)
+
+    def collect_stats(self):
+        stats = {}
+        if self.csv_log:
+            stats["csv"] = self.csv_log.stats()
+        if self.safety:
+            stats["safety"] = self.safety.stats()
+        stats["timing"] = self.timing.summary()
+        if self.pressure_reader:
+            stats["ai"] = self.pressure_reader.sub.health()
+        return stats
+
+    def check_pause_state(self):
+        if self.is_paused and self.is_running:
+            self._emit_status("已暂停 / 等待恢复", "pause")
+            temp_safe_states = list(self.last_do_states)
+            temp_safe_states[3] = False
+            if self.fault_triggered:
+                temp_safe_states[7] = True
+                self._emit_log("故障暂停: 等待用户操作 (复位模式)")
+            else:
+                self._emit_log("手动暂停: 保持状态 (继续模式)")
+
+            with self._do_lock:
+                if self.sim:
+                    self.sim.set_do(temp_safe_states)
+                elif self.do_out:
+                    try:
+                        self.do_out.write(temp_safe_states)
+                    except nidaqmx.DaqError as e:
+                        log.warning("暂停时写入DO失败: %s", e)
+
+            while self.is_paused and self.is_running:
+                with self._cond:
+                    self._cond.wait_for(self._pause_released, PAUSE_READ_INTERVAL)
+                self.read_pressure(silent=True)
+
+            if self.is_running:
+                if self.fault_triggered:
+                    self.fault_triggered = False
+                    self._rearm_safety()
+                    raise RetryCycleError()
+                else:
+                    self._emit_status("恢复运行...", "run")
+                    self._emit_log("手动暂停结束，继续执行剩余步骤")
+                    self.write_do(self.last_do_states)
+
+    def trigger_fault(self, error_msg):
+        self.fault_triggered = True
+        self._set_state(paused=True)
+        self._emit_event(EVT_ERROR, error_msg)
+        self._emit_event(EVT_FAULT_PAUSE)
+        self.check_pause_state()
+        if self.fault_triggered and self.is_running:
+            # 暂停在进入等待之前就已被解除 (如无界面运行器立即自动复位)
+            self.fault_triggered = False
+            self._rearm_safety()
+            raise RetryCycleError()
+
+    def set_pause(self, paused):
+        self._set_state(paused=paused)
+
+    def stop(self):
+        self._stop_t = time.perf_counter()
+        self._needs_emergency_shutdown = True
+        self._set_state(running=False, paused=False)
+        self._emit_log("!!! 用户触发紧急停止 !!!")
+        self._emit_status("正在停止...", "err")
+
+    # --- 事件驱动的等待: 状态变化时 notify_all，等待中的测试线程立即醒来 ---
+
+    def _set_state(self, running=None, paused=None):
+        with self._cond:
+            if running is not None:
+                self.is_running = running
+            if paused is not None:
+                self.is_paused = paused
+            self._cond.notify_all()
+
+    def _interrupted(self):
+        return (not self.is_running or self.is_paused
+                or (self._safety_trip is not None and not self.fault_triggered))
+
+    def _pause_released(self):
+        return not self.is_paused or not self.is_running
+
+    def _sleep(self, seconds):
+        """可中断的等待: stop / pause / 故障会立即唤醒，返回 True 表示被中断"""
+        if self.clock.virtual:
+            return self.clock.wait(self._cond, self._interrupted, seconds)
+        t0 = time.perf_counter()
+        interrupted = self.clock.wait(self._cond, self._interrupted, seconds)
+        if not interrupted:
+            self.timing.record("tick_late", max(0.0, time.perf_counter() - t0 - seconds))
+        return interrupted
+
+    def setup_hardware(self):
+        if self.sim_mode:
+            # 仿真: 实时 (1x) 台架共享一个 500 Hz 仿真线程；虚拟时钟下每个引擎独立仿真
+            if self.clock.virtual:
+                self.sim = VirtualSimChannel(
+                    self.clock, station_seed(self.sim_seed, self.dev_name, self.offset // 8))
+            else:
+                self.sim = SimulatedAcquisitionService.attach()
+            self.pressure_reader = PressureReader(self.sim.subscription, self.filters)
+            return
+        self.do_out = StationDoOutput(self.dev_name, self.offset)
+        try:
+            self.do_out.open()
+        except Exception:
+            self.do_out = None
+            raise
+
+        try:
+            self.ai_sub = DeviceAcquisitionService.subscribe_channel(
+                self.dev_name, self.offset // 8)
+        except Exception:
+            self.do_out.close()
+            self.do_out = None
+            raise
+        self.pressure_reader = PressureReader(self.ai_sub, self.filters)
+
+    # --- 全速率安全监测: 采集线程上检查每个原始样本，触发时直接写 DO ---
+
+    def start_safety_monitor(self):
+        self.safety = SafetyMonitor(self.max_p, self.max_rise, on_trip=self._on_safety_trip)
+        if self.sim:
+            self.safety_tap = self.sim.tap(self.safety.feed)
+        else:
+            self.safety_tap = DeviceAcquisitionService.tap_channel(
+                self.dev_name, self.offset // 8, self.safety.feed)
+
+    def _write_fail_safe(self):
+        """绕过测试流程直接写入故障安全状态 (可在采集线程内调用)"""
+        with self._do_lock:
+            states = fail_safe_states(self.last_do_states)
+            if self.sim:
+                self.sim.set_do(states)
+            elif self.do_out:
+                try:
+                    self.do_out.write(states)
+                except Exception:
+                    log.warning("写入故障安全状态失败", exc_info=True)
+
+    def _on_safety_trip(self, trip):
+        """在采集线程 (虚拟时钟下为测试线程) 内调用: 立即关断压缩机并报警"""
+        self._write_fail_safe()
+        trip.latency_ms = (time.perf_counter() - trip.detect_t) * 1000.0
+        with self._cond:
+            self._safety_trip = trip
+            self._cond.notify_all()
+
+    def _take_safety_trip(self, note=""):
+        trip, self._safety_trip = self._safety_trip, None
+        if trip is not None:
+            self._emit_log(f"安全监测{note}: {trip.message} "
+                           f"(检测 -> DO 安全状态 {trip.latency_ms:.2f} ms)")
+        return trip
+
+    def _rearm_safety(self):
+        """故障确认后重新允许压缩机动作"""
+        self._take_safety_trip("(暂停期间)")
+        if self.safety:
+            self.safety.rearm()
+
+    # --- DO 看门狗: 测试线程每个 tick 喂狗，主机停顿超时由板卡接管 DO ---
+
+    def start_watchdog(self):
+        if not self.config.get('watchdog', False):
+            return
+        if self.sim:
+            self.watchdog = self.sim.arm_watchdog(self.watchdog_timeout)
+        else:
+            self.watchdog = DeviceWatchdog.arm(self.dev_name, self.offset, self.watchdog_timeout)
+        self._emit_log(f"DO 看门狗: 已启用 (超时 {self.watchdog_timeout:g} s)")
+
+    def _pet_watchdog(self):
+        if self.watchdog is not None and self.watchdog.pet():
+            self._on_watchdog_expired()
+
+    def _on_watchdog_expired(self):
+        self.watchdog_expirations += 1
+        self._emit_log(f"DO 看门狗超时: 测试线程超过 {self.watchdog_timeout:g} s 未响应，"
+                       f"压缩机已被关断")
+        with self._do_lock:
+            # 清除超时后 DO 线恢复由任务控制，立即重新写入故障安全状态
+            self.watchdog.clear()
+            self._write_fail_safe()
+        if not self.fault_triggered:
+            self.trigger_fault("DO 看门狗超时 (主机停顿)")
+
+    def read_pressure(self, silent=False):
+        try:
+            self._pet_watchdog()
+            t0 = time.perf_counter()
+            if self._last_read_t is not None:
+                self.timing.record("loop", t0 - self._last_read_t)
+            self._last_read_t = t0
+            n = self.pressure_reader.read()
+            self.timing.record("read", time.perf_counter() - t0)
+            sub = self.pressure_reader.sub
+            if (sub.overruns, sub.dropped) != self._ai_seen:
+                self._report_ai_gap(sub)
+            if self._safety_trip is not None and not self.fault_triggered:
+                self.trigger_fault(self._take_safety_trip().message)
+            if n == 0:
+                return self._last_pressure
+
+            filtered_p = self.pressure_reader.filtered
+            self._last_pressure = filtered_p
+            if self.trace:
+                self.trace.append(self.clock.time(), filtered_p, self._do_bits)
+
+            if not silent:
+                self._emit_pressure(filtered_p)
+
+            self._update_stats(filtered_p)
+            self._check_safety(filtered_p)
+            return filtered_p
+
+        except Exception:
+            if self.is_running:
+                raise
+            return 0.0
+
+    def _report_ai_gap(self, sub):
+        """采集出现缺口时记录日志，循环照常继续 (滤波值按缺口后的新样本计算)"""
+        overruns, dropped = self._ai_seen
+        if sub.overruns != overruns:
+            self._emit_log(f"AI 缓冲区溢出 (累计 {sub.overruns} 次)，采集任务已自动重启，"
+                           f"累计缺失约 {sub.samples_lost} 个样本")
+        if sub.dropped != dropped:
+            self._emit_log(f"压力读取滞后，订阅缓冲区覆盖了 {sub.dropped - dropped} 个未读样本")
+        self._ai_seen = (sub.overruns, sub.dropped)
+
+    def _log_ai_health(self):
+        h = self.pressure_reader.sub.health()
+        msg = (f"AI 缓冲: 每次读取平均 {h['mean_per_read']:.0f} / 最多 {h['max_per_read']} 个样本, "
+               f"最大积压 {h['max_backlog']}/{h['capacity']}")
+        device = h.get("device")
+        if device:
+            msg += (f", 驱动缓冲区 {device['buffer_s']:.0f} s 最大积压 "
+                    f"{device['max_backlog']}/{device['buffer_samples']}")
+        if h["overruns"] or h["dropped"]:
+            msg += f", 溢出 {h['overruns']} 次 (缺失约 {h['lost']}), 覆盖 {h['dropped']}"
+        self._emit_log(msg)
+
+    def write_do(self, states):
+        if not self.is_running:
+            return
+        self._pet_watchdog()
+        with self._do_lock:
+            if self.sim:
+                self.sim.sync()     # 虚拟时钟: 先让安全监测检查到当前时刻为止的样本
+            self.last_do_states = states
+            if self.safety is not None and self.safety.tripped:
+                # 安全触发后直到故障确认，压缩机保持关断
+                states = fail_safe_states(states)
+
+            self._do_bits = pack_do(states)
+            t0 = time.perf_counter()
+            if self.sim:
+                self.sim.set_do(states)
+            elif self.do_out:
+                try:
+                    self.do_out.write(states)
+                except nidaqmx.DaqError as e:
+                    self._set_state(running=False)
+                    self._emit_event(EVT_ERROR, f"写入硬件失败: {e}")
+                    return
+            self.timing.record("do_write", time.perf_counter() - t0)
+
+    def write_mask(self, mask):
+        self.write_do(MASK_STATES[mask])
+
+    def emergency_shutdown(self):
+        self._do_bits = 0
+        with self._do_lock:
+            if self.sim:
+                self.sim.set_do([False] * 8)
+            elif self.do_out:
+                try:
+                    self.do_out.restart()
+                    self.do_out.write([False] * 8)
+                except Exception:
+                    log.warning("紧急关闭时写入DO失败", exc_info=True)
+                    return
+        if self._stop_t is not None and self.stop_latency_ms is None:
+            self.stop_latency_ms = (time.perf_counter() - self._stop_t) * 1000.0
+            self._emit_log(f"急停响应: {self.stop_latency_ms:.1f} ms (停止请求 -> DO 安全状态)")
+
+    def run_sequence(self, cycle, start=0, reached=0):
+        """按编译好的序列执行一个循环；被停止时返回 False (故障确认后抛 RetryCycleError)
+
+        start/reached 用于续跑: 从第 start 步开始，本阶段已达标 reached 轮。
+        """
+        ctx = runtime_context(cycle, self.target_p, self.floor_p, self.max_p)
+        ops = self.sequence.ops
+        for i in range(start, len(ops)):
+            op = ops[i]
+            if not self.is_running:
+                return False
+            if self.is_paused:
+                self.check_pause_state()
+            kind = op.kind
+            if kind == OP_HOLD:
+                self.write_mask(op.masks[0])
+                if not self.sleep_smart(op.duration):
+                    return False
+            elif kind == OP_TRAIN:
+                if not self._run_train(op):
+                    return False
+            elif kind == OP_STATUS:
+                self._emit_status(op.text.format_map(ctx), "run")
+            elif kind == OP_REGULATE:
+                ok = self._run_regulate(op, ctx)
+                if ok is None:
+                    return False
+                if ok:
+                    reached += 1
+                elif op.args[4]:
+                    self._emit_log(op.args[4].format_map(ctx))
+            elif kind == OP_ROUND:
+                self.step_max_p = 0.0
+                self.step_min_p = 99.9
+                self._mark_phase(cycle, op.text)
+            elif kind == OP_RECORD:
+                self.log_csv(cycle, op.text, op.args[0], self.read_pressure(silent=True))
+                if self.csv_log:
+                    self.csv_log.sync()
+                self._save_checkpoint(cycle, i + 1, reached, f"{op.text} {op.args[0]}")
+            elif kind == OP_MARK:
+                self._mark_phase(cycle, op.text.format_map(ctx))
+            elif kind == OP_PHASE:
+                reached = 0
+            elif kind == OP_REQUIRE:
+                if reached == 0:
+                    self.trigger_fault(op.text.format_map(ctx))
+                    return False
+        return True
+
+    def _run_regulate(self, op, ctx):
+        """限时滞环控制: 打压至高阈值后泄压至低阈值再重新打压；返回是否达标，被停止时返回 None"""
+        charge, release = op.masks
+        high, low, on_high, on_low = op.args[:4]
+        if isinstance(high, str):
+            high = getattr(self, high)
+        if isinstance(low, str):
+            low = getattr(self, low)
+        clock = self.clock
+        reached = releasing = False
+        current = None
+        t_start = clock.time()
+        while clock.time() - t_start < op.duration:
+            if not self.is_running:
+                return None
+            if self.is_paused:
+                self.check_pause_state()
+
+            self._emit_timer(f"{op.duration - (clock.time() - t_start):.1f}")
+            p = self.read_pressure()
+            if not releasing:
+                if p >= high:
+                    reached = releasing = True
+                    if on_high:
+                        self._emit_status(on_high.format_map(ctx), "run")
+                mask = release if releasing else charge
+            else:
+                # 降到低阈值的这个 tick 仍保持泄压，下一个 tick 才重新打压
+                mask = release
+                if p <= low:
+                    releasing = False
+                    if on_low:
+                        self._emit_status(on_low.format_map(ctx), "run")
+            if mask != current:
+                self.write_mask(mask)
+                current = mask
+            self._sleep(SIM_TICK)
+        return reached
+
+    def _run_train(self, op):
+        """连续 DO 步骤: 硬件定时模式下整组交给板卡回放，否则逐步写入并等待"""
+        ok = None
+        if self.hw_timed_do:
+            ok = self._play_pulse_train(op.masks, op.durations)
+        if ok is None:
+            ok = True
+            for mask, duration in zip(op.masks, op.durations):
+                self.write_mask(mask)
+                if not self.sleep_smart(duration):
+                    ok = False
+                    break
+        if not ok:
+            self._write_safe_idle()
+        return ok
+
+    def sleep_smart(self, duration):
+        clock = self.clock
+        start = clock.time()
+        if self._sim_batch and self.is_running:
+            if self.is_paused:
+                self.check_pause_state()
+            self._emit_timer(f"{duration:.1f}")
+            self._sim_wait_batch(duration)
+        while clock.time() - start < duration:
+            if not self.is_running:
+                return False
+            if self.is_paused:
+                self.check_pause_state()
+            self._emit_timer(f"{duration - (clock.time() - start):.1f}")
+            self.read_pressure()
+            self._sleep(SIM_TICK)
+        if not clock.virtual:
+            # 软件定时下步骤 (脉冲) 的实际宽度比名义值多出的部分
+            self.timing.record("step_over", max(0.0, clock.time() - start - duration))
+        self._emit_timer("0.0")
+        return True
+
+    def _sim_wait_batch(self, duration):
+        """极速仿真: 等价于 duration 内逐 tick 的 read_pressure()，一次算完
+
+        预先计算整个等待期的样本，按 tick 分块后向量化滤波 (与逐次读取结果
+        一致)。遇到会触发超限的 tick 时在它之前停下，剩余部分交给逐 tick
+        循环处理，保证故障路径与实时模式一致。
+        """
+        rate = self.sim.sim.rate
+        tick_samples = int(round(SIM_TICK * rate))
+        n = int(np.ceil(duration / SIM_TICK - 1e-9))
+        if n <= 1:
+            return
+        self.read_pressure()    # 先取走积压样本 (阀门动作前后的过渡段)
+        if not self.is_running or self.fault_triggered:
+            return
+        m = n - 1
+        p_true, volts = self.sim.preview(m * tick_samples)
+        hit = self.safety.first_violation(volts)
+        if hit is not None:
+            # 安全监测会在这个 tick 内触发: 交给逐 tick 读取，由监听回调正常处理
+            m = hit[0] // tick_samples
+            if m == 0:
+                return
+            volts = volts[:m * tick_samples]
+        p = self.pressure_reader.filter_blocks(
+            volts.reshape(m, tick_samples), stop_above=self.max_p)
+        k = len(p)
+        if k == 0:
+            return
+        self.sim.commit(k * tick_samples, float(p_true[k * tick_samples - 1]), volts)
+        self._last_pressure = float(p[-1])
+        t = self.clock.time() + SIM_TICK * np.arange(1, k + 1)
+        self.telemetry.add_pressures(t, p)
+        if self.trace:
+            self.trace.append_block(t, p, self._do_bits)
+        self.step_max_p = max(self.step_max_p, float(p.max()))
+        self.step_min_p = min(self.step_min_p, float(p.min()))
+        self.clock.sleep(SIM_TICK * k)
+        self._maybe_flush()
+
+    def finalize_success(self):
+        safe = MASK_STATES[SAFE_IDLE_MASK]
+        with self._do_lock:
+            if self.sim:
+                self.sim.set_do(safe)
+            elif self.do_out:
+                try:
+                    self.do_out.write(safe)
+                except Exception:
+                    log.warning("finalize_success 写入DO失败", exc_info=True)
+
+    def cleanup(self):
+        if self._needs_emergency_shutdown:
+            self.emergency_shutdown()
+            self._needs_emergency_shutdown = False
+        if self.pressure_reader:
+            self._log_ai_health()
+        if self.hw_timing_fallbacks:
+            self._emit_log(f"硬件定时脉冲: {self.hw_timing_fallbacks} 组因 DO 定时引擎被占用改为软件定时")
+
+        if self.safety_tap:
+            self.safety_tap.close()
+            self.safety_tap = None
+        if self.watchdog:
+            try:
+                self.watchdog.close()
+            except Exception:
+                log.warning("cleanup 看门狗关闭失败", exc_info=True)
+            self.watchdog = None
+        if self.safety and self.safety.trips:
+            worst = max(t.latency_ms for t in self.safety.trips)
+            self._emit_log(f"安全监测: 触发 {len(self.safety.trips)} 次, "
+                           f"检测 -> DO 最长 {worst:.2f} ms")
+        self.stop_raw_recording()
+        self.stop_trace_store()
+        if self.csv_log:
+            self.csv_log.close()
+        if self.timing_log:
+            self.timing_log.close()
+        timing = format_timing(self.timing.summary(), sep=", ")
+        if timing:
+            self._emit_log(f"时序统计 (中位数/p99/最大, ms): {timing}")
+
+        if not self.sim_mode and self.do_out:
+            try:
+                states = [False] * 8
+                if self.fault_triggered:
+                    states[7] = True
+                with self._do_lock:
+                    self.do_out.write(states)
+                    self.do_out.close()
+            except Exception:
+                log.warning("cleanup DO 关闭失败", exc_info=True)
+            finally:
+                self.do_out = None
+        if self.ai_sub:
+            try:
+                self.ai_sub.close()
+            except Exception:
+                log.warning("cleanup AI 关闭失败", exc_info=True)
+            finally:
+                self.ai_sub = None
+                self.pressure_reader = None
+        if self.sim:
+            states = [False] * 8
+            if self.fault_triggered:
+                states[7] = True
+            self.sim.set_do(states)
+            self.sim.close()
+            self.sim = None
+            self.pressure_reader = None
+
+    def create_log_file(self):
+        """打开本次运行的日志 (续跑时追加到中断前的文件) 并建立检查点"""
+        group = self.offset // 8
+        if self.resume:
+            ts = self.resume['log_ts']
+            self.csv_file = self.resume['csv_file']
+        else:
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.csv_file = os.path.join(self.log_dir, f"Log_{self.dev_name}_Grp{group}_{ts}.csv")
+        self.log_ts = ts
+        self.csv_log = self._open_csv(
+            self.csv_file, ["Date", "Time", "Cycle", "Phase", "Step", "End_P", "Max_P", "Min_P"])
+        self.timing_log = self._open_csv(
+            os.path.join(self.log_dir, f"Timing_{self.dev_name}_Grp{group}_{ts}.csv"),
+            TIMING_HEADER)
+        self.checkpoint = RunCheckpoint(
+            checkpoint_path(self.log_dir, self.dev_name, group), self.config, group,
+            self.sequence, self.csv_file, ts,
+            started=self.resume.get('started') if self.resume else None)
+
+    def _open_csv(self, path, header):
+        append = bool(self.resume) and os.path.exists(path)
+        return CsvLogWriter.instance().open_log(
+            path, header=None if append else header, append=append)
+
+    def _save_checkpoint(self, cycle, op, reached, label=""):
+        if not self.checkpoint:
+            return
+        try:
+            self.checkpoint.save(cycle, op, reached, label, self.clock.time())
+        except OSError as e:
+            self._emit_log(f"警告: 检查点写入失败: {e}")
+
+    def _dump_timing(self, cycle):
+        """每个循环结束时把本循环的时序统计写入 Timing_*.csv"""
+        rows = self.timing.end_cycle(cycle)
+        if self.timing_log:
+            for row in rows:
+                self.timing_log.write_row(row)
+
+    def start_raw_recording(self):
+        if not self.record_raw:
+            return
+        if self.sim_mode:
+            self._emit_log("仿真模式下没有原始 AI 数据，跳过原始波形记录")
+            return
+        # 续跑时原始波形另起一个文件 (不覆盖中断前的记录)
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S") if self.resume else self.log_ts
+        path = os.path.join(
+            self.log_dir, f"Raw_{self.dev_name}_Grp{self.offset//8}_{ts}.bin")
+        try:
+            self.raw_recorder = RawWaveformRecorder(
+                path, self.dev_name, self.offset // 8, AI_SAMPLE_RATE)
+        except OSError as e:
+            self._emit_log(f"警告: 无法创建原始波形文件: {e}")
+            return
+        self.raw_tap = DeviceAcquisitionService.tap_channel(
+            self.dev_name, self.offset // 8, self.raw_recorder.write_block,
+            self.raw_recorder.mark_gap)
+        self._emit_log(f"原始波形记录: {os.path.basename(path)}")
+
+    def stop_raw_recording(self):
+        if self.raw_tap:
+            self.raw_tap.close()
+            self.raw_tap = None
+        if self.raw_recorder:
+            rec, self.raw_recorder = self.raw_recorder, None
+            rec.close()
+            msg = f"原始波形记录结束: {rec.samples_written} 个样本, {rec.chunks_written} 块"
+            if rec.dropped_blocks:
+                msg += f", 丢弃 {rec.dropped_blocks} 块 (写盘积压)"
+            if rec.samples_missing:
+                msg += f", 时间轴缺口共 {rec.samples_missing} 个样本"
+            self._emit_log(msg)
+
+    def start_trace_store(self):
+        if not self.record_trace:
+            return
+        path = os.path.join(
+            self.log_dir, f"Trace_{self.dev_name}_Grp{self.offset//8}_{self.log_ts}.trc")
+        try:
+            self.trace = TraceStoreWriter(path, self.dev_name, self.offset // 8,
+                                          append=bool(self.resume),
+                                          resume_t=self.resume.get('clock') if self.resume else None)
+        except OSError as e:
+            self._emit_log(f"警告: 无法创建曲线存档: {e}")
+            return
+        self._emit_log(f"曲线存档: {os.path.basename(path)}")
+
+    def stop_trace_store(self):
+        if self.trace:
+            store, self.trace = self.trace, None
+            store.close()
+            msg = f"曲线存档结束: {store.ticks_written} 点, {store.segments_written} 段"
+            if store.dropped_blocks:
+                msg += f", 丢弃 {store.dropped_blocks} 块 (写盘积压)"
+            self._emit_log(msg)
+
+    def _mark_phase(self, cycle, phase):
+        """循环/阶段标记: 原始波形分块与曲线存档分段"""
+        if self.raw_recorder:
+            self.raw_recorder.mark(cycle, phase)
+        if self.trace:
+            self.trace.mark(cycle, phase, self.clock.time())
+
+    def log_csv(self, cycle, phase, step, end_p):
+        if not self.csv_log:
+            return
+        n = datetime.fromtimestamp(self.clock.time())
+        self.csv_log.write_row([
+            n.strftime("%Y-%m-%d"), n.strftime("%H:%M:%S"),
+            cycle, phase, step, f"{end_p:.2f}",
+            f"{self.step_max_p:.2f}", f"{self.step_min_p:.2f}"])
+
+    def _update_stats(self, val):
+        if val > self.step_max_p:
+            self.step_max_p = val
+        if val < self.step_min_p:
+            self.step_min_p = val
+
+    def _check_safety(self, val):
+        # 故障已锁存 (暂停等待确认) 时不再重复触发，否则暂停期间的读数会递归进入 trigger_fault
+        if val > self.max_p and not self.fault_triggered:
+            self.trigger_fault(f"压力超限: {val:.2f} > {self.max_p}")
+
+    def _write_safe_idle(self):
+        self.write_mask(SAFE_IDLE_MASK)
+
+    def _play_pulse_train(self, masks, durations):
+        """硬件定时模式: 脉冲序列编译为缓冲波形由板卡输出，线程只等待回放完成
+
+        同一设备的 DO 定时引擎被其他台架占用时返回 None，本组由调用方软件定时输出。
+        """
+        total = sum(durations)
+        key = (masks, durations)
+        waveform = self._waveforms.get(key)
+        if waveform is None:
+            waveform = self._waveforms[key] = compile_pulse_train(masks, durations)
+        try:
+            with self._do_lock:
+                if self.safety is not None and self.safety.tripped:
+                    # 安全触发后不再启动压缩机脉冲，等待测试线程进入故障流程
+                    self.write_do(MASK_STATES[masks[-1]])
+                    return self.is_running
+                self.do_out.start_waveform(waveform)
+        except DoTimingBusy as e:
+            self.hw_timing_fallbacks += 1
+            if self.hw_timing_fallbacks == 1:
+                self._emit_log(f"硬件定时脉冲: {e}，本组改为软件定时 (之后同类情况只计数)")
+            return None
+        except nidaqmx.DaqError as e:
+            self._set_state(running=False)
+            self._emit_event(EVT_ERROR, f"硬件定时脉冲启动失败: {e}")
+            return False
+        self.last_do_states = MASK_STATES[masks[-1]]
+        self._do_bits = pack_do(self.last_do_states)
+
+        completed = False
+        try:
+            t_start = self.clock.time()
+            while True:
+                with self._do_lock:
+                    if self.do_out.waveform_done():
+                        break
+                if not self.is_running:
+                    return False
+                if self.is_paused:
+                    self.check_pause_state()
+                self._emit_timer(f"{max(0.0, total - (self.clock.time() - t_start)):.1f}")
+                self.read_pressure()
+                self._sleep(0.05)
+            completed = True
+        finally:
+            with self._do_lock:
+                if self.do_out.waveform_active:
+                    final = self.last_do_states if completed else [False] * 8
+                    try:
+                        self.do_out.finish_waveform(final)
+                    except nidaqmx.DaqError as e:
+                        self._set_state(running=False)
+                        self._emit_event(EVT_ERROR, f"写入硬件失败: {e}")
+        self._emit_timer("0.0")
+        return self.is_running
+
+
+# ============================================================================
+# [SECTION 4] 无界面运行器 (Headless Runner)
+# ============================================================================
+
+def load_station_configs(path, simulation=None, sim_speed=1):
+    """读取 JSON 配置，返回 [(名称, engine config, group_offset)]"""
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    defaults = doc.get("defaults", {})
+    sim = doc.get("simulation", False) if simulation is None else simulation
+    stations = doc.get("stations", [])
+    if not stations:
+        raise ValueError("配置文件中没有 stations")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    sequences = {}      # 相同的序列定义只编译一次
+
+    def get_sequence(spec):
+        key = json.dumps(spec, sort_keys=True)
+        if key not in sequences:
+            if isinstance(spec, str):
+                seq_path = os.path.join(base_dir, spec)
+                try:
+                    sequences[key] = load_sequence(seq_path)
+                except OSError as e:
+                    raise ValueError(f"无法读取序列文件 {seq_path}: {e}")
+            else:
+                sequences[key] = compile_sequence(spec)
+        return sequences[key]
+
+    out = []
+    seen = set()
+    for i, st in enumerate(stations):
+        merged = dict(defaults)
+        merged.update(st)
+        dev = str(merged.get("device", "")).strip()
+        if not dev:
+            raise ValueError(f"第 {i + 1} 个台架缺少 device")
+        group = validate_positive_int(merged.get("group", 0), "group", 0, 3)
+        if (dev, group) in seen:
+            raise ValueError(f"台架重复: {dev} Grp{group}")
+        seen.add((dev, group))
+        try:
+            cycles, target_p, floor_p, max_p = validate_test_params(
+                merged.get("cycles"), merged.get("target_p"),
+                merged.get("floor_p"), merged.get("max_p"))
+            sequence = get_sequence(merged.get("sequence"))
+            filters = merged.get("filters", DEFAULT_FILTER)
+            build_pipeline(filters)
+            watchdog_timeout = validate_positive_float(
+                merged.get("watchdog_timeout", DO_WATCHDOG_TIMEOUT), "看门狗超时", 0.5, 60.0)
+        except ValueError as e:
+            raise ValueError(f"{dev} Grp{group}: {e}")
+        cfg = {
+            'device': dev, 'cycles': cycles, 'target_p': target_p,
+            'floor_p': floor_p, 'max_p': max_p, 'simulation': sim,
+            'sim_speed': sim_speed if sim else 1,
+            'hw_timed_do': bool(merged.get("hw_timed_do", False)),
+            'frame_hz': merged.get("frame_hz", TELEMETRY_FRAME_HZ),
+            'record_raw': bool(merged.get("record_raw", False)),
+            'record_trace': bool(merged.get("record_trace", True)),
+            'sim_seed': int(merged.get("sim_seed", SIM_SEED)),
+            'max_rise': float(merged.get("max_rise", SAFETY_MAX_RISE)),
+            'watchdog': bool(merged.get("watchdog", False)),
+            'watchdog_timeout': watchdog_timeout,
+            'filters': filters,
+            'sequence': sequence,
+        }
+        out.append((merged.get("name") or f"{dev}_Grp{group}", cfg, group * 8))
+    return out
+
+
+class HeadlessRunner:
+    """在后台线程中运行多个 TestEngine，并把事件打印为文本或 JSON 行"""
+
+    def __init__(self, stations, log_dir, jsonl=False, verbose=False,
+                 on_fault="stop", max_retries=3, out=None):
+        self.log_dir = log_dir
+        self.jsonl = jsonl
+        self.verbose = verbose
+        self.on_fault = on_fault
+        self.max_retries = max_retries
+        self._retries = {}          # 台架 -> 当前循环已自动重跑的次数
+        self.out = out or sys.stdout
+        self._print_lock = threading.Lock()
+        self._faulted = []          # 等待主线程处理的故障暂停 (回调中不能直接复位)
+        self._wake = threading.Event()  # 故障暂停 / 台架结束时唤醒主线程
+        self._finished = set()
+        self._stopped = set()       # 因故障被停止的台架: 结束后删除检查点 (不再续跑)
+        self.engines = []
+        self.results = {}
+        self.progress = {}
+        for name, cfg, offset in stations:
+            eng = TestEngine(cfg, offset, log_dir,
+                             on_event=lambda k, p, n=name: self._on_event(n, k, p))
+            self.engines.append((name, eng))
+        self._engines_by_name = dict(self.engines)
+
+    def _write(self, name, kind, text=None, **fields):
+        with self._print_lock:
+            if self.jsonl:
+                rec = {"t": round(time.time(), 3), "station": name, "event": kind}
+                if text is not None:
+                    rec["msg"] = text
+                rec.update(fields)
+                self.out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            else:
+                stamp = datetime.now().strftime("%H:%M:%S")
+                self.out.write(f"[{stamp}] [{name}] {text}\n")
+            self.out.flush()
+
+    def _on_event(self, name, kind, payload):
+        if kind == EVT_FRAME:
+            for m in payload.logs:
+                self._write(name, "log", m)
+            if self.verbose and payload.status is not None:
+                self._write(name, "status", payload.status[0], style=payload.status[1])
+            if self.jsonl and self.verbose and len(payload.p):
+                self._write(name, "pressure", p=float(payload.p[-1]), timer=payload.timer)
+        elif kind == EVT_PROGRESS:
+            self.progress[name] = payload
+            self._retries[name] = 0
+            self._write(name, "progress", f"循环 {payload} 完成", cycle=payload)
+        elif kind == EVT_ERROR:
+            self._write(name, "error", f"故障: {payload}")
+        elif kind == EVT_FAULT_PAUSE:
+            self._faulted.append(name)
+            self._wake.set()
+        elif kind == EVT_RESULT:
+            self.results[name] = payload
+            fields = {}
+            latency = self._engines_by_name[name].stop_latency_ms
+            if latency is not None:
+                fields["stop_latency_ms"] = round(latency, 2)
+            self._write(name, "result", "完成" if payload else "未完成", success=payload, **fields)
+        elif kind == EVT_FINISHED:
+            self._finished.add(name)
+            self._wake.set()
+
+    def _handle_fault(self, name, engines):
+        eng = engines[name]
+        n = self._retries.get(name, 0)
+        if self.on_fault == "retry" and n < self.max_retries:
+            self._retries[name] = n + 1
+            self._write(name, "fault",
+                        f"故障暂停 -> 自动复位并重跑当前循环 ({n + 1}/{self.max_retries})")
+            eng.set_pause(False)
+        else:
+            self._write(name, "fault", "故障暂停 -> 停止该台架")
+            eng.stop()
+            self._stopped.add(name)
+
+    def run(self):
+        """运行全部台架直到结束；Ctrl+C 触发所有台架紧急停止"""
+        threads = []
+        for name, eng in self.engines:
+            t = threading.Thread(target=eng.run, name=f"Engine-{name}", daemon=True)
+            t.start()
+            threads.append(t)
+        engines = self._engines_by_name
+        try:
+            while len(self._finished) < len(threads) and any(t.is_alive() for t in threads):
+                # 超时只用于保持 Ctrl+C 响应 (Windows 上无超时的等待不可中断)
+                self._wake.wait(0.5)
+                self._wake.clear()
+                while self._faulted:
+                    self._handle_fault(self._faulted.pop(0), engines)
+            for t in threads:
+                t.join(timeout=1.0)
+            for name in self._stopped:
+                eng = engines[name]
+                if eng.checkpoint:
+                    eng.checkpoint.discard()
+        except KeyboardInterrupt:
+            self._write("-", "stop", "收到中断信号，正在停止全部台架...")
+            for _, eng in self.engines:
+                eng.stop()
+            for t in threads:
+                t.join(timeout=10.0)
+        return all(self.results.get(name) for name, _ in self.engines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="压缩机寿命测试 - 无界面运行器")
+    parser.add_argument("config", help="台架配置文件 (JSON)")
+    parser.add_argument("--log-dir", help="日志目录 (默认取配置文件中的 log_dir 或当前目录)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--sim", action="store_true", help="强制仿真模式")
+    mode.add_argument("--hw", action="store_true", help="强制硬件模式")
+    parser.add_argument("--speed", default="1",
+                        help="仿真倍速: 数字或 max (极速)，默认 1")
+    parser.add_argument("--on-fault", choices=("stop", "retry"), default="stop",
+                        help="故障暂停时的处理: 停止该台架或自动重跑当前循环")
+    parser.add_argument("--max-retries", type=int, default=3,
+                        help="--on-fault retry 时同一循环最多自动重跑的次数，超过则停止该台架")
+    parser.add_argument("--resume", action="store_true",
+                        help="日志目录中有中断运行的检查点时，从最后完成的一轮继续")
+    parser.add_argument("--jsonl", action="store_true", help="以 JSON 行输出事件 (便于程序解析)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="同时输出状态变化")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    speed = None if args.speed.lower() == "max" else float(args.speed)
+    simulation = True if args.sim else (False if args.hw else None)
+    try:
+        stations = load_station_configs(args.config, simulation, speed)
+        with open(args.config, "r", encoding="utf-8") as f:
+            cfg_log_dir = json.load(f).get("log_dir")
+    except (OSError, ValueError) as e:
+        print(f"配置错误: {e}", file=sys.stderr)
+        return 2
+    log_dir = args.log_dir or cfg_log_dir or os.getcwd()
+    os.makedirs(log_dir, exist_ok=True)
+
+    # 续跑: 检查点中的进度与日志路径，台架配置仍取自本次的配置文件
+    for name, cfg, offset in stations:
+        path = checkpoint_path(log_dir, cfg['device'], offset // 8)
+        if not os.path.exists(path):
+            continue
+        if not args.resume:
+            print(f"{name}: 存在中断运行的检查点，本次为新运行 (续跑请加 --resume)", file=sys.stderr)
+            continue
+        try:
+            cfg['resume'] = load_checkpoint(path)
+        except (OSError, ValueError) as e:
+            print(f"{name}: 无法续跑: {e}", file=sys.stderr)
+            return 2
+
+    # SIGTERM 与 Ctrl+C 同样处理 (服务/计划任务停止时安全关闭 DO)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    runner = HeadlessRunner(stations, log_dir, jsonl=args.jsonl,
+                            verbose=args.verbose, on_fault=args.on_fault,
+                            max_retries=args.max_retries)
+    ok = runner.run()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
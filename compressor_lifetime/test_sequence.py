@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : test_sequence.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    声明式测试序列: 一个循环的时序用数据 (dict / JSON) 描述，编译一次成为
+    不可变的步骤表，由 TestEngine.run_sequence() 通用执行。
+
+    序列节点 (steps 列表中的每一项):
+      {"do": ["V1", "COMP"], "duration": 1.0}     保持 DO 状态并监测压力
+      {"train": [节点...]}                         连续 DO 步骤 (可硬件定时回放)
+      {"regulate": {...}, "duration": 90.0}       限时的压力滞环控制 (打压/泄压)
+      {"repeat": 9, "steps": [节点...]}            重复块，文本中 {i} 为序号
+      {"phase": "Phase_2", "rounds": 30, ...}     阶段: 每轮记录一行 CSV
+      {"status": "文本"} / {"mark": "文本"}        状态栏文本 / 原始波形标记
+
+    DO 状态编译为 8 位掩码 (bit n = line n)，运行时查表得到状态元组，
+    不再逐步构造 [False] * 8 列表。文本中的 {label} {round} {rounds} {i}
+    在编译时展开，{cycle} {target_p} {floor_p} {max_p} 在运行时填入。
+
+    命令行: python test_sequence.py show [profile.json]  打印编译结果与时间线
+==============================================================================
+"""
+
+import sys
+import json
+import argparse
+from collections import namedtuple
+
+# ============================================================================
+# [SECTION 1] DO 线与掩码 (DO Lines & Masks)
+# ============================================================================
+
+DO_LINES = {
+    "V1": 0, "V2": 1, "V3": 2, "COMP": 3,
+    "GAUGE_PWR": 4, "COUNTER_PWR": 5, "COUNTER": 6, "ALARM": 7,
+}
+
+# 掩码 -> 8 路 DO 状态元组 (预先生成，运行时只查表)
+MASK_STATES = tuple(tuple(bool(m >> i & 1) for i in range(8)) for m in range(256))
+
+PRESSURE_PARAMS = ("target_p", "floor_p", "max_p")
+
+
+def do_mask(lines):
+    """DO 线名称/编号列表 -> 掩码"""
+    m = 0
+    for line in lines:
+        if isinstance(line, str):
+            if line not in DO_LINES:
+                raise ValueError(f"未知的 DO 线: {line}")
+            line = DO_LINES[line]
+        if not isinstance(line, int) or not 0 <= line < 8:
+            raise ValueError(f"DO 线编号超出范围: {line}")
+        m |= 1 << line
+    return m
+
+
+def states_mask(states):
+    """8 路状态列表 -> 掩码"""
+    m = 0
+    for i, on in enumerate(states[:8]):
+        if on:
+            m |= 1 << i
+    return m
+
+
+SAFE_IDLE_MASK = do_mask(["GAUGE_PWR", "COUNTER_PWR"])   # 阀门/压缩机全关，仅保留供电
+
+
+def mask_names(mask):
+    return "+".join(name for name, i in DO_LINES.items() if mask >> i & 1) or "-"
+
+
+# ============================================================================
+# [SECTION 2] 默认序列 (Standard Profile)
+# ============================================================================
+
+_SUPPLY = ["GAUGE_PWR", "COUNTER_PWR"]
+
+
+def _release_57s():
+    return [
+        {"status": "{label}: 泄压 (V2+V3)"},
+        {"do": ["V2", "V3"] + _SUPPLY, "duration": 20.0},
+        {"status": "{label}: 泄压 (V1)"},
+        {"do": ["V1"] + _SUPPLY, "duration": 37.0},
+    ]
+
+
+DEFAULT_SEQUENCE = {
+    "name": "标准寿命循环",
+    "steps": [
+        {"phase": "Phase_1", "rounds": 1, "label": "P1 ({round}/{rounds})", "mark": "Phase_1",
+         "require_reached": "故障: 阶段一循环均未达到目标压力 {target_p} Bar",
+         "steps": [
+             {"status": "{label}: 初始加压"},
+             {"regulate": {"charge": ["V1", "COMP"] + _SUPPLY,
+                           "release": ["V2", "V3", "COMP"] + _SUPPLY,
+                           "high": "target_p", "low": "floor_p",
+                           "on_high": "{label}: 达标泄压", "on_low": "{label}: 重新打压"},
+              "duration": 90.0,
+              "warn": "警告: P1 第 {round} 次循环未达到目标压力"},
+         ] + _release_57s()},
+        {"phase": "Phase_2", "rounds": 30, "label": "P2 ({round}/{rounds})",
+         "mark": "Phase_2/{round}",
+         "steps": [
+             {"repeat": 9, "steps": [
+                 {"status": "{label}: 脉冲 {i}/10"},
+                 {"train": [{"do": ["V1", "COMP"] + _SUPPLY, "duration": 1.0},
+                            {"do": ["V1"] + _SUPPLY, "duration": 1.0}]},
+             ]},
+             {"status": "{label}: 脉冲 10/10"},
+             {"train": [
+                 {"repeat": 5, "steps": [
+                     {"do": ["V1", "V3", "COMP"] + _SUPPLY, "duration": 0.1},
+                     {"do": ["V1", "COMP"] + _SUPPLY, "duration": 0.1}]},
+                 {"repeat": 5, "steps": [
+                     {"do": ["V1", "V3"] + _SUPPLY, "duration": 0.1},
+                     {"do": ["V1"] + _SUPPLY, "duration": 0.1}]},
+             ]},
+         ] + _release_57s()},
+        {"status": "循环 {cycle}: 计数器触发"},
+        {"mark": "Counter"},
+        {"do": ["V2", "V3", "COUNTER"] + _SUPPLY, "duration": 1.0},
+    ],
+}
+
+
+# ============================================================================
+# [SECTION 3] 编译 (Compiler)
+# ============================================================================
+
+OP_STATUS = "status"        # text
+OP_MARK = "mark"            # text: 原始波形标记
+OP_PHASE = "phase"          # 阶段开始: 清零达标计数
+OP_ROUND = "round"          # 一轮开始: 检查暂停、清零统计、原始波形标记 text
+OP_HOLD = "hold"            # masks[0] 保持 duration
+OP_TRAIN = "train"          # masks/durations 连续输出
+OP_REGULATE = "regulate"    # masks = (打压, 泄压)，args = (高阈值, 低阈值, 达标文本, 重新打压文本, 未达标警告)
+OP_RECORD = "record"        # text = 阶段名, args = (步骤文本,)：写一行 CSV
+OP_REQUIRE = "require"      # 阶段内没有任何 regulate 达标时触发故障 text
+
+SeqOp = namedtuple("SeqOp", "kind t0 duration masks durations text args")
+
+
+class _KeepMissing(dict):
+    """format_map 时保留未知占位符 (留到运行时填入)"""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def fill(text, ctx):
+    return text.format_map(_KeepMissing(ctx))
+
+
+def runtime_context(cycle, target_p, floor_p, max_p):
+    """运行时文本占位符 (供 str.format_map 使用)"""
+    return _KeepMissing(cycle=cycle, target_p=target_p, floor_p=floor_p, max_p=max_p)
+
+
+class CompiledSequence:
+    """编译后的序列: ops 为 SeqOp 元组，t0 为各步在循环内的起始时间 (s)"""
+
+    def __init__(self, name, ops):
+        self.name = name
+        self.ops = tuple(ops)
+        self.total_duration = sum(op.duration for op in self.ops)
+        self.trains = sum(1 for op in self.ops if op.kind == OP_TRAIN)
+        self.do_steps = sum(len(op.masks) for op in self.ops if op.kind in (OP_HOLD, OP_TRAIN))
+
+    def __len__(self):
+        return len(self.ops)
+
+
+def _duration(node, where):
+    d = node.get("duration")
+    if isinstance(d, bool) or not isinstance(d, (int, float)) or d <= 0:
+        raise ValueError(f"{where}: duration 必须为正数")
+    return float(d)
+
+
+def _threshold(value, where):
+    if isinstance(value, str):
+        if value not in PRESSURE_PARAMS:
+            raise ValueError(f"{where}: 阈值应为数值或 {'/'.join(PRESSURE_PARAMS)}")
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{where}: 阈值应为数值或 {'/'.join(PRESSURE_PARAMS)}")
+    return float(value)
+
+
+def _repeat_count(node, key, where):
+    n = node.get(key)
+    if isinstance(n, bool) or not isinstance(n, int) or n < 1:
+        raise ValueError(f"{where}: {key} 必须为正整数")
+    return n
+
+
+class _Compiler:
+    def __init__(self):
+        self.ops = []
+        self.t = 0.0
+
+    def emit(self, kind, duration=0.0, masks=(), durations=(), text="", args=()):
+        self.ops.append(SeqOp(kind, self.t, duration, tuple(masks), tuple(durations), text, args))
+        self.t += duration
+
+    def mask(self, lines, where):
+        if not isinstance(lines, list):
+            raise ValueError(f"{where}: DO 状态必须为线名称/编号列表")
+        try:
+            return do_mask(lines)
+        except ValueError as e:
+            raise ValueError(f"{where}: {e}") from None
+
+    def steps(self, nodes, ctx, where):
+        if not isinstance(nodes, list):
+            raise ValueError(f"{where}: steps 必须为列表")
+        for i, node in enumerate(nodes):
+            self.node(node, ctx, f"{where}[{i}]")
+
+    def train_steps(self, nodes, ctx, where, out):
+        """train 内只允许 do 与 repeat，展开成 (mask, duration) 列表"""
+        if not isinstance(nodes, list):
+            raise ValueError(f"{where}: train 必须为列表")
+        for i, node in enumerate(nodes):
+            w = f"{where}[{i}]"
+            if not isinstance(node, dict):
+                raise ValueError(f"{w}: 步骤必须为对象")
+            if "repeat" in node:
+                for _ in range(_repeat_count(node, "repeat", w)):
+                    self.train_steps(node.get("steps"), ctx, f"{w}.steps", out)
+            elif "do" in node:
+                out.append((self.mask(node["do"], w), _duration(node, w)))
+            else:
+                raise ValueError(f"{w}: train 内只允许 do / repeat 步骤")
+
+    def node(self, node, ctx, where):
+        if not isinstance(node, dict):
+            raise ValueError(f"{where}: 步骤必须为对象")
+        if "phase" in node:
+            self.phase(node, ctx, where)
+        elif "repeat" in node:
+            for i in range(1, _repeat_count(node, "repeat", where) + 1):
+                self.steps(node.get("steps"), dict(ctx, i=i), f"{where}.steps")
+        elif "train" in node:
+            pulses = []
+            self.train_steps(node["train"], ctx, f"{where}.train", pulses)
+            if not pulses:
+                raise ValueError(f"{where}: train 为空")
+            masks, durations = zip(*pulses)
+            self.emit(OP_TRAIN, sum(durations), masks, durations)
+        elif "regulate" in node:
+            r = node["regulate"]
+            if not isinstance(r, dict):
+                raise ValueError(f"{where}: regulate 必须为对象")
+            high = _threshold(r.get("high", "target_p"), where)
+            low = _threshold(r.get("low", "floor_p"), where)
+            self.emit(OP_REGULATE, _duration(node, where),
+                      (self.mask(r.get("charge", []), where), self.mask(r.get("release", []), where)),
+                      args=(high, low, fill(r.get("on_high", ""), ctx),
+                            fill(r.get("on_low", ""), ctx), fill(node.get("warn", ""), ctx)))
+        elif "do" in node:
+            d = _duration(node, where)
+            self.emit(OP_HOLD, d, (self.mask(node["do"], where),), (d,))
+        elif "status" in node:
+            self.emit(OP_STATUS, text=fill(str(node["status"]), ctx))
+        elif "mark" in node:
+            self.emit(OP_MARK, text=fill(str(node["mark"]), ctx))
+        else:
+            raise ValueError(f"{where}: 无法识别的步骤 {sorted(node)}")
+
+    def phase(self, node, ctx, where):
+        name = str(node["phase"])
+        rounds = _repeat_count(node, "rounds", where) if "rounds" in node else 1
+        self.emit(OP_PHASE, text=name)
+        for r in range(1, rounds + 1):
+            c = dict(ctx, phase=name, round=r, rounds=rounds)
+            c["label"] = fill(node.get("label", "{phase} ({round}/{rounds})"), c)
+            self.emit(OP_ROUND, text=fill(node.get("mark", "{phase}/{round}"), c))
+            self.steps(node.get("steps"), c, f"{where}.steps")
+            self.emit(OP_RECORD, text=name, args=(fill("{round}/{rounds} Done", c),))
+        if node.get("require_reached"):
+            self.emit(OP_REQUIRE, text=fill(str(node["require_reached"]), ctx))
+
+
+def compile_sequence(spec=None):
+    """序列定义 (dict，默认 DEFAULT_SEQUENCE) -> CompiledSequence；定义有误时抛 ValueError"""
+    if spec is None:
+        spec = DEFAULT_SEQUENCE
+    if not isinstance(spec, dict):
+        raise ValueError("序列定义必须为对象")
+    c = _Compiler()
+    c.steps(spec.get("steps"), {}, "steps")
+    if not any(op.kind in (OP_HOLD, OP_TRAIN, OP_REGULATE) for op in c.ops):
+        raise ValueError("序列中没有任何 DO 步骤")
+    return CompiledSequence(str(spec.get("name", "自定义序列")), c.ops)
+
+
+def load_sequence(path):
+    """从 JSON 文件读取序列定义并编译"""
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_sequence(json.load(f))
+
+
+# ============================================================================
+# [SECTION 4] 命令行 (CLI)
+# ============================================================================
+
+def format_timeline(seq, out=sys.stdout):
+    print(f"序列: {seq.name}", file=out)
+    print(f"步骤 {len(seq)} 个, DO 步骤 {seq.do_steps} 个 (脉冲序列 {seq.trains} 组), "
+          f"单循环时长 {seq.total_duration:.1f} s ({seq.total_duration / 60:.1f} min)", file=out)
+    for i, op in enumerate(seq.ops):
+        if op.kind == OP_HOLD:
+            desc = f"{mask_names(op.masks[0])} {op.duration:g} s"
+        elif op.kind == OP_TRAIN:
+            desc = f"{len(op.masks)} 步, {op.duration:g} s"
+        elif op.kind == OP_REGULATE:
+            desc = (f"打压 {mask_names(op.masks[0])} / 泄压 {mask_names(op.masks[1])}, "
+                    f"{op.args[1]} ~ {op.args[0]}, {op.duration:g} s")
+        elif op.kind == OP_RECORD:
+            desc = f"{op.text} {op.args[0]}"
+        else:
+            desc = op.text
+        print(f"{i:5d} {op.t0:8.1f}  {op.kind:<8} {desc}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测试序列编译与检查")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_show = sub.add_parser("show", help="编译序列并打印时间线")
+    p_show.add_argument("profile", nargs="?", help="序列定义 JSON (默认: 标准寿命循环)")
+    p_dump = sub.add_parser("dump", help="输出默认序列定义 (JSON)，可作为自定义序列的模板")
+    p_dump.add_argument("-o", "--output", help="输出文件 (默认: 标准输出)")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "dump":
+        text = json.dumps(DEFAULT_SEQUENCE, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+        return 0
+
+    try:
+        seq = load_sequence(args.profile) if args.profile else compile_sequence()
+    except (OSError, ValueError) as e:
+        print(f"序列错误: {e}", file=sys.stderr)
+        return 2
+    format_timeline(seq)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
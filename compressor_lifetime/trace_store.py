@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+模块名称 (Module)    : trace_store.py
+所属项目 (Project)   : Compressor Lifetime Test System (压缩机寿命耐久测试系统)
+
+功能描述 (Description):
+    每次运行的滤波压力曲线存档 (只追加的本地时序存储，库 + 命令行)。
+
+    测试线程每个 tick 记录一个点: 时间戳、滤波后压力、DO 状态 (8 位掩码)；
+    循环/阶段标记写入分段索引。后台写盘线程同时把数据汇总为 1 s 与 1 min
+    两级 min/max/mean 汇总文件，用于整场测试的概览。按 循环/阶段 查询时
+    只读索引 (每段一条记录) 和对应的连续数据区，不扫描整个文件。
+
+    文件格式 (小端，均为定长记录，可直接 np.fromfile):
+      Trace_*.trc   文件头 (FILE_HEADER, 256 字节) + TICK_DTYPE 记录
+      Trace_*.idx   每个 循环/阶段 一条 SEGMENT_DTYPE 记录 (标记时写入，
+                    段长由下一段起点或文件末尾得出，异常退出后仍可读)
+      Trace_*.t1s   1 s 汇总 (ROLLUP_DTYPE)
+      Trace_*.t1m   1 min 汇总 (ROLLUP_DTYPE)
+
+    数据量参考: 10 Hz 约 130 B/s，10 天约 110 MB (1 s 汇总约 22 MB)。
+
+    用法:
+      python trace_store.py info Trace_Dev1_Grp0_xxx.trc
+      python trace_store.py export Trace_Dev1_Grp0_xxx.trc --cycle 3 [--phase Phase_1] -o c3.csv
+==============================================================================
+"""
+
+import os
+import sys
+import csv
+import time
+import queue
+import struct
+import logging
+import argparse
+import threading
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# ============================================================================
+# [SECTION 1] 文件格式 (File Format)
+# ============================================================================
+
+FILE_MAGIC = b"CLTRC001"
+FILE_HEADER = struct.Struct("<8sHd32sH204x")    # magic, version, start_time, device, group
+FORMAT_VERSION = 1
+
+TICK_DTYPE = np.dtype([("t", "<f8"), ("p", "<f4"), ("do", "u1")])
+SEGMENT_DTYPE = np.dtype([("cycle", "<u4"), ("phase", "S16"), ("first", "<u8"), ("t0", "<f8")])
+ROLLUP_DTYPE = np.dtype([
+    ("t", "<f8"), ("n", "<u4"), ("p_min", "<f4"), ("p_max", "<f4"), ("p_mean", "<f4"),
+    ("do", "u1"),
+])
+
+TIERS = (("1s", ".t1s", 1.0), ("1m", ".t1m", 60.0))   # (名称, 扩展名, 桶宽 s)
+
+STAGE_TICKS = 64                # 调用线程攒够这么多点才入队一次 (10 Hz 下约 6 s)
+FLUSH_INTERVAL = 2.0            # 写盘线程 flush 间隔 (s)
+QUEUE_MAX_BLOCKS = 20000        # 写盘线程积压上限，超过则丢块并计数
+
+
+def pack_do(states):
+    """DO 状态列表 -> 8 位掩码 (bit i 对应组内第 i 条线)"""
+    bits = 0
+    for i, on in enumerate(states):
+        if on:
+            bits |= 1 << i
+    return bits
+
+
+def _open_records(path, offset, itemsize, append):
+    """打开定长记录文件写入；append 时截掉末尾未写完的半条记录，返回 (文件, 已有条数)"""
+    if not (append and os.path.exists(path)):
+        return open(path, "wb"), 0
+    f = open(path, "r+b")
+    n = max(0, (f.seek(0, os.SEEK_END) - offset) // itemsize)
+    _truncate_records(f, offset, itemsize, n)
+    return f, n
+
+
+def _truncate_records(f, offset, itemsize, n):
+    f.truncate(offset + n * itemsize)
+    f.seek(0, os.SEEK_END)
+
+
+def tier_path(path, tier):
+    for name, ext, _ in TIERS:
+        if name == tier:
+            return os.path.splitext(path)[0] + ext
+    raise ValueError(f"未知的汇总级别: {tier}")
+
+
+# ============================================================================
+# [SECTION 2] 写入 (Writer)
+# ============================================================================
+
+class _Rollup:
+    """一级时间汇总: 按 floor(t / width) 分桶，桶结束时追加一条记录"""
+
+    def __init__(self, path, width, append=False):
+        self.width = width
+        self.file, self.rows = _open_records(path, 0, ROLLUP_DTYPE.itemsize, append)
+        self._key = None
+        self._n = 0
+        self._min = self._max = self._sum = 0.0
+        self._do = 0
+
+    def add(self, ticks):
+        t, p, do = ticks["t"], ticks["p"], ticks["do"]
+        keys = np.floor(t / self.width)
+        starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+        counts = np.diff(np.append(starts, len(t)))
+        mins = np.minimum.reduceat(p, starts)
+        maxs = np.maximum.reduceat(p, starts)
+        sums = np.add.reduceat(p.astype(np.float64), starts)
+        dos = np.bitwise_or.reduceat(do, starts)
+
+        # 第一组可能接续上一批未结束的桶；最后一组留作新的未结束桶
+        first = 0
+        if self._n and keys[0] == self._key:
+            self._n += int(counts[0])
+            self._min = min(self._min, float(mins[0]))
+            self._max = max(self._max, float(maxs[0]))
+            self._sum += float(sums[0])
+            self._do |= int(dos[0])
+            if len(starts) == 1:
+                return
+            first = 1
+        if self._n:
+            self._write(np.array([self._row()], dtype=ROLLUP_DTYPE))
+        done = slice(first, -1)
+        if len(starts) - 1 > first:
+            rows = np.empty(len(starts) - 1 - first, dtype=ROLLUP_DTYPE)
+            rows["t"] = keys[starts[done]] * self.width
+            rows["n"] = counts[done]
+            rows["p_min"] = mins[done]
+            rows["p_max"] = maxs[done]
+            rows["p_mean"] = sums[done] / counts[done]
+            rows["do"] = dos[done]
+            self._write(rows)
+        self._key = keys[starts[-1]]
+        self._n = int(counts[-1])
+        self._min, self._max, self._sum = float(mins[-1]), float(maxs[-1]), float(sums[-1])
+        self._do = int(dos[-1])
+
+    def _row(self):
+        return (self._key * self.width, self._n, self._min, self._max,
+                self._sum / self._n, self._do)
+
+    def _write(self, rows):
+        self.file.write(rows.tobytes())
+        self.rows += len(rows)
+
+    def rewind(self, path, ticks, resume_t):
+        """续跑: 去掉从 resume_t 所在桶开始的记录，用保留的 tick 重建未结束的桶"""
+        start = np.floor(resume_t / self.width) * self.width
+        rows_t = _read_records(path, ROLLUP_DTYPE)["t"]
+        self.rows = int(np.searchsorted(rows_t, start, side="left"))
+        _truncate_records(self.file, 0, ROLLUP_DTYPE.itemsize, self.rows)
+        tail = ticks[np.searchsorted(ticks["t"], start, side="left"):]
+        if len(tail):
+            self.add(tail)
+
+    def close(self):
+        """写出未结束的最后一个桶"""
+        if self._n:
+            self._write(np.array([self._row()], dtype=ROLLUP_DTYPE))
+            self._n = 0
+        self.file.close()
+
+
+class TraceStoreWriter:
+    """单台架的曲线存档: append()/mark() 只在调用线程攒批和入队，后台线程写盘
+
+    append=True 时接着已有的存档写 (中断后续跑)，各文件末尾的半条记录被截掉；
+    resume_t 为检查点的时钟时刻，之后写入的点 (续跑时会重新执行) 连同对应的
+    索引与汇总一起去掉，时间轴保持单调。
+    """
+
+    def __init__(self, path, device, group, append=False, resume_t=None):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".idx"
+        self.device = device
+        self.group = group
+        self.start_time = time.time()
+
+        self.dropped_blocks = 0
+
+        if append and os.path.exists(path):
+            with open(path, "rb") as f:
+                append = f.read(len(FILE_MAGIC)) == FILE_MAGIC
+        else:
+            append = False
+
+        self._queue = queue.Queue(maxsize=QUEUE_MAX_BLOCKS)
+        self._file, self.ticks_written = _open_records(
+            path, FILE_HEADER.size, TICK_DTYPE.itemsize, append)
+        self._index, self.segments_written = _open_records(
+            self.index_path, 0, SEGMENT_DTYPE.itemsize, append)
+        kept = np.zeros(0, dtype=TICK_DTYPE)
+        if append and resume_t is not None and self.ticks_written:
+            ticks = _read_records(path, TICK_DTYPE, offset=FILE_HEADER.size,
+                                  count=self.ticks_written)
+            self.ticks_written = int(np.searchsorted(ticks["t"], resume_t, side="right"))
+            _truncate_records(self._file, FILE_HEADER.size, TICK_DTYPE.itemsize,
+                              self.ticks_written)
+            kept = ticks[:self.ticks_written]
+        if self.segments_written:
+            # 异常退出时索引可能比数据先落盘: 去掉指向已截掉数据之后的段
+            firsts = _read_records(self.index_path, SEGMENT_DTYPE)["first"]
+            self.segments_written = int(np.searchsorted(firsts, self.ticks_written, side="right"))
+            _truncate_records(self._index, 0, SEGMENT_DTYPE.itemsize, self.segments_written)
+        self._rollups = [_Rollup(tier_path(path, name), width, append)
+                         for name, _, width in TIERS]
+        if append and resume_t is not None:
+            for (name, _, _), rollup in zip(TIERS, self._rollups):
+                rollup.rewind(tier_path(path, name), kept, resume_t)
+        if not append:
+            self._file.write(FILE_HEADER.pack(
+                FILE_MAGIC, FORMAT_VERSION, self.start_time, device.encode("utf-8")[:32], group))
+            self._file.flush()
+
+        self._stage = np.zeros(STAGE_TICKS, dtype=TICK_DTYPE)
+        self._staged = 0
+        self._thread = threading.Thread(
+            target=self._writer_loop, name=f"Trace-{device}-Grp{group}", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def append(self, t, p, do):
+        """追加一个点 (测试线程每个 tick 调用)"""
+        self._stage[self._staged] = (t, p, do)
+        self._staged += 1
+        if self._staged == STAGE_TICKS:
+            self._put(self._stage.copy())
+            self._staged = 0
+
+    def append_block(self, t, p, do):
+        """追加一组点 (极速仿真的批量等待)，do 为标量或数组"""
+        self._flush_stage()
+        block = np.empty(len(t), dtype=TICK_DTYPE)
+        block["t"] = t
+        block["p"] = p
+        block["do"] = do
+        self._put(block)
+
+    def mark(self, cycle, phase, t):
+        """开始新的 循环/阶段 段: 之后的点归入该段"""
+        self._flush_stage()
+        self._put(("mark", int(cycle), str(phase), float(t)))
+
+    def close(self):
+        self._flush_stage()
+        self._queue.put(None)
+        self._thread.join(timeout=10.0)
+
+    def _flush_stage(self):
+        if self._staged:
+            self._put(self._stage[:self._staged].copy())
+            self._staged = 0
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    # --- 写盘线程 ---
+
+    def _writer_loop(self):
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=FLUSH_INTERVAL)
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    break
+                if isinstance(item, np.ndarray):
+                    if len(item):
+                        self._file.write(item.tobytes())
+                        self.ticks_written += len(item)
+                        for r in self._rollups:
+                            r.add(item)
+                elif item:
+                    _, cycle, phase, t0 = item
+                    rec = np.array([(cycle, phase.encode("utf-8")[:16], self.ticks_written, t0)],
+                                   dtype=SEGMENT_DTYPE)
+                    self._index.write(rec.tobytes())
+                    self.segments_written += 1
+                    # 阶段边界也 flush: 异常退出后至少保留到上一个标记为止的完整分段
+                    last_flush = 0.0
+
+                now = time.monotonic()
+                if now - last_flush >= FLUSH_INTERVAL:
+                    self._file.flush()
+                    self._index.flush()
+                    for r in self._rollups:
+                        r.file.flush()
+                    last_flush = now
+        except OSError as e:
+            log.warning("曲线存档写入失败 (%s): %s", self.path, e)
+        finally:
+            for f in (self._file, self._index):
+                f.close()
+            for r in self._rollups:
+                try:
+                    r.close()
+                except OSError as e:
+                    log.warning("曲线存档写入失败 (%s): %s", self.path, e)
+
+
+# ============================================================================
+# [SECTION 3] 读取与查询 (Reader)
+# ============================================================================
+
+def _read_records(path, dtype, offset=0, first=0, count=None):
+    """读取定长记录，忽略末尾未写完的半条 (运行中或异常退出的文件)"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return np.zeros(0, dtype=dtype)
+    total = max(0, (size - offset) // dtype.itemsize)
+    if first >= total:
+        return np.zeros(0, dtype=dtype)
+    n = total - first if count is None else min(count, total - first)
+    return np.fromfile(path, dtype=dtype, count=n, offset=offset + first * dtype.itemsize)
+
+
+class TraceStore:
+    """读取 Trace_*.trc: 分段索引常驻内存，曲线数据按段读取"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            head = f.read(FILE_HEADER.size)
+        if len(head) < FILE_HEADER.size:
+            raise ValueError(f"不是曲线存档文件: {path}")
+        magic, version, start_time, device, group = FILE_HEADER.unpack(head)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"不是曲线存档文件: {path}")
+        self.version = version
+        self.start_time = start_time
+        self.device = device.rstrip(b"\0").decode("utf-8")
+        self.group = group
+        self.refresh()
+
+    def refresh(self):
+        """重新读取索引 (正在运行的测试仍在追加数据)"""
+        self.n_ticks = max(0, (os.path.getsize(self.path) - FILE_HEADER.size)
+                           // TICK_DTYPE.itemsize)
+        idx = _read_records(os.path.splitext(self.path)[0] + ".idx", SEGMENT_DTYPE)
+        idx = idx[idx["first"] <= self.n_ticks]
+        if len(idx) == 0 or idx["first"][0] > 0:
+            # 第一个标记之前的点归入循环 0
+            head = np.array([(0, b"", 0, self.start_time)], dtype=SEGMENT_DTYPE)
+            idx = np.concatenate((head, idx))
+        self.index = idx
+        ends = np.append(idx["first"][1:], self.n_ticks)
+        self.lengths = (ends - idx["first"]).astype(np.int64)
+
+    def cycles(self):
+        """有数据的循环号 (升序)"""
+        c = self.index["cycle"][self.lengths > 0]
+        return [int(x) for x in np.unique(c[c > 0])]
+
+    def phases(self, cycle):
+        """某循环内的阶段名 (按出现顺序，去重)"""
+        sel = (self.index["cycle"] == cycle) & (self.lengths > 0)
+        names = []
+        for ph in self.index["phase"][sel]:
+            name = ph.decode("utf-8")
+            if name not in names:
+                names.append(name)
+        return names
+
+    def segments(self, cycle=None, phase=None):
+        """满足条件的段: [(cycle, phase, first, n, t0)]"""
+        sel = self.lengths > 0
+        if cycle is not None:
+            sel &= self.index["cycle"] == cycle
+        if phase is not None:
+            sel &= self.index["phase"] == phase.encode("utf-8")[:16]
+        return [(int(rec["cycle"]), rec["phase"].decode("utf-8"), int(rec["first"]), int(n),
+                 float(rec["t0"]))
+                for rec, n in zip(self.index[sel], self.lengths[sel])]
+
+    def trace(self, cycle, phase=None):
+        """某循环 (可选限定阶段) 的全部点，TICK_DTYPE 数组 (t, p, do)
+
+        同一循环重跑时 (故障后继续) 各次的段按时间顺序拼接；相邻的段合并
+        为一次连续读取。
+        """
+        ranges = []
+        for _, _, first, n, _ in self.segments(cycle, phase):
+            if ranges and ranges[-1][1] == first:
+                ranges[-1][1] = first + n
+            else:
+                ranges.append([first, first + n])
+        parts = [_read_records(self.path, TICK_DTYPE, FILE_HEADER.size, a, b - a)
+                 for a, b in ranges]
+        if not parts:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def rollup(self, tier="1m", t0=None, t1=None):
+        """汇总记录 (ROLLUP_DTYPE)，可按时间范围截取"""
+        path = tier_path(self.path, tier)
+        if t0 is None and t1 is None:
+            return _read_records(path, ROLLUP_DTYPE)
+        rows = _read_records(path, ROLLUP_DTYPE)
+        t = rows["t"]
+        a = 0 if t0 is None else int(np.searchsorted(t, t0, side="left"))
+        b = len(rows) if t1 is None else int(np.searchsorted(t, t1, side="right"))
+        return rows[a:b]
+
+
+# ============================================================================
+# [SECTION 4] 命令行 (CLI)
+# ============================================================================
+
+def _cmd_info(store):
+    cycles = store.cycles()
+    print(f"{store.device} Grp{store.group}: {store.n_ticks} 点, {len(store.index)} 段, "
+          f"{len(cycles)} 个循环")
+    overview = store.rollup("1m")
+    if len(overview):
+        print(f"时间跨度 {(overview['t'][-1] - overview['t'][0]) / 3600:.2f} h, "
+              f"压力 {overview['p_min'].min():.2f} ~ {overview['p_max'].max():.2f} Bar")
+    for name, _, _ in TIERS:
+        print(f"{name} 汇总: {len(store.rollup(name))} 条")
+    shown = cycles if len(cycles) <= 6 else cycles[:3] + [None] + cycles[-3:]
+    for c in shown:
+        if c is None:
+            print("  ...")
+            continue
+        segs = store.segments(c)
+        print(f"  循环 {c}: {sum(s[3] for s in segs)} 点, {len(segs)} 段")
+
+
+def _cmd_export(store, cycle, phase, out):
+    t0 = time.perf_counter()
+    ticks = store.trace(cycle, phase)
+    dt = (time.perf_counter() - t0) * 1000.0
+    f = open(out, "w", newline="", encoding="utf-8") if out else sys.stdout
+    try:
+        w = csv.writer(f)
+        w.writerow(["Time", "Pressure", "DO"])
+        for t, p, do in ticks:
+            w.writerow([f"{t:.3f}", f"{p:.4f}", f"{do:08b}"])
+    finally:
+        if out:
+            f.close()
+    print(f"循环 {cycle}: {len(ticks)} 点 (查询 {dt:.2f} ms)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="曲线存档 (Trace_*.trc): 查看与导出")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_info = sub.add_parser("info", help="显示存档概况与循环列表")
+    p_info.add_argument("path")
+    p_exp = sub.add_parser("export", help="导出某循环的曲线为 CSV")
+    p_exp.add_argument("path")
+    p_exp.add_argument("--cycle", type=int, required=True)
+    p_exp.add_argument("--phase", help="只导出该阶段 (如 Phase_1、Phase_2/3)")
+    p_exp.add_argument("-o", "--output", help="输出文件 (缺省写到标准输出)")
+    args = parser.parse_args(argv)
+
+    try:
+        store = TraceStore(args.path)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    if args.cmd == "info":
+        _cmd_info(store)
+    else:
+        _cmd_export(store, args.cycle, args.phase, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())